@@ -12,15 +12,6 @@ try:
 except ModuleNotFoundError as e:
     from System import Utils
 
-os.chdir(os.path.dirname(os.path.abspath(__file__)))
-
-app = QApplication(sys.argv)
-from System import Utils
-app.setWindowIcon(Utils.Icons.WindowIcon)
-
-from System.ProjectMenu import MainMenu
-from System.Compositor import CompositorWidget
-
 class ApplicationWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -149,7 +140,21 @@ class ApplicationWindow(QMainWindow):
 
         super().closeEvent(event)
 
+# Guarded so that spawned worker processes (BPM analysis) can import this module without opening a window.
 if __name__ == '__main__':
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+    app = QApplication(sys.argv)
+    from System import Utils
+    app.setWindowIcon(Utils.Icons.WindowIcon)
+
+    from System.ProjectMenu import MainMenu
+    from System.Compositor import CompositorWidget
+    from System.BPMAnalyze import analysis_process
+
+    # Spawned now, so numba is already compiled by the time a song is imported.
+    analysis_process.start()
+
     if os.path.exists("System/Fonts/NDot57.otf"):
         QFontDatabase.addApplicationFont("System/Fonts/NDot57.otf")
     
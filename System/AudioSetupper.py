@@ -1,7 +1,6 @@
 import re
 import time
 import pygame
-import librosa
 
 import numpy as np
 
@@ -15,6 +14,8 @@ from . import UI
 from . import Utils
 from . import Styles
 from . import BPMAnalyze
+from .PeakPyramid import PeakPyramid
+from .AudioStore import audio_store
 
 class AudioLoaderWorker(QObject):
     dataReady = pyqtSignal(np.ndarray, int, list)
@@ -26,16 +27,11 @@ class AudioLoaderWorker(QObject):
 
     @pyqtSlot()
     def run(self):
-        audio_data, sampling_rate = librosa.load(self.file_path, sr=44100)
+        audio_data, sampling_rate = audio_store.load(self.file_path, 44100)
 
         peaks = []
         if audio_data is not None and len(audio_data) > 0 and self.target_width > 0:
-            num_peaks = self.target_width * 2
-            samples_per_peak = max(1, len(audio_data) // num_peaks)
-            for i in range(0, len(audio_data), samples_per_peak):
-                chunk = audio_data[i:i + samples_per_peak]
-                if len(chunk) > 0:
-                    peaks.append(np.max(np.abs(chunk)))
+            peaks = PeakPyramid.from_audio(audio_data).abs_peaks(self.target_width * 2).tolist()
         
         self.dataReady.emit(audio_data, sampling_rate, peaks)
 
@@ -259,6 +255,7 @@ class AudioSetupDialog(QDialog):
         self.bpm_anim_timer.start(14)
         self._bpm_anim_target = np.random.randint(60, 180)
         self._bpm_real_target = None
+        self._bpm_estimated = False
         self._bpm_anim_speed = 14
 
         self.snapped_times = None
@@ -312,6 +309,7 @@ class AudioSetupDialog(QDialog):
         self.pulse_direction = 1
 
         self.bpm_worker = BPMAnalyze.BPMWorker(self.file_path)
+        self.bpm_worker.bpm_estimated.connect(self.on_bpm_estimated)
         self.bpm_worker.bpm_ready.connect(self.on_bpm_ready)
         self.bpm_worker.start()
 
@@ -381,7 +379,8 @@ class AudioSetupDialog(QDialog):
     
     def stop_bpm_worker(self):
         if self.bpm_worker and self.bpm_worker.isRunning():
-            self.bpm_worker.requestInterruption()
+            self.bpm_worker.cancel()
+            self.bpm_worker.wait()
             self.bpm_worker = None
         
     def closeEvent(self, event):
@@ -445,7 +444,8 @@ class AudioSetupDialog(QDialog):
                 self.bpm_anim_timer.setInterval(new_speed)
 
         else:
-            if current == target:
+            # Until the first estimate arrives the counter just wanders.
+            if current == target and not self._bpm_estimated:
                 self._bpm_anim_target = np.random.randint(60, 180)
 
     def accept(self):
@@ -467,6 +467,11 @@ class AudioSetupDialog(QDialog):
         self.end_sample = int(self.trim_widget.end_time * self.sampling_rate)
         super().accept()
 
+    def on_bpm_estimated(self, bpm, beat_times):
+        if self.bpm_animating:
+            self._bpm_estimated = True
+            self._bpm_anim_target = int(round(bpm))
+
     def on_bpm_ready(self, bpm, first_beat_offset_sec, snapped_times):
         self.snapped_times = snapped_times
         self.first_beat_offset_sec = first_beat_offset_sec
@@ -0,0 +1,226 @@
+import os
+import glob
+import atexit
+import shutil
+import hashlib
+import tempfile
+import threading
+
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import numpy as np
+
+FOLDER_PREFIX = "cassette-audio-"
+LOCK_FILE = "session.lock"
+STORE_LIMIT_BYTES = 1 << 30
+
+def _folder_in_use(folder: str) -> bool:
+    lock_path = os.path.join(folder, LOCK_FILE)
+    if not os.path.exists(lock_path):
+        return False
+
+    if os.name == "nt":
+        # A running session keeps its lock file open, and Windows refuses to delete open files.
+        try:
+            os.remove(lock_path)
+            return False
+
+        except OSError:
+            return True
+
+    import fcntl
+
+    with open(lock_path, "a") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return False
+
+        except OSError:
+            return True
+
+def sweep_stale_folders(parent: str = None):
+    """Removes session folders left behind by earlier runs.
+
+    Windows cannot delete a file while it is mapped, so a session that exits
+    with views still alive leaves its .npy files behind. They are unmapped by
+    the next run and can go then.
+    """
+    for folder in glob.glob(os.path.join(parent or tempfile.gettempdir(), FOLDER_PREFIX + "*")):
+        if os.path.isdir(folder) and not _folder_in_use(folder):
+            shutil.rmtree(folder, True)
+
+class AudioStore:
+    """Decodes each audio file once per session and hands out read-only views.
+
+    Entries are keyed by (content hash, sampling rate), so a copied file (such
+    as a project's full_song.ogg) reuses the decode of the original. `sr=None`
+    means the file's native rate. Decoded samples are written to .npy files in a
+    session directory and mapped back read-only. That keeps them out of the
+    Python heap and lets other processes open the same data. Once the files
+    pass `limit_bytes`, the least recently loaded entries are dropped, except
+    those `hold` is lending to another process.
+    """
+
+    def __init__(self, folder = None, limit_bytes = STORE_LIMIT_BYTES):
+        self.limit_bytes = limit_bytes
+        self._folder = folder
+        self._lock = threading.Lock()
+        self._key_locks = {}
+        self._entries = OrderedDict()
+        self._hashes = {}
+        self._holds = {}
+        self._stale_files = []
+        self._session_lock = None
+
+    @property
+    def folder(self):
+        if self._folder is None:
+            sweep_stale_folders()
+
+            self._folder = tempfile.mkdtemp(prefix=FOLDER_PREFIX)
+            self._session_lock = open(os.path.join(self._folder, LOCK_FILE), "w")
+
+            if os.name != "nt":
+                import fcntl
+                fcntl.flock(self._session_lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+            atexit.register(self.close)
+
+        return self._folder
+
+    @property
+    def size_bytes(self):
+        with self._lock:
+            return sum(entry[0].nbytes for entry in self._entries.values())
+
+    def file_hash(self, path: str):
+        stat = os.stat(path)
+        memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+
+        digest = self._hashes.get(memo_key)
+        if digest is None:
+            sha1 = hashlib.sha1()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    sha1.update(chunk)
+
+            digest = self._hashes[memo_key] = sha1.hexdigest()
+
+        return digest
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def load(self, path: str, sr: int = None):
+        """Returns (samples, sampling_rate); the samples are a read-only view shared by every caller."""
+        key = (self.file_hash(path), sr)
+
+        # Concurrent callers for the same key wait for the first decode instead of starting their own.
+        with self._key_lock(key):
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    self._entries.move_to_end(key)
+
+            if entry is None:
+                import librosa
+
+                audio_data, sampling_rate = librosa.load(path, sr=sr)
+                entry = self._store(key, audio_data, sampling_rate)
+
+        return entry
+
+    @contextmanager
+    def hold(self, path: str, sr: int = None):
+        """load() for another process: yields (data path, sampling_rate) and keeps the entry from being evicted until the block exits.
+
+        The other process maps the .npy file read-only with np.load(data_path, mmap_mode="r").
+        """
+        key = (self.file_hash(path), sr)
+
+        # Held before loading, so an eviction from another thread cannot slip in between.
+        with self._lock:
+            self._holds[key] = self._holds.get(key, 0) + 1
+
+        try:
+            _, sampling_rate = self.load(path, sr)
+            yield self._data_path(key), sampling_rate
+
+        finally:
+            with self._lock:
+                self._holds[key] -= 1
+                if not self._holds[key]:
+                    del self._holds[key]
+
+    def _data_path(self, key):
+        digest, sr = key
+        return os.path.join(self.folder, f"{digest}_{sr or 'native'}.npy")
+
+    def _store(self, key, audio_data, sampling_rate):
+        data_path = self._data_path(key)
+        np.save(data_path, np.ascontiguousarray(audio_data, dtype=np.float32))
+
+        entry = (np.load(data_path, mmap_mode="r"), int(sampling_rate))
+        with self._lock:
+            self._entries[key] = entry
+            self._evict(keep=key)
+
+        self._remove_stale_files()
+        return entry
+
+    def _evict(self, keep):
+        # Callers still holding an evicted view keep it; only the store forgets it.
+        total = sum(entry[0].nbytes for entry in self._entries.values())
+
+        for key in list(self._entries):
+            if total <= self.limit_bytes:
+                break
+
+            if key == keep or key in self._holds:
+                continue
+
+            total -= self._entries.pop(key)[0].nbytes
+            self._key_locks.pop(key, None)
+            self._stale_files.append(self._data_path(key))
+
+    def _remove_stale_files(self):
+        # On Windows a file stays locked while any view of it is alive, so it is retried on the next eviction or at exit.
+        with self._lock:
+            stale_files, self._stale_files = self._stale_files, []
+
+        kept = []
+        for path in stale_files:
+            try:
+                os.remove(path)
+
+            except FileNotFoundError:
+                pass
+
+            except OSError:
+                kept.append(path)
+
+        with self._lock:
+            self._stale_files.extend(kept)
+
+    def clear(self):
+        with self._lock:
+            self._stale_files.extend(self._data_path(key) for key in self._entries)
+            self._entries.clear()
+            self._key_locks.clear()
+
+        self._remove_stale_files()
+
+    def close(self):
+        """Drops every entry and deletes the session folder. Whatever is still mapped is left to sweep_stale_folders."""
+        self.clear()
+
+        if self._session_lock is not None:
+            self._session_lock.close()
+            self._session_lock = None
+
+        if self._folder is not None:
+            shutil.rmtree(self._folder, True)
+
+audio_store = AudioStore()
@@ -0,0 +1,365 @@
+import time
+import threading
+
+from collections import OrderedDict
+
+import numpy as np
+
+try:
+    from pygame._sdl2 import audio as sdl_audio
+
+except ImportError:
+    sdl_audio = None
+
+STREAM_BLOCK = 512
+
+STRETCH_CHUNK_SECONDS = 10
+STRETCH_PAD_SECONDS = 1
+STRETCH_CROSSFADE_SECONDS = 0.05
+STRETCH_CACHE_BYTES = 256 * 1024 * 1024
+
+def pcm16_scale(audio_data: np.ndarray) -> float:
+    peak = float(np.max(np.abs(audio_data))) if np.size(audio_data) else 0.0
+    return 32767.0 / peak if peak > 0 else 0.0
+
+def to_pcm16(audio_data: np.ndarray, scale: float = None) -> np.ndarray:
+    """Converts float audio (mono, or librosa's channels-first stereo) into a peak-normalized (frames, channels) int16 array."""
+    audio_data = np.asarray(audio_data, dtype=np.float32)
+    frames = audio_data.reshape(-1, 1) if audio_data.ndim == 1 else audio_data.T
+
+    if scale is None:
+        scale = pcm16_scale(frames)
+
+    return np.ascontiguousarray(np.clip(frames * scale, -32768, 32767).astype(np.int16))
+
+class StretchRender:
+    """Pitch-preserving slowed copy of a song, filled chunk by chunk.
+
+    Chunk i covers STRETCH_CHUNK_SECONDS of the original timeline. It is
+    stretched with STRETCH_PAD_SECONDS of context on both sides and then
+    trimmed. Independent phase-vocoder runs do not agree in phase, so each chunk
+    also keeps a short tail past its end and a short lead-in before its start.
+    A chunk boundary is crossfaded once both sides are rendered, always inside
+    the chunk rendered second: a ready chunk may already be playing and is
+    never rewritten. `ready` tells the player which parts it can already use.
+    """
+
+    def __init__(self, audio_data: np.ndarray, sampling_rate: int, speed: float, scale: float):
+        self.speed = speed
+        self.length = audio_data.shape[-1]
+        self.chunk_frames = int(STRETCH_CHUNK_SECONDS * sampling_rate)
+        self.pad_frames = int(STRETCH_PAD_SECONDS * sampling_rate)
+        self.fade_frames = int(STRETCH_CROSSFADE_SECONDS * sampling_rate)
+        self.ready = np.zeros(max(1, -(-self.length // self.chunk_frames)), dtype=bool)
+
+        channels = 1 if audio_data.ndim == 1 else audio_data.shape[0]
+        self.buffer = np.zeros((int(np.ceil(self.length / speed)), channels), dtype=np.int16)
+
+        self._audio_data = audio_data
+        self._scale = scale
+        self._tails = {}
+        self._leads = {}
+
+    @property
+    def complete(self):
+        return bool(self.ready.all())
+
+    @property
+    def chunk_count(self):
+        return len(self.ready)
+
+    def chunk_at(self, position: float):
+        return min(self.chunk_count - 1, max(0, int(position // self.chunk_frames)))
+
+    def covers(self, position: float, span: float):
+        return bool(self.ready[self.chunk_at(position):self.chunk_at(position + span) + 1].all())
+
+    def render_chunk(self, index: int):
+        import librosa
+
+        start = index * self.chunk_frames
+        end = min(self.length, start + self.chunk_frames)
+        context_start = max(0, start - self.pad_frames)
+        context_end = min(self.length, end + self.pad_frames)
+
+        stretched = librosa.effects.time_stretch(self._audio_data[..., context_start:context_end], rate=self.speed)
+
+        out_start = int(start / self.speed)
+        out_end = min(len(self.buffer), int(end / self.speed)) if end < self.length else len(self.buffer)
+        trim = int((start - context_start) / self.speed)
+
+        pcm = to_pcm16(stretched, self._scale)
+        block = pcm[trim:trim + out_end - out_start]
+        self.buffer[out_start:out_start + len(block)] = block
+
+        if index > 0 and self.ready[index - 1]:
+            self._fade_in(out_start, self._tails.pop(index - 1, None), head = True)
+        else:
+            self._leads[index] = pcm[max(0, trim - self.fade_frames):trim]
+
+        if index + 1 < self.chunk_count and self.ready[index + 1]:
+            self._fade_in(out_start + len(block), self._leads.pop(index + 1, None), head = False)
+        else:
+            self._tails[index] = pcm[trim + len(block):trim + len(block) + self.fade_frames]
+
+        self.ready[index] = True
+
+        if self.complete:
+            self._audio_data = None
+
+    def _fade_in(self, boundary, other, head):
+        """Crossfades the neighbour's overlap into this chunk on its side of `boundary`.
+
+        At the boundary itself the result equals the neighbour's audio, so the
+        ready neighbour continues without a seam.
+        """
+        if other is None or not len(other):
+            return
+
+        if head:
+            start, end = boundary, min(len(self.buffer), boundary + len(other))
+            other = other[:end - start]
+            ramp = np.linspace(0.0, 1.0, len(other), dtype=np.float32)[:, None]
+
+        else:
+            start, end = max(0, boundary - len(other)), boundary
+            other = other[len(other) - (end - start):]
+            ramp = np.linspace(1.0, 0.0, len(other), dtype=np.float32)[:, None]
+
+        own = self.buffer[start:end].astype(np.float32)
+        self.buffer[start:end] = (other * (1.0 - ramp) + own * ramp).astype(np.int16)
+
+class StretchCache:
+    """LRU of StretchRenders keyed by (audio hash, speed). Partial renders are kept and resumed.
+
+    The cache is bounded by the size of the rendered buffers, which are
+    allocated in full up front. The most recent render is always kept, even
+    when it alone is over the limit, because it is the one playing.
+    """
+
+    def __init__(self, max_bytes = STRETCH_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._renders = OrderedDict()
+
+    @property
+    def nbytes(self):
+        return sum(render.buffer.nbytes for render in self._renders.values())
+
+    def get(self, key):
+        render = self._renders.get(key)
+        if render is not None:
+            self._renders.move_to_end(key)
+
+        return render
+
+    def put(self, key, render):
+        self._renders[key] = render
+        self._renders.move_to_end(key)
+
+        while len(self._renders) > 1 and self.nbytes > self.max_bytes:
+            self._renders.popitem(last=False)
+
+class StreamingPlayer:
+    """Plays a PCM buffer through an SDL audio callback.
+
+    The buffer is converted once per load. SDL pulls small blocks from the audio
+    thread, and each block is read from the current position. Seeking, pausing
+    and changing speed therefore only update a few fields under a lock. The
+    output device is reopened only when a file with a different sampling rate
+    or channel count is loaded. For speeds other than 1.0 the player reads from
+    the attached StretchRender where it is ready. Elsewhere it falls back to
+    linear resampling, which shifts pitch just like the old mixer re-init did.
+
+    `clock_ms` is the playback clock for everything on screen and on the phone.
+    Each callback anchors it to the block it hands to SDL. In between, it is
+    extrapolated with perf_counter and shifted back by the output latency. The
+    value never goes backwards, except after an explicit seek.
+
+    While `device_log` is a list, every callback appends (perf_counter, audible
+    ms, speed) to it for Player.DriftLogger.
+    """
+
+    def __init__(self, block_size = STREAM_BLOCK, output_latency_ms = 0.0):
+        self.block_size = block_size
+        self.output_latency_ms = output_latency_ms
+        self.sampling_rate = 0
+        self.channels = 0
+
+        self._lock = threading.Lock()
+        self._device = None
+        self._buffer = None
+        self._position = 0.0
+        self._speed = 1.0
+        self._stretch = None
+        self._playing = False
+
+        self._anchor_position = 0.0
+        self._anchor_time = None
+        self._anchor_frames = 0
+        self._anchor_speed = 1.0
+        self._clock = 0.0
+        self.device_log = None
+
+    @property
+    def available(self):
+        return sdl_audio is not None
+
+    @property
+    def is_playing(self):
+        return self._playing
+
+    @property
+    def finished(self):
+        return self._buffer is None or self._position >= len(self._buffer)
+
+    @property
+    def position_ms(self):
+        """Read position of the stream, which runs ahead of what is audible."""
+        if not self.sampling_rate:
+            return 0.0
+
+        return self._position / self.sampling_rate * 1000.0
+
+    @property
+    def latency_frames(self):
+        device_frames = self._device.chunksize if self._device is not None else self.block_size
+        return device_frames + self.output_latency_ms / 1000.0 * self.sampling_rate
+
+    def clock_ms(self):
+        """Monotonic position of the audio that is currently reaching the speakers."""
+        if not self.sampling_rate:
+            return 0.0
+
+        with self._lock:
+            if self._playing and self._anchor_time is not None:
+                elapsed = min((time.perf_counter() - self._anchor_time) * self.sampling_rate, self._anchor_frames)
+                heard = self._anchor_position + (elapsed - self.latency_frames) * self._anchor_speed
+
+                if self._buffer is not None:
+                    heard = min(heard, len(self._buffer))
+
+                self._clock = max(self._clock, heard)
+
+            return self._clock / self.sampling_rate * 1000.0
+
+    def _reset_clock(self, position):
+        self._anchor_position = position
+        self._anchor_time = None
+        self._clock = position
+
+    def load(self, audio_data: np.ndarray, sampling_rate: int):
+        buffer = to_pcm16(audio_data)
+
+        with self._lock:
+            self._playing = False
+            self._buffer = buffer
+            self._stretch = None
+            self._position = 0.0
+            self._reset_clock(0.0)
+
+        if self._device is None or sampling_rate != self.sampling_rate or buffer.shape[1] != self.channels:
+            self._open_device(sampling_rate, buffer.shape[1])
+
+    def _open_device(self, sampling_rate, channels):
+        self.close()
+
+        if sdl_audio is None:
+            raise RuntimeError("pygame was built without SDL2 audio support.")
+
+        # pygame does not accept None for the default device, so the first output is used.
+        names = sdl_audio.get_audio_device_names(False)
+        if not names:
+            raise RuntimeError("No audio output device found.")
+
+        self._device = sdl_audio.AudioDevice(
+            names[0], False, sampling_rate, sdl_audio.AUDIO_S16, channels,
+            self.block_size, 0, self._fill
+        )
+        self.sampling_rate = sampling_rate
+        self.channels = channels
+
+    def close(self):
+        if self._device is not None:
+            self._device.pause(1)
+            self._device.close()
+            self._device = None
+
+    def play(self, from_ms: float = None):
+        if self._device is None:
+            raise RuntimeError("No audio output device is open.")
+
+        with self._lock:
+            if from_ms is not None:
+                self._position = max(0.0, from_ms / 1000.0 * self.sampling_rate)
+
+            self._reset_clock(self._position)
+            self._playing = True
+
+        self._device.pause(0)
+
+    def pause(self):
+        self.clock_ms()
+
+        with self._lock:
+            self._playing = False
+
+        if self._device is not None:
+            self._device.pause(1)
+
+    def seek(self, ms: float):
+        with self._lock:
+            self._position = max(0.0, ms / 1000.0 * self.sampling_rate)
+            self._reset_clock(self._position)
+
+    def set_speed(self, speed: float, stretch: StretchRender = None):
+        with self._lock:
+            self._speed = float(speed)
+            self._stretch = stretch
+
+    def _fill(self, device, stream):
+        out = np.frombuffer(stream, dtype=np.int16).reshape(-1, self.channels)
+        frames = len(out)
+
+        with self._lock:
+            buffer = self._buffer
+            position = self._position
+            speed = self._speed
+
+            if not self._playing or buffer is None:
+                out[:] = 0
+                return
+
+            # Anchored even past the end, so the clock still runs out the last audible block.
+            self._anchor_position = position
+            self._anchor_time = time.perf_counter()
+            self._anchor_frames = frames
+            self._anchor_speed = speed
+
+            if self.device_log is not None:
+                # What the device has pulled, less what is still buffered ahead of the speakers.
+                self.device_log.append((self._anchor_time, (position - self.latency_frames * speed) / self.sampling_rate * 1000.0, speed))
+
+            if position >= len(buffer):
+                out[:] = 0
+                return
+
+            self._position = position + frames * speed
+            stretch = self._stretch
+
+        if stretch is not None and stretch.speed == speed and stretch.covers(position, frames * speed):
+            start = int(position / speed)
+            block = stretch.buffer[start:start + frames]
+
+        elif speed == 1.0:
+            start = int(position)
+            block = buffer[start:start + frames]
+
+        else:
+            points = position + np.arange(frames) * speed
+            points = points[points < len(buffer) - 1]
+            first = points.astype(np.int64)
+            weight = (points - first)[:, None]
+            block = buffer[first] * (1.0 - weight) + buffer[first + 1] * weight
+
+        out[:len(block)] = block
+        out[len(block):] = 0
@@ -1,3 +1,7 @@
+import time
+import threading
+import multiprocessing
+
 from numba import config
 
 import librosa
@@ -7,8 +11,14 @@ from PyQt5.QtCore import *
 from scipy.signal import medfilt
 
 from System.Constants import *
+from System.AudioStore import audio_store
 
-def snap_beats_to_onsets(bpm_times, onset_times, onset_strengths, should_interrupt=lambda: False):
+STREAM_BLOCK_SECONDS = 0.5
+ESTIMATE_MIN_SECONDS = 3
+ESTIMATE_INTERVAL = 0.5
+TOP_DB = 80.0
+
+def _snap_beats_to_onsets_reference(bpm_times, onset_times, onset_strengths, should_interrupt=lambda: False):
     snapped = []
     onset_times = np.array(onset_times)
     onset_strengths = np.array(onset_strengths)
@@ -33,21 +43,143 @@ def snap_beats_to_onsets(bpm_times, onset_times, onset_strengths, should_interru
 
     return np.array(snapped)
 
-def analyze_bpm_and_beat_grid(audio_path, sr=44100, hop_length=256, min_consistent_beats=7, tolerance=0.07, should_interrupt=lambda: False):
-    if should_interrupt():
-        return 0, 0, []
+def snap_beats_to_onsets(bpm_times, onset_times, onset_strengths, should_interrupt=lambda: False):
+    """Snaps every grid beat to its strongest onset within BEAT_MAX_DISTANCE, dropping weak ones.
 
-    y, sr = librosa.load(audio_path, sr=sr)
-    if should_interrupt():
-        return 0, 0, []
+    Each beat's candidates are found with searchsorted over the sorted onsets
+    (with a small margin), then filtered by the same `abs(onset - beat) <=
+    BEAT_MAX_DISTANCE` test as before, so float rounding at the window edges
+    cannot change the result. Ties go to the onset listed first, like argmax.
+    """
+    bpm_times = np.asarray(bpm_times, dtype=np.float64)
+    onset_times = np.array(onset_times)
+    onset_strengths = np.array(onset_strengths)
+
+    if should_interrupt() or not len(bpm_times) or not len(onset_times):
+        return np.array([])
+
+    order = np.argsort(onset_times, kind="stable")
+    sorted_times = onset_times[order]
+    margin = BEAT_MAX_DISTANCE * (1 + 1e-9) + 1e-9
+
+    lo = np.searchsorted(sorted_times, bpm_times - margin, "left")
+    hi = np.searchsorted(sorted_times, bpm_times + margin, "right")
+    counts = hi - lo
+
+    # Flattened (beat, onset) pairs for every window.
+    beats = np.repeat(np.arange(len(bpm_times)), counts)
+    offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    onsets = order[np.repeat(lo, counts) + offsets]
+
+    inside = np.abs(onset_times[onsets] - bpm_times[beats]) <= BEAT_MAX_DISTANCE
+    beats, onsets = beats[inside], onsets[inside]
+
+    if not len(beats):
+        return np.array([])
+
+    # Per beat: strongest first, then lowest onset index.
+    ranked = np.lexsort((onsets, -onset_strengths[onsets], beats))
+    first = np.flatnonzero(np.diff(beats[ranked], prepend=-1))
+    best = onsets[ranked[first]]
+    best = best[onset_strengths[best] >= STRENGTH_THRESHOLD]
+
+    return np.array(list(onset_times[best]))
+
+def audio_blocks(audio_data, sampling_rate, block_seconds=STREAM_BLOCK_SECONDS):
+    """Mono float32 blocks of `block_seconds` from decoded (possibly memory-mapped) samples."""
+    if audio_data.ndim > 1:
+        audio_data = audio_data.mean(axis=0)
+
+    block = int(block_seconds * sampling_rate)
+    return (np.asarray(audio_data[i:i + block], dtype=np.float32) for i in range(0, len(audio_data), block))
+
+class StreamingBPMAnalyzer:
+    """Onset envelope and beat estimates for audio that arrives block by block.
 
-    duration = librosa.get_duration(y=y, sr=sr)
-    onset_env = librosa.onset.onset_strength(y=y, sr=sr, hop_length=hop_length)
+    Follows librosa.onset.onset_strength: centered mel frames in dB, positive
+    flux against the previous frame, averaged over bands. Only the samples of
+    frames that are not complete yet are kept, plus the mel dB columns (128
+    float32 values per hop), because the dB floor is TOP_DB below the loudest
+    frame. Provisional estimates use the loudest frame so far; once the whole
+    file is in, that is the same floor librosa uses.
+    """
+
+    def __init__(self, sampling_rate: int, hop_length: int = 256, n_fft: int = 2048):
+        self.sampling_rate = sampling_rate
+        self.hop_length = hop_length
+        self.n_fft = n_fft
+        self.samples = 0
+        self.finished = False
+
+        self._mel_basis = librosa.filters.mel(sr=sampling_rate, n_fft=n_fft)
+        self._pending = np.zeros(n_fft // 2, dtype=np.float32)
+        self._mel_db = []
+        self._max_db = -np.inf
+
+    @property
+    def duration(self):
+        return self.samples / self.sampling_rate
+
+    def feed(self, block: np.ndarray):
+        block = np.asarray(block, dtype=np.float32)
+        self.samples += len(block)
+        self._push(block)
+
+    def finish(self):
+        if not self.finished:
+            self._push(np.zeros(self.n_fft // 2, dtype=np.float32))
+            self.finished = True
+
+    def _push(self, block):
+        buffer = np.concatenate((self._pending, block))
+        if len(buffer) < self.n_fft:
+            self._pending = buffer
+            return
+
+        frames = 1 + (len(buffer) - self.n_fft) // self.hop_length
+        used = (frames - 1) * self.hop_length + self.n_fft
+        self._pending = buffer[frames * self.hop_length:]
+
+        spectrum = np.abs(librosa.stft(buffer[:used], n_fft=self.n_fft, hop_length=self.hop_length, center=False)) ** 2
+        mel_db = librosa.power_to_db(self._mel_basis @ spectrum, top_db=None)
+
+        self._max_db = max(self._max_db, float(mel_db.max()))
+        self._mel_db.append(mel_db)
+
+    def onset_envelope(self):
+        # librosa pads the front by the lag plus its own centering shift.
+        padding = np.zeros(1 + self.n_fft // (2 * self.hop_length), dtype=np.float32)
+
+        if self._mel_db:
+            mel_db = np.maximum(np.hstack(self._mel_db), self._max_db - TOP_DB)
+            envelope = np.concatenate((padding, np.maximum(0.0, np.diff(mel_db, axis=1)).mean(axis=0)))
+
+        else:
+            envelope = padding
+
+        if self.finished:
+            envelope = envelope[:1 + self.samples // self.hop_length]
+
+        return envelope
+
+    def estimate(self):
+        """Provisional (bpm, beat_times) from everything fed so far."""
+        tempo, beat_times = librosa.beat.beat_track(
+            onset_envelope=self.onset_envelope(),
+            sr=self.sampling_rate,
+            hop_length=self.hop_length,
+            units="time"
+        )
+
+        return float(np.atleast_1d(tempo)[0]), list(beat_times)
+
+def beat_grid_from_envelope(onset_env, sr, hop_length, duration, min_consistent_beats=7, tolerance=0.07, should_interrupt=lambda: False):
     tempo, _ = librosa.beat.beat_track(onset_envelope=onset_env, sr=sr, hop_length=hop_length)
-    tempo *= 2
+    # Newer librosa returns the tempo as a one-element array.
+    tempo = float(np.atleast_1d(tempo)[0]) * 2
     beat_interval = 60.0 / tempo
 
-    onset_frames = librosa.onset.onset_detect(y=y, sr=sr, hop_length=hop_length, backtrack=True)
+    onset_frames = librosa.onset.onset_detect(onset_envelope=onset_env, sr=sr, hop_length=hop_length, backtrack=True)
     onset_times = librosa.frames_to_time(onset_frames, sr=sr, hop_length=hop_length)
     onset_strengths = onset_env[onset_frames]
 
@@ -87,27 +219,173 @@ def analyze_bpm_and_beat_grid(audio_path, sr=44100, hop_length=256, min_consiste
 
     return tempo / 2, pseudo_first_beat, list(snapped_beats)
 
+def analyze_audio(audio_data, sampling_rate, hop_length=256, min_consistent_beats=7, tolerance=0.07, should_interrupt=lambda: False, on_estimate=None):
+    """Feeds decoded samples through a StreamingBPMAnalyzer block by block and snaps the final beat grid to onsets.
+
+    `on_estimate(bpm, beat_times)` is called with provisional results along the way.
+    """
+    analyzer = StreamingBPMAnalyzer(sampling_rate, hop_length)
+    last_estimate = None
+
+    for block in audio_blocks(audio_data, sampling_rate):
+        if should_interrupt():
+            return 0, 0, []
+
+        analyzer.feed(block)
+
+        if on_estimate is None or analyzer.duration < ESTIMATE_MIN_SECONDS:
+            continue
+
+        if last_estimate is None or time.perf_counter() - last_estimate >= ESTIMATE_INTERVAL:
+            on_estimate(*analyzer.estimate())
+            last_estimate = time.perf_counter()
+
+    analyzer.finish()
+
+    return beat_grid_from_envelope(
+        analyzer.onset_envelope(), sampling_rate, hop_length, analyzer.duration,
+        min_consistent_beats, tolerance, should_interrupt
+    )
+
+def analyze_bpm_and_beat_grid(audio_path, sr=44100, hop_length=256, min_consistent_beats=7, tolerance=0.07, should_interrupt=lambda: False, on_estimate=None):
+    """analyze_audio for a file, decoded once at `sr` through the audio store."""
+    if should_interrupt():
+        return 0, 0, []
+
+    audio_data, sampling_rate = audio_store.load(audio_path, sr)
+    return analyze_audio(audio_data, sampling_rate, hop_length, min_consistent_beats, tolerance, should_interrupt, on_estimate)
+
+def _warm_up():
+    # Runs every numba-compiled path of the analysis once on a few seconds of noise.
+    sampling_rate = 22050
+    noise = np.random.default_rng(0).standard_normal(sampling_rate * 4).astype(np.float32) * 0.1
+
+    analyzer = StreamingBPMAnalyzer(sampling_rate)
+    analyzer.feed(noise)
+    analyzer.estimate()
+    analyzer.finish()
+    beat_grid_from_envelope(analyzer.onset_envelope(), sampling_rate, analyzer.hop_length, analyzer.duration)
+
+def _analysis_main(conn):
+    # The child never decodes: it maps the parent's audio store entries read-only.
+    _warm_up()
+
+    while True:
+        try:
+            data_path, sampling_rate = conn.recv()
+
+        except EOFError:
+            return
+
+        try:
+            audio_data = np.load(data_path, mmap_mode="r")
+            result = analyze_audio(audio_data, sampling_rate, on_estimate=lambda bpm, beats: conn.send(("estimate", bpm, beats)))
+            conn.send(("ready", *map(float, result[:2]), [float(beat) for beat in result[2]]))
+
+        except Exception as e:
+            conn.send(("error", f"{type(e).__name__}: {e}"))
+
+        finally:
+            audio_data = None
+
+class AnalysisProcess:
+    """A long-lived child process that runs analyze_audio off the GIL.
+
+    The process is spawned once (`start` at launch warms numba in it) and
+    reused for every file. It reads the audio store's decode of the file
+    instead of decoding it again. Requests and results travel over a Pipe. Cancelling
+    terminates the child mid-analysis and spawns a fresh one for the next request.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._busy = threading.Lock()
+        self._context = multiprocessing.get_context("spawn")
+        self._process = None
+        self._conn = None
+
+    def start(self):
+        with self._lock:
+            if self._process is not None and self._process.is_alive():
+                return
+
+            parent_conn, child_conn = self._context.Pipe()
+            self._process = self._context.Process(
+                target=_analysis_main,
+                args=(child_conn,),
+                name="BPMAnalysis",
+                daemon=True
+            )
+            self._process.start()
+            child_conn.close()
+            self._conn = parent_conn
+
+    def analyze(self, audio_path, on_estimate=None, sr=44100):
+        """Blocks until the result arrives. Returns None if the analysis was cancelled.
+
+        The file is decoded at `sr` through the audio store in this process, and
+        the child maps that decode, which stays held until the child is done with it.
+        """
+        with self._busy, audio_store.hold(audio_path, sr) as (data_path, sampling_rate):
+            self.start()
+            conn = self._conn
+
+            try:
+                conn.send((data_path, sampling_rate))
+
+                while True:
+                    kind, *message = conn.recv()
+
+                    if kind == "estimate":
+                        if on_estimate is not None:
+                            on_estimate(*message)
+
+                    elif kind == "ready":
+                        return tuple(message)
+
+                    else:
+                        raise RuntimeError(*message)
+
+            except (EOFError, OSError):
+                return None
+
+            finally:
+                if conn is not self._conn:
+                    conn.close()
+
+    def stop(self):
+        with self._lock:
+            if self._process is None:
+                return False
+
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+        return True
+
+    def cancel(self):
+        if self.stop():
+            self.start()
+
+analysis_process = AnalysisProcess()
+
 class BPMWorker(QThread):
+    bpm_estimated = pyqtSignal(float, list)
     bpm_ready = pyqtSignal(float, float, list)
     
     def __init__(self, file_path):
         super().__init__()
         self.file_path = file_path
+        self.cancelled = False
     
     def run(self):
-        def should_interrupt():
-            return self.isInterruptionRequested()
-    
-        bpm, first_beat_offset_sec, snapped_times = analyze_bpm_and_beat_grid(
-            self.file_path,
-            should_interrupt=should_interrupt
-        )
+        result = analysis_process.analyze(self.file_path, on_estimate=self.bpm_estimated.emit)
     
-        if not self.isInterruptionRequested():
-            self.bpm_ready.emit(bpm, first_beat_offset_sec, snapped_times)
+        if result is not None and not self.cancelled:
+            self.bpm_ready.emit(*result)
     
-    def stop_bpm_worker(self):
-        if self.bpm_worker and self.bpm_worker.isRunning():
-            self.bpm_worker.requestInterruption()
-            self.bpm_worker.quit()
-            self.bpm_worker.wait()
\ No newline at end of file
+    def cancel(self):
+        if self.isRunning() and not self.cancelled:
+            self.cancelled = True
+            analysis_process.cancel()
@@ -0,0 +1,193 @@
+import os
+import sys
+import json
+import time
+import argparse
+import multiprocessing
+
+from concurrent.futures import ProcessPoolExecutor
+
+from System import Porter
+from System import Exporter
+from System import ProjectSaver
+
+from System.Constants import *
+
+AUDIO_EXTENSIONS = ('.mp3', '.wav', '.ogg', '.flac')
+
+# The folder Utils.get_songs_path resolves into, read without creating any project folders.
+SONGS_FOLDER = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Songs")
+
+class SavedProject:
+    """The parts of a Composition that exporting and porting read, loaded from Save.json alone.
+
+    Nothing here touches Qt, the GlyphSyncer or pygame, so whole libraries can
+    be exported from worker processes.
+    """
+
+    def __init__(self, project_path: str):
+        with open(os.path.join(project_path, "Save.json"), "r", encoding="utf-8") as f:
+            settings = json.load(f)
+
+        self.id = os.path.basename(os.path.normpath(project_path))
+        self.path = project_path
+        self.model = settings.get("model")
+        self.title = settings["audio"].get("title") or self.id
+        self.bpm = settings["audio"]["bpm"]
+        self.audio_duration = settings["audio"]["duration"]
+        self.glyphs = settings.get("glyphs", {})
+        self.cropped_audiofile_path = os.path.join(project_path, "cropped_song.ogg")
+
+    def sorted_glyphs(self) -> tuple:
+        return ProjectSaver.sorted_glyphs(self.glyphs)
+
+def find_projects(songs_folder: str) -> list[str]:
+    """Project folders with an audio file and a Save.json, the way ProjectMenu.get_projects_info walks Songs/."""
+    projects = []
+
+    if not os.path.isdir(songs_folder):
+        return projects
+
+    for project_name in sorted(os.listdir(songs_folder)):
+        project_path = os.path.join(songs_folder, project_name)
+        if not os.path.isdir(project_path):
+            continue
+
+        files = os.listdir(project_path)
+        if "Save.json" in files and any(file.lower().endswith(AUDIO_EXTENSIONS) for file in files):
+            projects.append(project_path)
+
+    return projects
+
+def export_jobs(project_paths: list[str], ports: bool = True) -> list[tuple[str, str | None]]:
+    """(project path, port target) pairs: the project itself first, then every PortVariants entry for its model."""
+    jobs = []
+
+    for project_path in project_paths:
+        jobs.append((project_path, None))
+
+        if not ports:
+            continue
+
+        try:
+            with open(os.path.join(project_path, "Save.json"), "r", encoding="utf-8") as f:
+                model = models.get(json.load(f).get("model"))
+
+        except (OSError, ValueError):
+            continue
+
+        for variant in PortVariants.get(model, []):
+            jobs.append((project_path, number_model_to_code(variant)))
+
+    return jobs
+
+def export_project(project_path: str, port_to: str | None = None, write_audio: bool = True, export_workers: int | None = None) -> dict:
+    """Exports one project, or one port of it, exactly like the Export dialog. Failures are reported instead of raised.
+
+    `export_workers` is passed on to the rasterizer (default EXPORT_WORKERS).
+    """
+    started = time.perf_counter()
+    report = {
+        "project": os.path.basename(os.path.normpath(project_path)),
+        "title": "",
+        "target": port_to or "",
+        "glyphs": 0,
+        "seconds": 0.0,
+        "bytes": 0,
+        "error": None
+    }
+
+    try:
+        project = SavedProject(project_path)
+        model = models.get(project.model)
+
+        report["title"] = project.title
+        report["glyphs"] = len(project.glyphs)
+
+        if not model:
+            raise ValueError(f"Model {project.model} is not found.")
+
+        if port_to is None:
+            report["target"] = model
+            file_title = "Composed_withCassette"
+            nglyph_file = Exporter.compile_composition(project, model, export_workers)
+
+        else:
+            glyphs, ported_to = Porter.Port.port(model, port_to, project)
+            file_title = f"Ported_withCassette_{ported_to}"
+            nglyph_file = Exporter.compile_glyphs(glyphs, ported_to, project.audio_duration, export_workers)
+
+        if write_audio:
+            if not os.path.exists(project.cropped_audiofile_path):
+                raise FileNotFoundError("cropped_song.ogg is missing, open the project in Cassette once to create it.")
+
+            Exporter.nglyph_file_to_ogg(project.cropped_audiofile_path, nglyph_file, project.path, file_title)
+            report["bytes"] = os.path.getsize(os.path.join(project.path, file_title + os.path.splitext(project.cropped_audiofile_path)[1]))
+
+        else:
+            report["bytes"] = len(nglyph_file.author.raw_data) + len(nglyph_file.custom1.raw_data)
+
+    except Exception as e:
+        report["error"] = f"{type(e).__name__}: {e}"
+
+    report["seconds"] = time.perf_counter() - started
+    return report
+
+def _export_job(job: tuple[str, str | None, bool, int | None]) -> dict:
+    return export_project(*job)
+
+def batch_export(songs_folder: str, workers: int = None, ports: bool = True, write_audio: bool = True, out = sys.stdout) -> list[dict]:
+    """Exports every project in `songs_folder` across `workers` processes and prints a report line per export as it finishes, in project order."""
+    workers = workers or os.cpu_count() or 1
+    targets = export_jobs(find_projects(songs_folder), ports)
+    parallel = workers > 1 and len(targets) > 1
+
+    # Projects already fill the CPUs when they run side by side; a serial batch lets each export use its own workers.
+    jobs = [(project_path, port_to, write_audio, 1 if parallel else None) for project_path, port_to in targets]
+
+    started = time.perf_counter()
+    reports = []
+
+    print(f"{len(jobs)} exports from {songs_folder} on {workers} worker{'s' if workers != 1 else ''}", file=out)
+    print(f"{'Project':<10} {'Title':<28} {'Target':<8} {'Glyphs':>7} {'Time':>9} {'Size':>10}", file=out)
+
+    if parallel:
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results = pool.map(_export_job, jobs)
+            reports = _print_reports(results, out)
+
+    else:
+        reports = _print_reports(map(_export_job, jobs), out)
+
+    wall_seconds = time.perf_counter() - started
+    failed = sum(report["error"] is not None for report in reports)
+    work_seconds = sum(report["seconds"] for report in reports)
+    total_bytes = sum(report["bytes"] for report in reports)
+
+    print(f"{len(reports) - failed}/{len(reports)} exported, {total_bytes / 1024:.1f} KiB, {wall_seconds:.2f} s wall, {work_seconds:.2f} s of work", file=out)
+    return reports
+
+def _print_reports(results, out) -> list[dict]:
+    reports = []
+
+    for report in results:
+        reports.append(report)
+        line = f"{report['project']:<10} {report['title'][:28]:<28} {report['target']:<8} {report['glyphs']:>7} {report['seconds'] * 1000:>7.0f}ms"
+        line += f" {report['bytes'] / 1024:>7.1f}KiB" if report["error"] is None else f"  FAILED {report['error']}"
+        print(line, file=out, flush=True)
+
+    return reports
+
+def main(argv: list[str] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m System.BatchExport", description="Re-exports every Cassette project without opening the editor.")
+    parser.add_argument("songs", nargs="?", default=SONGS_FOLDER, help="Songs folder (default: the one next to Cassette)")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="worker processes (default: one per CPU)")
+    parser.add_argument("--no-ports", action="store_true", help="skip the PortVariants exports")
+    parser.add_argument("--no-audio", action="store_true", help="only compile the glyph data; sizes are the raw AUTHOR + CUSTOM1 bytes")
+    args = parser.parse_args(argv)
+
+    reports = batch_export(args.songs, args.workers, not args.no_ports, not args.no_audio)
+    return 1 if any(report["error"] is not None for report in reports) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,10 @@
 import time
 import json
 import socket
+import threading
+
+from itertools import count
+from collections import OrderedDict
 
 import numpy as np
 
@@ -12,12 +16,107 @@ from System import Player
 from System import Styles
 from System import ProjectSaver
 from System import GlyphEffects
+from System.GlyphStore import GlyphStore
 
 from System.Constants import *
 
 from System import UI
 from System import Utils
 
+def render_waveform_tile(peak_pyramid, total_px_width, tile_width, tile_index):
+    """Renders one waveform tile into a QImage. Safe to call off the GUI thread."""
+    from scipy.ndimage import gaussian_filter1d
+    if peak_pyramid is None or peak_pyramid.length == 0:
+        return QImage()
+
+    samples_per_pixel_overall = peak_pyramid.length / float(total_px_width)
+
+    start_px = tile_index * tile_width
+    start_sample = start_px * samples_per_pixel_overall
+    end_sample = min(peak_pyramid.length, (start_px + tile_width) * samples_per_pixel_overall)
+    
+    if end_sample <= start_sample:
+        return QImage()
+
+    height = int(Styles.Metrics.Waveform.height)
+    y_center = height / 2.0
+
+    bins = max(1, min(tile_width, int(np.ceil((end_sample - start_sample) / samples_per_pixel_overall))))
+    min_vals, max_vals = peak_pyramid.min_max(start_sample, end_sample, bins)
+
+    amplitudes_top = y_center - max_vals * y_center
+    amplitudes_bottom = y_center - min_vals * y_center
+
+    smooth_top = gaussian_filter1d(amplitudes_top, sigma=1.7)
+    smooth_bottom = gaussian_filter1d(amplitudes_bottom, sigma=1.7)
+
+    image = QImage(tile_width, height, QImage.Format.Format_ARGB32_Premultiplied)
+    image.fill(Qt.GlobalColor.transparent)
+    painter = QPainter(image)
+    painter.setRenderHint(QPainter.Antialiasing)
+
+    bar_width = 1.0
+
+    path = QPainterPath()
+    for i in range(len(smooth_top)):
+        x = i * bar_width
+        y = max(0, min(height, smooth_top[i]))
+        
+        if i == 0:
+            path.moveTo(x, y)
+        
+        else:
+            path.lineTo(x, y)
+
+    for i in reversed(range(len(smooth_bottom))):
+        x = i * bar_width
+        y = max(0, min(height, smooth_bottom[i]))
+        path.lineTo(x, y)
+
+    path.closeSubpath()
+
+    outline_color = QColor(255, 255, 255, 90)
+    painter.setPen(QPen(outline_color, 2.5))
+    painter.setBrush(Qt.BrushStyle.NoBrush)
+    painter.drawPath(path)
+
+    fill_color = QColor(255, 255, 255, 90)
+    painter.setBrush(QBrush(fill_color))
+    painter.setPen(QPen(QColor(255, 255, 255, 160), 0.7))
+    painter.drawPath(path)
+
+    painter.end()
+    return image
+
+class WaveformTileSignals(QObject):
+    finished = pyqtSignal(object, int, QImage)
+
+class WaveformTileWorker(QRunnable):
+    """Renders one waveform tile on the pool.
+
+    The result goes out as plain data (key, job, image) through a signals
+    object the compositor owns, so the queued signal never refers back to the
+    runnable, which the pool deletes once it has run.
+    """
+
+    def __init__(self, signals, job, cancelled, key, peak_pyramid, total_px_width, tile_width):
+        super().__init__()
+
+        self.signals = signals
+        self.job = job
+        self.cancelled = cancelled
+        self.key = key
+        self.peak_pyramid = peak_pyramid
+        self.total_px_width = total_px_width
+        self.tile_width = tile_width
+
+    def run(self):
+        image = QImage()
+        if not self.cancelled.is_set():
+            image = render_waveform_tile(self.peak_pyramid, self.total_px_width, self.tile_width, self.key[1])
+        
+        self.signals.finished.emit(self.key, self.job, image)
+
 class ScrollableContent(QWidget):
     audio_state_changed = pyqtSignal()
     elements_changed = pyqtSignal()
@@ -49,6 +148,7 @@ class ScrollableContent(QWidget):
         # Playback
         self.playback_timer = QTimer(self)
         self.audio_data = None
+        self.peak_pyramid = None
     
         # Track Management
         self.track_names = ["1"]
@@ -68,6 +168,7 @@ class ScrollableContent(QWidget):
         QShortcut(QKeySequence("Ctrl+="), self).activated.connect(self.on_scale_plus)
         QShortcut(QKeySequence("Ctrl+-"), self).activated.connect(self.on_scale_minus)
         QShortcut(QKeySequence(Qt.Key_Delete), self).activated.connect(self.delete_selected_elements)
+        QShortcut(QKeySequence("Ctrl+Shift+D"), self).activated.connect(self.save_drift_log)
 
         # Tooltip
         self._tooltip_last_global_pos = None
@@ -81,12 +182,19 @@ class ScrollableContent(QWidget):
         self.tooltip_delay_timer.timeout.connect(self.show_delayed_tooltip)
     
         # Caching
-        self._elements_cache_dirty = True
-        self._element_rects = []
-        self._elements_pixmap = None
-        self._elements_pixmap_rect = None
         self.tile_width = TILE_SIZE
-        self.waveform_tiles = {}
+        self.waveform_tiles = OrderedDict()
+        self.waveform_pool = QThreadPool(self)
+        self.waveform_pool.setMaxThreadCount(max(1, QThread.idealThreadCount() - 1))
+        self._pending_waveform_tiles = {}
+        self._waveform_jobs = count()
+        # Created after the pool, so it is deleted after the pool has waited for its jobs.
+        self.waveform_tile_signals = WaveformTileSignals(self)
+        self.waveform_tile_signals.finished.connect(self._on_waveform_tile_ready)
+        self._last_scroll_x = 0
+        self.element_tiles = OrderedDict()
+        self._element_tile_keys = {}
+        self._live_element_ids = set()
     
         # Other state
         self.active_popup = None
@@ -98,15 +206,42 @@ class ScrollableContent(QWidget):
         self.playback_manager = Player.PlaybackManager(self)
         self.playback_manager.playback_position_updated.connect(self._on_playback_position_updated)
         self.playback_manager.audio_loaded.connect(self._on_audio_loaded_from_manager)
+        self.playback_manager.peaks_loaded.connect(self._on_peaks_loaded_from_manager)
         self.playback_manager.status_message_requested.connect(self.set_status_message)
         self.playback_manager.playback_state_changed.connect(self._on_playback_state_changed)
+        self.playback_manager.playback_seeked.connect(self._on_playback_seeked)
+
+        if self.composition:
+            self.composition.glyphs.subscribe(self.on_glyphs_changed)
+
+    def set_composition(self, composition):
+        if self.composition:
+            self.composition.glyphs.unsubscribe(self.on_glyphs_changed)
+
+            if self.composition is not composition:
+                self.composition.syncer.close()
+        
+        self.composition = composition
+        self.composition.glyphs.subscribe(self.on_glyphs_changed)
+        # Only compositions open in the editor look for phones; export-only ones never start adb.
+        self.composition.syncer.start()
+        self.selected_element_ids.clear()
+        self.mark_elements_cache_dirty()
+
+    def on_glyphs_changed(self, delta):
+        self.mark_elements_cache_dirty([*delta.removed, *delta.added, *delta.updated])
+        self.update()
     
     def _on_playback_state_changed(self, is_playing):
         if is_playing:
-            self.composition.syncer.play(self.get_playhead_ms())
+            self.composition.syncer.play(self.playback_manager.position_ms())
             
         else:
             self.composition.syncer.stop()
+            self.show_drift_summary()
+
+    def _on_playback_seeked(self, position_ms):
+        self.composition.syncer.play(position_ms)
 
     def change_brightness(self, brightness):
         self.composition.set_brightness(brightness)
@@ -118,15 +253,52 @@ class ScrollableContent(QWidget):
         self.set_playhead_from_ms(new_playhead_ms)
         self.ensure_playhead_visible()
 
+    def drift_summary_text(self):
+        summary = self.playback_manager.drift_logger.summary()
+
+        return (
+            f"Playhead vs audio device over {summary['samples']} frames: mean {summary['mean_ms']:.1f} ms, "
+            f"p95 {summary['p95_ms']:.1f} ms, max {summary['max_ms']:.1f} ms. "
+            f"Audio clock vs wall clock: {summary['device_ms_per_min']:+.1f} ms/min."
+        )
+
+    def show_drift_summary(self):
+        # Hovering the status bar shows how the last playback kept up with the audio.
+        if self.top_status_label:
+            self.top_status_label.setToolTip(f"Last playback. {self.drift_summary_text()}\nCtrl+Shift+D saves it as Drift.csv in the project folder.")
+
+    def save_drift_log(self):
+        try:
+            self.playback_manager.drift_logger.save(Utils.get_songs_path(f"{self.composition.id}/Drift.csv"))
+        
+        except OSError:
+            pass
+
+        self.set_status_message(self.drift_summary_text(), 0)
+
+    def _on_peaks_loaded_from_manager(self, peak_pyramid, sampling_rate, duration_seconds):
+        self.cancel_waveform_tiles()
+        self.waveform_tiles.clear()
+        self.peak_pyramid = peak_pyramid
+        self.sampling_rate = sampling_rate
+        self.total_content_width = duration_seconds * self.pixels_per_major_tick
+        
+        self.setMinimumWidth(int(self.total_content_width))
+        self.scale_view(0)
+
     def _on_audio_loaded_from_manager(self, audio_data, sampling_rate, duration_seconds):
-        self.waveform_tiles = {}
+        # Tiles drawn from cached peaks stay valid once decoding catches up.
+        if self.playback_manager.peak_pyramid is not self.peak_pyramid:
+            self.cancel_waveform_tiles()
+            self.waveform_tiles.clear()
+        
         self.audio_data = audio_data
+        self.peak_pyramid = self.playback_manager.peak_pyramid
         self.sampling_rate = sampling_rate
         self.total_content_width = duration_seconds * self.pixels_per_major_tick
         
         self.setMinimumWidth(int(self.total_content_width))
         
-        self.update_element_rects_cache()
         self.mark_elements_cache_dirty()
         self.update()
         
@@ -159,29 +331,44 @@ class ScrollableContent(QWidget):
         
         return visible_rect
 
-    def update_element_rects_cache(self):
-        self._element_rects = [self.get_element_rect(el) for id, el in self.composition.glyphs.items()]
-        self.mark_elements_cache_dirty()
+    def mark_elements_cache_dirty(self, ids=None):
+        if ids is None:
+            self.element_tiles.clear()
+            self._element_tile_keys = {}
+            return
+        
+        for id in ids:
+            keys = self._element_tile_keys.pop(id, set())
+            glyph = self.composition.glyphs.get(id)
 
-    def mark_elements_cache_dirty(self):
-        self._elements_cache_dirty = True
-        self._elements_pixmap_rect = None
+            if glyph is not None:
+                keys |= self.get_element_tile_keys(glyph)
+            
+            for key in keys:
+                self.element_tiles.pop(key, None)
+
+    def get_element_tile_keys(self, element):
+        element_rect = self.get_element_rect(element)
+        track_name = self.track_names[self.get_track_row(element['track'])]
+        first_tile = int((element_rect.left() - 1) // self.tile_width)
+        last_tile = int((element_rect.right() + 1) // self.tile_width)
+        
+        return {(track_name, i) for i in range(first_tile, last_tile + 1)}
 
-    def get_element_rect(self, element):
-        tracks_area_start_y = Styles.Metrics.Tracks.ruler_height + Styles.Metrics.Waveform.height + Styles.Metrics.Tracks.box_spacing
-        y_offset_for_this_track = 0
-    
-        track_index = int(element['track']) - 1
+    def get_track_row(self, track):
+        track_index = int(track) - 1
     
         if track_index < 0:
             track_index = 0
         
         elif track_index >= len(self.track_names):
             track_index = len(self.track_names) - 1
-    
-        for i in range(track_index):
-            y_offset_for_this_track += Styles.Metrics.Tracks.row_height + Styles.Metrics.Tracks.box_spacing
-    
+        
+        return track_index
+
+    def get_element_rect(self, element):
+        tracks_area_start_y = Styles.Metrics.Tracks.ruler_height + Styles.Metrics.Waveform.height + Styles.Metrics.Tracks.box_spacing
+        y_offset_for_this_track = self.get_track_row(element['track']) * (Styles.Metrics.Tracks.row_height + Styles.Metrics.Tracks.box_spacing)
         track_base_y = tracks_area_start_y + y_offset_for_this_track
         element_top_y = track_base_y + (Styles.Metrics.Tracks.row_height - Styles.Metrics.Tracks.box_height) / 2.0
         start_px = element['start'] / self.ms_per_pixel
@@ -189,6 +376,25 @@ class ScrollableContent(QWidget):
     
         return QRectF(start_px, element_top_y, width, Styles.Metrics.Tracks.box_height)
 
+    def get_glyph_ids_in_rect(self, rect):
+        """Returns ids of glyphs whose rect intersects `rect`, in paint order (topmost last)."""
+        tracks_area_start_y = Styles.Metrics.Tracks.ruler_height + Styles.Metrics.Waveform.height + Styles.Metrics.Tracks.box_spacing
+        row_pitch = Styles.Metrics.Tracks.row_height + Styles.Metrics.Tracks.box_spacing
+        first_row = int((rect.top() - tracks_area_start_y) // row_pitch)
+        last_row = int((rect.bottom() - tracks_area_start_y) // row_pitch)
+
+        index = self.composition.glyph_index
+        tracks = [track for track in index.tracks if first_row <= self.get_track_row(track) <= last_row]
+
+        # One pixel of slack on both sides keeps float rounding from dropping glyphs on the border.
+        candidates = index.query((rect.left() - 1) * self.ms_per_pixel, (rect.right() + 1) * self.ms_per_pixel, tracks)
+        glyphs = self.composition.glyphs
+        
+        return sorted(
+            (id for id in candidates if self.get_element_rect(glyphs[id]).intersects(rect)),
+            key=index.order_of
+        )
+
     def set_status_message(self, message, timeout=0):
         if self.top_status_label:
             self.top_status_label.setText(message)
@@ -208,12 +414,12 @@ class ScrollableContent(QWidget):
         visible_width = self.width()
         duration_seconds = 0
 
-        if self.audio_data is not None and hasattr(self, "parentWidget"):
+        if self.peak_pyramid is not None and hasattr(self, "parentWidget"):
             scroll_area_widget = self.parentWidget()
             viewport_widget = scroll_area_widget.parentWidget() if scroll_area_widget else None
             if viewport_widget and hasattr(viewport_widget, 'viewport'):
                 visible_width = viewport_widget.viewport().width()
-            duration_seconds = len(self.audio_data) / self.sampling_rate
+            duration_seconds = self.peak_pyramid.length / self.sampling_rate
             if duration_seconds > 0:
                 min_pixels_per_major_tick = max(
                     min_pixels_per_major_tick,
@@ -224,14 +430,13 @@ class ScrollableContent(QWidget):
         self.ms_per_pixel = 1000.0 / self.pixels_per_major_tick
         self.playhead_x_position = playhead_ms / self.ms_per_pixel
 
-        if self.audio_data is not None and duration_seconds > 0:
+        if self.peak_pyramid is not None and duration_seconds > 0:
             self.total_content_width = max(duration_seconds * self.pixels_per_major_tick, visible_width)
             self.setMinimumWidth(int(self.total_content_width))
             self.playhead_x_position = min(self.playhead_x_position, self.total_content_width)
 
-        self.waveform_tiles = {}
+        self.cancel_waveform_tiles(keep_zoom=self.total_content_width)
         if self.composition:
-            self.update_element_rects_cache()
             self.mark_elements_cache_dirty()
         
         self.update_minimum_height()
@@ -254,82 +459,56 @@ class ScrollableContent(QWidget):
         else:
             self.ms_per_pixel = 1000.0 / 100.0
     
-    def generate_tile(self, tile_index):
-        from scipy.ndimage import gaussian_filter1d
-        if self.audio_data is None or len(self.audio_data) == 0:
-            return None
-    
-        total_px_width = self.total_content_width
-        samples_per_pixel_overall = len(self.audio_data) / float(total_px_width)
-    
-        start_px = tile_index * self.tile_width
-        start_sample = int(start_px * samples_per_pixel_overall)
-        end_sample = int((start_px + self.tile_width) * samples_per_pixel_overall)
-    
-        start_sample = max(0, start_sample)
-        end_sample = min(len(self.audio_data), end_sample)
-        audio_chunk = self.audio_data[start_sample:end_sample]
-    
-        if audio_chunk.size == 0:
-            return None
-    
-        height = int(Styles.Metrics.Waveform.height)
-        y_center = height / 2.0
-    
-        num_samples = len(audio_chunk)
-        samples_per_pixel_tile = num_samples / float(self.tile_width)
-    
-        step = max(1, int(np.ceil(samples_per_pixel_tile)))
-        padded_length = ((len(audio_chunk) + step - 1) // step) * step
-        padded = np.pad(audio_chunk, (0, padded_length - len(audio_chunk)), mode='constant')
-        reshaped = padded.reshape(-1, step)
-        min_vals = np.min(reshaped, axis=1)
-        max_vals = np.max(reshaped, axis=1)
-    
-        amplitudes_top = y_center - max_vals * y_center
-        amplitudes_bottom = y_center - min_vals * y_center
-    
-        smooth_top = gaussian_filter1d(amplitudes_top, sigma=1.7)
-        smooth_bottom = gaussian_filter1d(amplitudes_bottom, sigma=1.7)
-    
-        pixmap = QPixmap(self.tile_width, height)
-        pixmap.fill(Qt.GlobalColor.transparent)
-        painter = QPainter(pixmap)
-        painter.setRenderHint(QPainter.Antialiasing)
-    
-        bar_width = self.tile_width / len(smooth_top)
-    
-        path = QPainterPath()
-        for i in range(len(smooth_top)):
-            x = i * bar_width
-            y = max(0, min(height, smooth_top[i]))
-            
-            if i == 0:
-                path.moveTo(x, y)
-            
-            else:
-                path.lineTo(x, y)
-    
-        for i in reversed(range(len(smooth_bottom))):
-            x = i * bar_width
-            y = max(0, min(height, smooth_bottom[i]))
-            path.lineTo(x, y)
-    
-        path.closeSubpath()
-    
-        outline_color = QColor(255, 255, 255, 90)
-        painter.setPen(QPen(outline_color, 2.5))
-        painter.setBrush(Qt.BrushStyle.NoBrush)
-        painter.drawPath(path)
-    
-        fill_color = QColor(255, 255, 255, 90)
-        painter.setBrush(QBrush(fill_color))
-        painter.setPen(QPen(QColor(255, 255, 255, 160), 0.7))
-        painter.drawPath(path)
-    
-        painter.end()
-        self.waveform_tiles[tile_index] = pixmap
-        return pixmap
+    def request_waveform_tiles(self, start_tile_index, end_tile_index, scroll_x):
+        direction = 1 if scroll_x >= self._last_scroll_x else -1
+        self._last_scroll_x = scroll_x
+
+        last_tile_index = int(self.total_content_width // self.tile_width)
+        ahead = range(end_tile_index + 1, end_tile_index + 1 + WAVEFORM_PREFETCH_TILES)
+        behind = range(start_tile_index - 1, start_tile_index - 2, -1)
+
+        if direction < 0:
+            ahead = range(start_tile_index - 1, start_tile_index - 1 - WAVEFORM_PREFETCH_TILES, -1)
+            behind = range(end_tile_index + 1, end_tile_index + 2)
+
+        for priority, indexes in ((2, range(start_tile_index, end_tile_index + 1)), (1, ahead), (0, behind)):
+            for i in indexes:
+                if 0 <= i <= last_tile_index:
+                    self.request_waveform_tile(i, priority)
+
+    def request_waveform_tile(self, tile_index, priority):
+        key = (self.total_content_width, tile_index)
+        if key in self.waveform_tiles or key in self._pending_waveform_tiles:
+            return
+        
+        job, cancelled = next(self._waveform_jobs), threading.Event()
+        self._pending_waveform_tiles[key] = (job, cancelled)
+        self.waveform_pool.start(WaveformTileWorker(self.waveform_tile_signals, job, cancelled, key, self.peak_pyramid, self.total_content_width, self.tile_width), priority)
+
+    def _on_waveform_tile_ready(self, key, job, image):
+        if self._pending_waveform_tiles.get(key, (None,))[0] != job:
+            return
+        
+        del self._pending_waveform_tiles[key]
+        self.waveform_tiles[key] = None if image.isNull() else QPixmap.fromImage(image)
+        
+        while len(self.waveform_tiles) > WAVEFORM_TILE_LIMIT:
+            self.waveform_tiles.popitem(last=False)
+        
+        self.update()
+
+    def cancel_waveform_tiles(self, keep_zoom=None):
+        # Cancelled jobs that are still queued return an empty image without rendering.
+        for key, (_, cancelled) in list(self._pending_waveform_tiles.items()):
+            if key[0] != keep_zoom:
+                cancelled.set()
+                del self._pending_waveform_tiles[key]
+
+    def draw_waveform_placeholder(self, painter, x, y):
+        painter.save()
+        painter.setPen(QPen(QColor(255, 255, 255, 40), 1))
+        painter.drawLine(QPointF(x, y + Styles.Metrics.Waveform.height / 2.0), QPointF(x + self.tile_width, y + Styles.Metrics.Waveform.height / 2.0))
+        painter.restore()
     
     def paintEvent(self, event):
         painter = QPainter(self)
@@ -376,7 +555,7 @@ class ScrollableContent(QWidget):
         current_y += Styles.Metrics.Tracks.ruler_height; painter.setFont(font)
         waveform_top_y = current_y
         
-        if self.audio_data is not None and len(self.audio_data) > 0:
+        if self.peak_pyramid is not None and self.peak_pyramid.length > 0:
             scroll_area_widget = self.parentWidget()
             viewport_widget = scroll_area_widget.parentWidget() if scroll_area_widget else None
             visible_rect = viewport_widget.viewport().rect() if viewport_widget and hasattr(viewport_widget, 'viewport') else self.rect()
@@ -384,15 +563,22 @@ class ScrollableContent(QWidget):
             
             start_tile_index = int(scroll_x / self.tile_width)
             end_tile_index = int((scroll_x + visible_rect.width()) / self.tile_width)
+            self.request_waveform_tiles(start_tile_index, end_tile_index, scroll_x)
 
             for i in range(start_tile_index, end_tile_index + 1):
-                tile = self.waveform_tiles.get(i)
-                if not tile:
-                    tile = self.generate_tile(i)
+                key = (self.total_content_width, i)
+                draw_pos_x = i * self.tile_width
+                
+                if key not in self.waveform_tiles:
+                    self.draw_waveform_placeholder(painter, draw_pos_x, waveform_top_y)
+                    continue
+                
+                self.waveform_tiles.move_to_end(key)
+                tile = self.waveform_tiles[key]
 
                 if tile:
-                    draw_pos_x = i * self.tile_width
                     painter.drawPixmap(draw_pos_x, waveform_top_y, tile)
+                    self.playback_manager.record_first_paint()
         
         current_y += Styles.Metrics.Waveform.height
         current_y += Styles.Metrics.Tracks.box_spacing
@@ -436,22 +622,17 @@ class ScrollableContent(QWidget):
             visible_rect = QRectF(0, 0, self.width(), self.height())
         
         painter.setClipRect(visible_rect)
-        
-        if (self._elements_pixmap is None or self._elements_cache_dirty or
-            self._elements_pixmap_rect is None or self._elements_pixmap_rect != visible_rect):
-            self.update_elements_pixmap(visible_rect)
-        
-        if self._elements_pixmap:
-            painter.drawPixmap(int(visible_rect.left()), int(visible_rect.top()), self._elements_pixmap)
-        
+        self.draw_element_tiles(painter, visible_rect)
         painter.setClipping(False)
         
-        for id, glyph in self.composition.glyphs.items():
-            element_rect = self.get_element_rect(glyph)
-            
-            if not element_rect.intersects(visible_rect):
-                continue
-            
+        # Selected and dragged glyphs are drawn live on top of the cached tiles.
+        overlay_ids = [
+            id for id in self.selected_element_ids | self._live_element_ids
+            if id in self.composition.glyphs and self.get_element_rect(self.composition.glyphs[id]).intersects(visible_rect)
+        ]
+
+        for id in sorted(overlay_ids, key=self.composition.glyph_index.order_of):
+            element_rect = self.get_element_rect(self.composition.glyphs[id])
             path = QPainterPath(); path.addRoundedRect(element_rect, 10, 10)
             
             if id in self.selected_element_ids:
@@ -474,6 +655,9 @@ class ScrollableContent(QWidget):
         painter.setPen(QPen(Qt.GlobalColor.red, 2))
         painter.drawLine(int(self.playhead_x_position), 0, int(self.playhead_x_position), int(self.height()))
 
+        if self.playback_manager.is_playing:
+            self.playback_manager.drift_logger.sample(self.get_playhead_ms())
+
     def copy_selected_elements(self):
         self._copied_elements = []
         for el_id in self.selected_element_ids:
@@ -498,9 +682,7 @@ class ScrollableContent(QWidget):
             new_ids.append(id)
         
         self.selected_element_ids = set(new_ids)
-        self.update_element_rects_cache()
         self.elements_changed.emit()
-        self.mark_elements_cache_dirty()
         self.update()
         
         self.composition.save()
@@ -527,8 +709,6 @@ class ScrollableContent(QWidget):
     def duration_control_popup(self):
         self.control_popup("Duration", "Duration (ms)", "duration", min_val=1, max_val=10000)
         
-        self.update_element_rects_cache(),
-        self.mark_elements_cache_dirty(),
         self.update(),
         self.elements_changed.emit()
 
@@ -600,8 +780,6 @@ class ScrollableContent(QWidget):
                     self.elements_changed.emit()
                     self.composition.save()
                     
-                    self.update_element_rects_cache()
-                    self.mark_elements_cache_dirty()
                 
                 consumed = True
 
@@ -652,6 +830,7 @@ class ScrollableContent(QWidget):
                     'selection_orig_state': {eid: self.composition.get_glyph(eid).copy() for eid in self.selected_element_ids}
                 }
                 
+                self.start_live_elements(self.selected_element_ids)
                 self.setCursor(Qt.CursorShape.SizeHorCursor)
             
             elif edge == 'body':
@@ -671,6 +850,7 @@ class ScrollableContent(QWidget):
                     'start_mouse_x': event.pos().x(),
                     'selection_orig_state': {eid: self.composition.get_glyph(eid).copy() for eid in self.selected_element_ids}
                 }
+                self.start_live_elements(self.selected_element_ids)
                 self.setCursor(Qt.CursorShape.ClosedHandCursor)
             
             self.update()
@@ -710,15 +890,20 @@ class ScrollableContent(QWidget):
                 main_element_id = list(self.dragging_element_info['selection_orig_state'].keys())[0]
                 main_element = self.composition.get_glyph(main_element_id)
                 
-                for el_id, orig_state in self.dragging_element_info['selection_orig_state'].items():
-                    element = self.composition.get_glyph(el_id)
+                if isinstance(self.composition.glyphs, GlyphStore):
+                    self.move_stored_elements(delta_ms)
 
-                    if element:
-                        new_start = orig_state['start'] + delta_ms
-                        new_start = max(Styles.Metrics.Tracks.label_width * self.ms_per_pixel, min(new_start, self.total_content_width * self.ms_per_pixel - element['duration']))
-                        element['start'] = new_start
-                        
-                        self.updated_elements[el_id] = element
+                else:
+                    for el_id, orig_state in self.dragging_element_info['selection_orig_state'].items():
+                        element = self.composition.get_glyph(el_id)
+
+                        if element:
+                            new_start = orig_state['start'] + delta_ms
+                            new_start = max(Styles.Metrics.Tracks.label_width * self.ms_per_pixel, min(new_start, self.total_content_width * self.ms_per_pixel - element['duration']))
+                            element['start'] = new_start
+                            
+                            self.updated_elements[el_id] = element
+                            self.composition.reindex_glyph(el_id)
 
                 if self.active_popup and self.active_popup.isVisible():
                     self.active_popup.deleteLater()
@@ -751,6 +936,7 @@ class ScrollableContent(QWidget):
                             element['duration'] = orig_state['duration'] - actual_delta_ms
                         
                         self.updated_elements[el_id] = element
+                        self.composition.reindex_glyph(el_id)
 
                 elif mode == 'resize_right':
                     new_duration = orig_main_state['duration'] + delta_ms
@@ -767,6 +953,7 @@ class ScrollableContent(QWidget):
                             element['duration'] = orig_state['duration'] + actual_delta_duration
                         
                         self.updated_elements[el_id] = element
+                        self.composition.reindex_glyph(el_id)
                 
                 if self.active_popup and self.active_popup.isVisible():
                     self.active_popup.deleteLater()
@@ -777,17 +964,13 @@ class ScrollableContent(QWidget):
                 
                 self.active_popup = popup
             
+            self.composition.syncer.push_live(self.updated_elements)
             QTimer.singleShot(0, self.update)
         
         elif self.is_marquee_selecting:
             self.marquee_rect = QRectF(self.marquee_start_pos, event.pos()).normalized()
             
-            current_selection = set()
-            for id, element in self.composition.glyphs.items():
-                if self.marquee_rect.intersects(self.get_element_rect(element)):
-                    current_selection.add(id)
-
-            self.selected_element_ids = current_selection
+            self.selected_element_ids = set(self.get_glyph_ids_in_rect(self.marquee_rect))
             self.update()
 
         else:
@@ -836,6 +1019,21 @@ class ScrollableContent(QWidget):
 
         super().mouseMoveEvent(event)
 
+    def move_stored_elements(self, delta_ms):
+        """The 'move' drag for a GlyphStore: every selected start is clamped and written in one go."""
+        info = self.dragging_element_info
+        if 'orig_starts' not in info:
+            orig_state = info['selection_orig_state']
+            info['orig_ids'] = list(orig_state)
+            info['orig_starts'] = np.array([orig_state[el_id]['start'] for el_id in info['orig_ids']], dtype=np.float64)
+            info['orig_durations'] = np.array([orig_state[el_id]['duration'] for el_id in info['orig_ids']], dtype=np.float64)
+
+        starts = np.maximum(Styles.Metrics.Tracks.label_width * self.ms_per_pixel, np.minimum(info['orig_starts'] + delta_ms, self.total_content_width * self.ms_per_pixel - info['orig_durations']))
+
+        # No reindexing per move: dragged glyphs are drawn live and left out of the tiles,
+        # and the index catches up from the update on release.
+        self.updated_elements.update(self.composition.glyphs.place(info['orig_ids'], starts))
+
     def mouseReleaseEvent(self, event: QMouseEvent):
         self._mouse_pressed = False
         
@@ -848,8 +1046,7 @@ class ScrollableContent(QWidget):
                 self.setCursor(Qt.CursorShape.ArrowCursor)
 
                 self.composition.save()
-                self.update_element_rects_cache()
-                self.mark_elements_cache_dirty()
+                self.stop_live_elements()
                 self.elements_changed.emit()
                 
                 self.dragging_element_info = None
@@ -968,7 +1165,8 @@ class ScrollableContent(QWidget):
             return
     
     def get_element_at(self, pos):
-        for id, element in reversed(self.composition.glyphs.items()):
+        for id in reversed(self.get_glyph_ids_in_rect(QRectF(pos.x() - 1, pos.y() - 1, 2, 2))):
+            element = self.composition.glyphs[id]
             element_rect = self.get_element_rect(element)
             
             if element_rect.contains(pos):
@@ -994,9 +1192,7 @@ class ScrollableContent(QWidget):
             self.composition.delete_glyph(id)
         
         self.selected_element_ids.clear()
-        self.update_element_rects_cache()
         self.elements_changed.emit()
-        self.mark_elements_cache_dirty()
         self.update()
 
     def ensure_playhead_visible(self):
@@ -1031,9 +1227,7 @@ class ScrollableContent(QWidget):
         target_x_pixels = normalized_pos * self.total_content_width
         self.playhead_x_position = max(0.0, min(target_x_pixels, self.total_content_width))
 
-        if self.playback_manager.is_playing:
-            self.playback_manager.stop_playback()
-            self.playback_manager.start_playback(self.get_playhead_ms())
+        self.playback_manager.seek(self.get_playhead_ms())
 
         self.update()
         self.ensure_playhead_visible()
@@ -1049,45 +1243,67 @@ class ScrollableContent(QWidget):
             
             h_bar.setValue(target_scroll_value)
 
-    def update_elements_pixmap(self, visible_rect):
-        w, h = int(visible_rect.width()), int(visible_rect.height())
-        if w <= 0 or h <= 0:
-            self._elements_pixmap = None
-            self._elements_pixmap_rect = None
-            return
-        
-        pixmap = QPixmap(w, h)
-        pixmap.fill(Qt.GlobalColor.transparent)
-        cache_painter = QPainter(pixmap)
-        cache_painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        
-        white_brush = QBrush(QColor(*Styles.hex_to_rgb(Styles.Colors.element_background)))
-        red_pen = QPen(QColor(*Styles.hex_to_rgb(Styles.Colors.nothing_accent)), 2)
-        gray_pen = QPen(QColor("#505050"), 1)
+    def start_live_elements(self, ids):
+        self._live_element_ids = set(ids)
+        self.mark_elements_cache_dirty(self._live_element_ids)
+
+    def stop_live_elements(self):
+        ids, self._live_element_ids = self._live_element_ids, set()
+        self.mark_elements_cache_dirty(ids)
+
+    def draw_element_tiles(self, painter, visible_rect):
+        start_tile_index = int(visible_rect.left() // self.tile_width)
+        end_tile_index = int(visible_rect.right() // self.tile_width)
+        row_pitch = Styles.Metrics.Tracks.row_height + Styles.Metrics.Tracks.box_spacing
+        tracks_area_start_y = Styles.Metrics.Tracks.ruler_height + Styles.Metrics.Waveform.height + Styles.Metrics.Tracks.box_spacing
+
+        for row, track_name in enumerate(self.track_names):
+            track_base_y = tracks_area_start_y + row * row_pitch
+
+            for i in range(start_tile_index, end_tile_index + 1):
+                key = (track_name, i)
+
+                if key in self.element_tiles:
+                    self.element_tiles.move_to_end(key)
+                    tile = self.element_tiles[key]
+                
+                else:
+                    tile = self.render_element_tile(key, track_base_y)
+                
+                if tile:
+                    painter.drawPixmap(int(i * self.tile_width), int(track_base_y), tile)
+
+    def render_element_tile(self, key, track_base_y):
+        _, tile_index = key
+        tile_rect = QRectF(tile_index * self.tile_width, track_base_y, self.tile_width, Styles.Metrics.Tracks.row_height)
+        ids = [id for id in self.get_glyph_ids_in_rect(tile_rect) if id not in self._live_element_ids]
         
-        for idx, (id, element) in enumerate(self.composition.glyphs.items()):
-            element_rect = self._element_rects[idx] if idx < len(self._element_rects) else self.get_element_rect(element)
-            if not element_rect.intersects(visible_rect):
-                continue
-            
-            local_rect = QRectF(element_rect)
-            local_rect.moveLeft(local_rect.left() - visible_rect.left())
-            path = QPainterPath(); path.addRoundedRect(local_rect, 10, 10)
-            
-            if id in self.selected_element_ids:
-                cache_painter.fillPath(path, white_brush)
-                cache_painter.setPen(red_pen)
+        tile = None
+        if ids:
+            tile = QPixmap(int(tile_rect.width()), int(tile_rect.height()))
+            tile.fill(Qt.GlobalColor.transparent)
+            tile_painter = QPainter(tile)
+            tile_painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            tile_painter.translate(-tile_rect.left(), -tile_rect.top())
+
+            white_brush = QBrush(QColor(*Styles.hex_to_rgb(Styles.Colors.element_background)))
+            gray_pen = QPen(QColor("#505050"), 1)
+            tile_painter.setPen(gray_pen)
+
+            for id in ids:
+                path = QPainterPath(); path.addRoundedRect(self.get_element_rect(self.composition.glyphs[id]), 10, 10)
+                tile_painter.fillPath(path, white_brush)
+                tile_painter.drawPath(path)
+
+                self._element_tile_keys.setdefault(id, set()).add(key)
             
-            else:
-                cache_painter.fillPath(path, white_brush)
-                cache_painter.setPen(gray_pen)
-            
-            cache_painter.drawPath(path)
+            tile_painter.end()
         
-        cache_painter.end()
-        self._elements_pixmap = pixmap
-        self._elements_pixmap_rect = QRectF(visible_rect)
-        self._elements_cache_dirty = False
+        self.element_tiles[key] = tile
+        while len(self.element_tiles) > ELEMENT_TILE_LIMIT:
+            self.element_tiles.popitem(last=False)
+        
+        return tile
 
 class CompositorWidget(QWidget):
     back_to_main_menu_requested = pyqtSignal()
@@ -1160,7 +1376,12 @@ class CompositorWidget(QWidget):
         self.glyph_dur_control.valueChanged.connect(self.content_widget.change_duration)
         self.brightness_control.valueChanged.connect(self.content_widget.change_brightness)
         self.playspeed_button.state_changed.connect(self.on_playspeed_changed)
+        self.content_widget.playback_manager.playback_position_updated.connect(self.mini_preview_widget.set_playhead_ms)
     
+    def closeEvent(self, event):
+        self.content_widget.playback_manager.shutdown()
+        super().closeEvent(event)
+
     def on_eject_button_clicked(self):
         self.back_to_main_menu_requested.emit()
     
@@ -1185,7 +1406,7 @@ class CompositorWidget(QWidget):
         self.mini_preview_widget.setVisible(audio_loaded)
         
         if audio_loaded:
-            self.mini_preview_widget.set_audio_data(self.content_widget.audio_data, self.content_widget.sampling_rate)
+            self.mini_preview_widget.set_audio_data(self.content_widget.audio_data, self.content_widget.sampling_rate, self.content_widget.peak_pyramid)
         else:
             self.mini_preview_widget.set_audio_data(None, 0)
         
@@ -1199,7 +1420,7 @@ class CompositorWidget(QWidget):
 
     def initialize_compositor(self, audio_path, composition):
         self.content_widget.track_names = [f"{i + 1}" for i in range(composition.track_number)]
-        self.content_widget.composition = composition
+        self.content_widget.set_composition(composition)
                 
         if self.content_widget.playback_manager.is_playing: 
             self.content_widget.playback_manager.stop_playback()
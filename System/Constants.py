@@ -1,3 +1,4 @@
+import os
 from enum import Enum
 
 PortVariants = {
@@ -78,6 +79,21 @@ DIALOG_POPUP_FADEOUT = 100
 
 # Perfomance
 TILE_SIZE = 1024
+ELEMENT_TILE_LIMIT = 256
+WAVEFORM_TILE_LIMIT = 64
+WAVEFORM_PREFETCH_TILES = 2
+
+# Keeps Composition.glyphs in NumPy columns (System/GlyphStore.py) instead of a dict of dicts.
+COLUMNAR_GLYPH_STORE = False
+
+# Rasterizes glyphs and effects straight into the AUTHOR matrix on export instead of going through Label text (System/Exporter.py).
+DIRECT_RASTER_EXPORT = True
+
+# Worker processes that draw column-disjoint track shards of an export in parallel; 1 draws everything in-process.
+# Half the CPUs, up to 4, so the editor and audio keep a core; machines with 1-2 CPUs draw in-process.
+EXPORT_WORKERS = max(1, min(4, (os.cpu_count() or 1) // 2))
+# Exports that light fewer AUTHOR cells than this are drawn in-process, where spawning would cost more than it saves.
+PARALLEL_EXPORT_MIN_CELLS = 2_000_000
 
 # Compositor Defaults
 DEFAULT_SCALING = 200.0
@@ -0,0 +1,220 @@
+import asyncio
+import threading
+
+from PyQt5.QtCore import *
+from System.Constants import *
+from System import WireProtocol
+
+ADB_PATH = "System/ADB/adb"
+RECEIVER_PORT = 7777
+
+COMMAND_TIMEOUT = 15
+HANDSHAKE_RETRIES = 10
+HANDSHAKE_DELAY = 1
+RESTART_DELAY = 3
+
+class AdbError(Exception):
+    pass
+
+def parse_devices(text: str) -> dict:
+    """Parses one `adb track-devices` snapshot into {serial: state}."""
+    devices = {}
+    for line in text.splitlines():
+        parts = line.split()
+        if len(parts) >= 2:
+            devices[parts[0]] = parts[1]
+
+    return devices
+
+class DeviceManager(QObject):
+    """Watches adb for phones and brings up the glyph receiver without blocking Qt.
+
+    Everything runs on a private asyncio loop in a daemon thread: `adb track-devices`
+    streams device changes, and the setup commands and the receiver handshake are
+    awaited there. Results are reported through the signals, which Qt delivers
+    to the thread of whoever connected to them.
+    """
+
+    devices_changed = pyqtSignal(list)
+    device_connecting = pyqtSignal(str)
+    device_connected = pyqtSignal(str, str, object, object) # serial, model, socket, codec
+    device_disconnected = pyqtSignal(str)
+    connection_failed = pyqtSignal(str, str)
+    adb_failed = pyqtSignal(str)
+
+    def __init__(self, adb_path = ADB_PATH, port = RECEIVER_PORT, parent = None):
+        super().__init__(parent)
+        self.adb_path = adb_path
+        self.port = port
+
+        self.devices = {}
+        self.connected_device = None
+        self._rejected = set()
+        self._setup_task = None
+
+        self._loop = None
+        self._main_task = None
+        self._thread = None
+
+    @property
+    def ready_devices(self):
+        return [serial for serial, state in self.devices.items() if state == "device"]
+
+    def start(self):
+        if self._thread is not None:
+            return
+
+        self._loop = asyncio.new_event_loop()
+        self._main_task = self._loop.create_task(self._track())
+        self._thread = threading.Thread(target=self._run, name="DeviceManager", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout = 2):
+        if self._thread is None:
+            return
+
+        self._loop.call_soon_threadsafe(self._main_task.cancel)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+
+        try:
+            self._loop.run_until_complete(self._main_task)
+
+        except asyncio.CancelledError:
+            pass
+
+        finally:
+            self._loop.run_until_complete(self._loop.shutdown_default_executor())
+            self._loop.close()
+
+    async def _adb(self, *args, serial = None):
+        command = [self.adb_path, *(("-s", serial) if serial else ()), *args]
+        process = await asyncio.create_subprocess_exec(*command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE)
+
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), COMMAND_TIMEOUT)
+
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            process.kill()
+            await process.wait()
+
+            if isinstance(e, asyncio.CancelledError):
+                raise
+
+            raise AdbError(f"adb {' '.join(args)} timed out.")
+
+        if process.returncode:
+            raise AdbError(stderr.decode(errors="replace").strip() or f"adb {' '.join(args)} failed.")
+
+        return stdout.decode(errors="replace").strip()
+
+    async def _track(self):
+        try:
+            while True:
+                try:
+                    await self._adb("start-server")
+                    await self._watch()
+
+                except (OSError, ValueError, AdbError, asyncio.IncompleteReadError) as e:
+                    self.adb_failed.emit(str(e) or "adb track-devices stopped.")
+
+                self._update_devices({})
+                await asyncio.sleep(RESTART_DELAY)
+
+        finally:
+            if self._setup_task is not None:
+                self._setup_task.cancel()
+                await asyncio.gather(self._setup_task, return_exceptions=True)
+
+    async def _watch(self):
+        process = await asyncio.create_subprocess_exec(
+            self.adb_path, "track-devices",
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL
+        )
+
+        try:
+            # Every snapshot is a 4-digit hex length followed by the `adb devices` body.
+            while True:
+                length = int(await process.stdout.readexactly(4), 16)
+                payload = await process.stdout.readexactly(length)
+                self._update_devices(parse_devices(payload.decode(errors="replace")))
+
+        finally:
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+
+    def _update_devices(self, devices: dict):
+        old_ready = self.ready_devices
+        self.devices = devices
+        ready = self.ready_devices
+
+        for serial in set(old_ready) - set(ready):
+            self._rejected.discard(serial)
+
+            if serial == self.connected_device:
+                self.connected_device = None
+                self.device_disconnected.emit(serial)
+
+        if old_ready != ready:
+            self.devices_changed.emit(ready)
+
+        self._connect_next()
+
+    def _connect_next(self):
+        if self.connected_device is not None or self._setup_task is not None:
+            return
+
+        for serial in self.ready_devices:
+            if serial not in self._rejected:
+                self._setup_task = self._loop.create_task(self._setup(serial))
+                return
+
+    async def _setup(self, serial):
+        self.device_connecting.emit(serial)
+
+        try:
+            model = ModelCodes.get(await self._adb("shell", "getprop", "ro.product.model", serial=serial))
+            if model is None:
+                raise AdbError("Unsupported device model.")
+
+            await self._adb("forward", f"tcp:{self.port}", f"tcp:{self.port}", serial=serial)
+            await self._adb("shell", "settings", "put", "global", "nt_glyph_interface_debug_enable", "1", serial=serial)
+            await self._adb("shell", "am", "force-stop", "com.glyph.receiver", serial=serial)
+            await self._adb("shell", "am", "start-foreground-service", "-n", "com.glyph.receiver/.MainService", serial=serial)
+
+            client_sock, codec = await self._handshake()
+
+        except (OSError, AdbError) as e:
+            # Retried only once the device is replugged, so a bad phone does not spin the loop.
+            self._rejected.add(serial)
+            self.connection_failed.emit(serial, str(e))
+
+        else:
+            if serial in self.ready_devices:
+                self.connected_device = serial
+                self.device_connected.emit(serial, model, client_sock, codec)
+
+            else:
+                client_sock.close()
+
+        finally:
+            self._setup_task = None
+
+        self._connect_next()
+
+    async def _handshake(self):
+        loop = asyncio.get_running_loop()
+
+        for _ in range(HANDSHAKE_RETRIES):
+            try:
+                return await loop.run_in_executor(None, WireProtocol.connect, ("127.0.0.1", self.port), 1)
+
+            except OSError:
+                await asyncio.sleep(HANDSHAKE_DELAY)
+
+        raise AdbError("Glyph receiver did not answer.")
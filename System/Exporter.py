@@ -8,13 +8,18 @@ import re
 import zlib
 import math
 import base64
+import multiprocessing
 from enum import Enum
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
 from System import GlyphEffects
+from System.GlyphStore import GlyphStore
 
 from PyQt5.QtGui import *
 from PyQt5.QtCore import *
@@ -25,8 +30,8 @@ from System.Constants import *
 TIME_STEP_MS = 16.666
 
 class NGlyphFile:
-    def __init__(self, file_path: str):
-        self.file_path: str = file_path
+    def __init__(self, file_path: str | None = None):
+        self.file_path: str | None = file_path
         self.format_version: int = 0
         self.raw_data: bytes = b''
         self.data: dict[str, ] = {}
@@ -37,6 +42,9 @@ class NGlyphFile:
         self.watermark: Watermark | None = None
         self.legacy: bool = False
 
+        if file_path is None:
+            return
+
         with open(file_path, 'rb') as f:
             self.raw_data = f.read()
         
@@ -67,6 +75,21 @@ class NGlyphFile:
 
         self.author.decrypt(self.watermark.to_key())
 
+    @staticmethod
+    def from_label_file(label_file: 'LabelFile') -> 'NGlyphFile':
+        raster, custom1_data = label_file.rasterize()
+        return NGlyphFile.from_raster(raster, custom1_data, label_file.phone_model)
+
+    @staticmethod
+    def from_raster(raster: 'AuthorRaster', custom1_data: list[str], phone_model: PhoneModel) -> 'NGlyphFile':
+        nglyph_file = NGlyphFile()
+        nglyph_file.format_version = 1
+        nglyph_file.phone_model = phone_model
+        nglyph_file.author = AuthorData.from_raster(raster)
+        nglyph_file.custom1 = Custom1Data(custom1_data)
+
+        return nglyph_file
+
 class AuthorData:
     class AuthorDataException(Exception):
         pass
@@ -86,6 +109,16 @@ class AuthorData:
         
         self.columns_mode = N_COLUMNS_TO_COLS[self.columns]
     
+    @staticmethod
+    def from_raster(raster: 'AuthorRaster') -> 'AuthorData':
+        author = AuthorData.__new__(AuthorData)
+        author.raw_data = ('\r\n'.join(raster.to_lines()) + '\r\n').encode('utf-8')
+        author.data = raster.data.tolist()
+        author.columns = raster.columns
+        author.columns_mode = N_COLUMNS_TO_COLS[author.columns]
+
+        return author
+    
     def _parse_author_data(self, data: list[str]):
         self.raw_data = ('\r\n'.join(data) + '\r\n').encode('utf-8')
         reader = csv.reader(data, delimiter=',', strict=True)
@@ -286,6 +319,23 @@ def get_custom_5col_id(glyph_index: int, columns_model: Cols) -> int:
 def get_nearest_divisable_by(number: float, divisor: float) -> float:
     return round(number / divisor) * divisor
 
+def get_columns_model(phone_model: PhoneModel, contains_zone_labels: bool) -> Cols:
+    match phone_model:
+        case PhoneModel.PHONE1:
+            return Cols.FIFTEEN_ZONE if contains_zone_labels else Cols.FIVE_ZONE
+        
+        case PhoneModel.PHONE2:
+            return Cols.THIRTY_THREE_ZONE if contains_zone_labels else Cols.ELEVEN_ZONE
+        
+        case PhoneModel.PHONE2A:
+            return Cols.TWENTY_SIX_ZONE if contains_zone_labels else Cols.THREE_ZONE_2A
+        
+        case PhoneModel.PHONE3A:
+            return Cols.THIRTY_SIX_ZONE if contains_zone_labels else Cols.THREE_ZONE_3A
+        
+        case _:
+            raise ValueError(f"[Programming Error] Missing phone model in switch case: '{phone_model}'. Please report this error to the developer.")
+
 def get_numer_of_columns_from_columns_model(columns_model: Cols) -> int:
     match columns_model:
         case Cols.FIVE_ZONE:
@@ -327,13 +377,16 @@ class LabelFile:
     def __repr__(self) -> str:
         return self.__str__()
     
-    def __init__(self, file_path: str) -> None:
-        self.file: str = file_path
+    def __init__(self, file_path: str | None = None, phone_model: PhoneModel | None = None) -> None:
+        self.file: str | None = file_path
         self.labels: list[LabelFile.Label] = []
         self.contains_zone_labels: bool = False
         self.columns_model: Cols = Cols.FIVE_ZONE
         self.label_version: int = 0
-        self.phone_model: PhoneModel = self._determine_phone_model(file_path)
+        self.phone_model: PhoneModel = phone_model if file_path is None else self._determine_phone_model(file_path)
+
+        if file_path is None:
+            return
 
         match self.phone_model:
             case PhoneModel.PHONE1:
@@ -379,27 +432,31 @@ class LabelFile:
         if encountered_error:
             raise LabelFile.LabelFileException("Encountered errors while parsing the Label text values. Please resolve the errors above. Make sure that you used the right phone model.")
         
+        self._finalize()
+
+    @staticmethod
+    def from_glyphs(glyphs: list[dict], phone_model: PhoneModel, duration_sec: float) -> 'LabelFile':
+        label_file = LabelFile(phone_model=phone_model)
+        end_time = round(duration_sec, 6)
+
+        label_file.labels.append(LabelFile.Label(0.0, 0.0, "LABEL_VERSION=1", 1))
+        label_file.labels.append(LabelFile.Label(0.0, 0.0, f"PHONE_MODEL={phone_model.name}", 2))
+        
+        for line_num, glyph in enumerate(glyphs, 3):
+            label_file.labels.append(LabelFile.Label.from_glyph(glyph, line_num))
+        
+        label_file.labels.append(LabelFile.Label(end_time, end_time, "END", len(glyphs) + 3))
+        label_file._finalize()
+
+        return label_file
+
+    def _finalize(self) -> None:
         if not all(self.labels[i].time_from_ms <= self.labels[i+1].time_from_ms for i in range(len(self.labels)-1)):
             self.labels.sort(key=lambda x: x.time_from_ms)
 
         self.label_version = self._get_label_version()
         self.contains_zone_labels = any(label.is_zone_label for label in self.labels)
-        
-        match self.phone_model:
-            case PhoneModel.PHONE1:
-                self.columns_model = Cols.FIFTEEN_ZONE if self.contains_zone_labels else Cols.FIVE_ZONE
-            
-            case PhoneModel.PHONE2:
-                self.columns_model = Cols.THIRTY_THREE_ZONE if self.contains_zone_labels else Cols.ELEVEN_ZONE
-            
-            case PhoneModel.PHONE2A:
-                self.columns_model = Cols.TWENTY_SIX_ZONE if self.contains_zone_labels else Cols.THREE_ZONE_2A
-            
-            case PhoneModel.PHONE3A:
-                self.columns_model = Cols.THIRTY_SIX_ZONE if self.contains_zone_labels else Cols.THREE_ZONE_3A
-            
-            case _:
-                raise ValueError(f"[Programming Error] Missing phone model in switch case: '{self.phone_model}'. Please report this error to the developer.")
+        self.columns_model = get_columns_model(self.phone_model, self.contains_zone_labels)
 
     def _determine_phone_model(self, file_path: str) -> PhoneModel:
         phone_model: PhoneModel | None = None
@@ -422,7 +479,37 @@ class LabelFile:
 
         return label_version
 
+    def rasterize(self) -> tuple['AuthorRaster', list[str]]:
+        end_label: LabelFile.Label = next(label for label in self.labels if label.is_end_label)
+        author_lines = math.ceil(end_label.time_to_ms / LabelFile._TIME_STEP_MS)
+
+        raster = AuthorRaster(author_lines, get_numer_of_columns_from_columns_model(self.columns_model))
+        custom1_data: list[str] = []
+
+        for label in self.labels:
+            if label.is_end_label or label.is_version_label or label.is_phone_model_label:
+                continue
+
+            parsed_label = label.to_parsed_label(self.columns_model)
+
+            raster.draw_ramp(
+                round(parsed_label.rastered_time_from_ms / LabelFile._TIME_STEP_MS),
+                round(parsed_label.rastered_time_to_ms / LabelFile._TIME_STEP_MS),
+                parsed_label.array_indexes,
+                parsed_label.absolute_light_level_from,
+                parsed_label.absolute_light_level_to
+            )
+
+            custom1_data.append(f"{round(label.time_from_ms)}-{parsed_label.custom_5col_id}")
+
+        return (raster, custom1_data)
+
     def get_nglyph_data(self) -> tuple[list[str], list[str]]:
+        raster, custom1_data = self.rasterize()
+        return (raster.to_lines(), custom1_data)
+
+    def _rasterize_reference(self) -> tuple[list[str], list[str]]:
+        # The original per-cell loop, kept to check rasterize against.
         end_label: LabelFile.Label = next(label for label in self.labels if label.is_end_label)
         author_lines = math.ceil(end_label.time_to_ms / LabelFile._TIME_STEP_MS)
 
@@ -494,6 +581,25 @@ class LabelFile:
 
             return LabelFile.Label(time_from, time_to, text, line_num)
         
+        @staticmethod
+        def from_glyph(glyph: dict, line_num: int) -> 'LabelFile.Label':
+            # round(x, 6) matches the "%.6f" seconds written to a Label file, so the frames stay identical.
+            time_from = round(glyph["start"] / 1000, 6)
+            time_to = round((glyph["start"] + glyph["duration"]) / 1000, 6)
+            track = str(glyph["track"])
+
+            label = LabelFile.Label(time_from, time_to, "", line_num)
+            glyph_index, _, zone_index = track.partition('.')
+            brightness = int(glyph.get("brightness", 100))
+
+            label.glyph_index = int(glyph_index)
+            label.zone_index = int(zone_index) if zone_index else 0
+            label.relative_light_level_from = brightness
+            label.relative_light_level_to = int(glyph.get("end_brightness", brightness))
+            label.is_zone_label = label.zone_index != 0
+
+            return label
+        
         def extract_text_values(self, regex: re.Pattern[str]) -> None:
             result = regex.match(self.text)
 
@@ -543,6 +649,97 @@ class LabelFile:
             self.light_mode: str = "LIN"
             self.is_zone_label: bool = False
 
+class AuthorRaster:
+    """AUTHOR matrix backed by a preallocated (rows, columns) uint16 array."""
+
+    def __init__(self, rows: int, columns: int) -> None:
+        self.data: np.ndarray = np.zeros((rows, columns), dtype=np.uint16)
+        self.overwrites: int = 0
+
+    @property
+    def rows(self) -> int:
+        return self.data.shape[0]
+
+    @property
+    def columns(self) -> int:
+        return self.data.shape[1]
+
+    def draw_ramp(self, row_from: int, row_to: int, array_indexes: list[int], light_level_from: int, light_level_to: int) -> int:
+        # Same LIN ramp as the original per-cell loop: rising ramps start at step 1, falling ones at step 0.
+        n_steps = row_to - row_from
+        if n_steps <= 0:
+            return 0
+
+        first_step = 1 if light_level_from <= light_level_to else 0
+        steps = np.arange(first_step, first_step + n_steps, dtype=np.float64)
+        light_levels = np.rint(light_level_from + ((light_level_to - light_level_from) / n_steps) * steps).astype(np.uint16)
+
+        clipped_from = max(0, row_from)
+        clipped_to = min(self.rows, row_to)
+        if clipped_to <= clipped_from:
+            return 0
+
+        light_levels = light_levels[clipped_from - row_from:clipped_to - row_from]
+
+        overwrites = int(np.count_nonzero(self.data[clipped_from:clipped_to, array_indexes]))
+        self.data[clipped_from:clipped_to, array_indexes] = light_levels[:, None]
+
+        self.overwrites += overwrites
+        return overwrites
+
+    def draw_ramps(self, row_from: np.ndarray, row_to: np.ndarray, groups: np.ndarray, group_array_indexes: list[list[int]], light_level_from: np.ndarray, light_level_to: np.ndarray) -> int:
+        """draw_ramp for many ramps at once. Ramp i lights group_array_indexes[groups[i]] and later ramps win where they overlap."""
+        n_steps = row_to - row_from
+        drawn = n_steps > 0
+
+        row_from, n_steps, groups = row_from[drawn], n_steps[drawn], groups[drawn]
+        light_level_from, light_level_to = light_level_from[drawn], light_level_to[drawn]
+
+        # One element per (ramp, row), with the same LIN levels draw_ramp computes.
+        ramps = np.repeat(np.arange(len(n_steps)), n_steps)
+        steps = np.arange(len(ramps)) - np.repeat(np.cumsum(n_steps) - n_steps, n_steps)
+        first_step = (light_level_from <= light_level_to).astype(np.float64)
+        slopes = (light_level_to - light_level_from) / n_steps
+
+        rows = row_from[ramps] + steps
+        light_levels = np.rint(light_level_from[ramps] + slopes[ramps] * (steps + first_step[ramps])).astype(np.uint16)
+
+        inside = (rows >= 0) & (rows < self.rows)
+        ramps, rows, light_levels = ramps[inside], rows[inside], light_levels[inside]
+
+        # ... and then one per (ramp, row, column).
+        group_sizes = np.array([len(indexes) for indexes in group_array_indexes], dtype=np.int64)
+        group_offsets = np.cumsum(group_sizes) - group_sizes
+        group_table = np.array([index for indexes in group_array_indexes for index in indexes], dtype=np.int64)
+
+        sizes = group_sizes[groups[ramps]]
+        elements = np.repeat(np.arange(len(rows)), sizes)
+        columns = group_table[np.repeat(group_offsets[groups[ramps]], sizes) + np.arange(len(elements)) - np.repeat(np.cumsum(sizes) - sizes, sizes)]
+
+        cells = rows[elements] * self.columns + columns
+        light_levels = light_levels[elements]
+
+        if not len(cells):
+            return 0
+
+        # A stable sort keeps the draw order inside each cell: the previous write decides whether this one overwrites, the last one stays.
+        order = np.argsort(cells, kind="stable")
+        cells, light_levels = cells[order], light_levels[order]
+
+        flat = self.data.reshape(-1)
+        repeated = np.concatenate(([False], cells[1:] == cells[:-1]))
+        previous = np.where(repeated, np.concatenate(([0], light_levels[:-1])), flat[cells])
+        last = np.concatenate((~repeated[1:], [True]))
+
+        overwrites = int(np.count_nonzero(previous))
+        flat[cells[last]] = light_levels[last]
+
+        self.overwrites += overwrites
+        return overwrites
+
+    def to_lines(self) -> list[str]:
+        return [f"{','.join(map(str, line))}," for line in self.data.tolist()]
+
 def get_glyph_array_indexes(glyph_index: int, zone_index: int, columns_model: Cols) -> list[int]:
     glyph_index -= 1
     zone_index -= 1
@@ -645,13 +842,188 @@ def compile_glyph_file(label_file_path: str, output_directory: str) -> str:
     return nglyph_file_path
 
 def nglyph_to_ogg(audio_path, nglyph_path, output_dir, file_title):
-    ffmpeg = FFmpeg("ffmpeg", "ffprobe")
+    nglyph_file_to_ogg(audio_path, NGlyphFile(nglyph_path), output_dir, file_title)
 
+def nglyph_file_to_ogg(audio_path, nglyph_file, output_dir, file_title):
+    ffmpeg = FFmpeg("ffmpeg", "ffprobe")
     audio_file = AudioFile(audio_path, ffmpeg)
-    nglyph_file = NGlyphFile(nglyph_path)
 
     write_metadata_to_audio_file(audio_file, nglyph_file, output_dir, "Test", ffmpeg, False, file_title)
 
+def shard_groups(group_array_indexes: list[list[int]]) -> list[list[int]]:
+    """Splits (track, segment) groups into shards that share no AUTHOR column, so each shard can be drawn on its own.
+
+    A whole track and its zones light the same columns and always end up in
+    the same shard. Shards are listed in order of their first group.
+    """
+    parent = list(range(len(group_array_indexes)))
+
+    def find(group):
+        while parent[group] != group:
+            parent[group] = parent[parent[group]]
+            group = parent[group]
+
+        return group
+
+    owners = {}
+    for group, indexes in enumerate(group_array_indexes):
+        for index in indexes:
+            parent[find(group)] = find(owners.setdefault(index, group))
+
+    shards = {}
+    for group in range(len(parent)):
+        shards.setdefault(find(group), []).append(group)
+
+    return list(shards.values())
+
+_export_pool = None
+_export_pool_workers = 0
+
+def export_pool(workers: int) -> ProcessPoolExecutor:
+    """Spawned processes for draw_ramps_parallel, kept for the session so only the first export pays for the start-up."""
+    global _export_pool, _export_pool_workers
+
+    if _export_pool is None or _export_pool_workers != workers:
+        if _export_pool is not None:
+            _export_pool.shutdown(wait=False)
+
+        _export_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        _export_pool_workers = workers
+
+    return _export_pool
+
+def _draw_shard(data: np.ndarray, row_from, row_to, groups, group_array_indexes, light_level_from, light_level_to) -> tuple[np.ndarray, int]:
+    raster = AuthorRaster(0, 0)
+    # Column slices arrive in Fortran order, and draw_ramps writes through a flat view of the data.
+    raster.data = np.ascontiguousarray(data)
+    raster.draw_ramps(row_from, row_to, groups, group_array_indexes, light_level_from, light_level_to)
+
+    return (raster.data, raster.overwrites)
+
+def draw_ramps_parallel(raster: AuthorRaster, row_from: np.ndarray, row_to: np.ndarray, groups: np.ndarray, group_array_indexes: list[list[int]], light_level_from: np.ndarray, light_level_to: np.ndarray, workers: int) -> int:
+    """AuthorRaster.draw_ramps split over worker processes.
+
+    Every worker draws a set of column-disjoint shards into its own column
+    slice, keeping the global draw order inside it. Overwrites can only happen
+    inside a shard, so the slices and their overwrite counts add up to what a
+    single draw_ramps call gives.
+    """
+    group_sizes = np.array([len(indexes) for indexes in group_array_indexes], dtype=np.float64)
+    group_cells = np.bincount(groups, weights=np.maximum(row_to - row_from, 0) * group_sizes[groups], minlength=len(group_array_indexes))
+
+    # Biggest shard first onto the least loaded worker. Ties go to the lower index, so the split is the same every time.
+    shards = sorted(shard_groups(group_array_indexes), key=lambda shard: -group_cells[shard].sum())
+    worker_groups = [[] for _ in range(min(workers, len(shards)))]
+    loads = [0.0] * len(worker_groups)
+
+    for shard in shards:
+        lightest = loads.index(min(loads))
+        worker_groups[lightest] += shard
+        loads[lightest] += group_cells[shard].sum()
+
+    if len(worker_groups) < 2:
+        return raster.draw_ramps(row_from, row_to, groups, group_array_indexes, light_level_from, light_level_to)
+
+    pool = export_pool(workers)
+    jobs = []
+
+    for worker_group in worker_groups:
+        columns = sorted({index for group in worker_group for index in group_array_indexes[group]})
+        positions = {column: position for position, column in enumerate(columns)}
+
+        local_groups = np.full(len(group_array_indexes), -1, dtype=np.int64)
+        local_groups[worker_group] = np.arange(len(worker_group))
+        drawn = local_groups[groups] >= 0
+
+        jobs.append((columns, pool.submit(
+            _draw_shard,
+            raster.data[:, columns],
+            row_from[drawn],
+            row_to[drawn],
+            local_groups[groups[drawn]],
+            [[positions[index] for index in group_array_indexes[group]] for group in worker_group],
+            light_level_from[drawn],
+            light_level_to[drawn]
+        )))
+
+    overwrites = 0
+    for columns, job in jobs:
+        data, shard_overwrites = job.result()
+        raster.data[:, columns] = data
+        overwrites += shard_overwrites
+
+    raster.overwrites += overwrites
+    return overwrites
+
+def rasterize_entries(entries: np.ndarray, phone_model: PhoneModel, duration_sec: float, workers: int | None = None) -> tuple[AuthorRaster, list[str]]:
+    """LabelFile.rasterize for GlyphEffects.ENTRY_DTYPE rows, without going through Label text.
+
+    Frames are snapped from the exact milliseconds instead of the "%.6f" seconds
+    of a Label file, so an edge can only land on another frame than the text
+    path gives when it is within a microsecond of a frame boundary. `workers`
+    defaults to EXPORT_WORKERS; the output does not depend on it.
+    """
+    entries = entries[np.argsort(entries["start"], kind="stable")]
+
+    columns_model = get_columns_model(phone_model, bool(np.any(entries["segment"] != 0)))
+    author_lines = math.ceil(round(duration_sec * 1000, 3) / LabelFile._TIME_STEP_MS)
+    raster = AuthorRaster(author_lines, get_numer_of_columns_from_columns_model(columns_model))
+
+    start = entries["start"]
+    row_from = np.rint(start / LabelFile._TIME_STEP_MS).astype(np.int64)
+    row_to = np.rint((start + entries["duration"]) / LabelFile._TIME_STEP_MS).astype(np.int64)
+    row_to[row_to == row_from] += 1
+
+    brightness = entries["brightness"].astype(np.float64)
+    end_brightness = np.where(entries["end_brightness"] >= 0, entries["end_brightness"], entries["brightness"]).astype(np.float64)
+
+    # Entries only use a handful of (track, segment) pairs, so the column lookups run once per pair.
+    codes = entries["track"].astype(np.int64) << 32 | entries["segment"]
+    group_codes, groups = np.unique(codes, return_inverse=True)
+    group_tracks = (group_codes >> 32).tolist()
+    group_segments = (group_codes & 0xFFFFFFFF).tolist()
+
+    group_array_indexes = [get_glyph_array_indexes(track, segment, columns_model) for track, segment in zip(group_tracks, group_segments)]
+    ramps = (
+        row_from,
+        row_to,
+        groups,
+        group_array_indexes,
+        np.rint(brightness * LabelFile._MAX_LIGHT_LEVEL / 100.0),
+        np.rint(end_brightness * LabelFile._MAX_LIGHT_LEVEL / 100.0)
+    )
+
+    workers = EXPORT_WORKERS if workers is None else workers
+    lit_cells = int(np.dot(np.maximum(row_to - row_from, 0), np.array([len(indexes) for indexes in group_array_indexes], dtype=np.int64)[groups]))
+
+    if workers > 1 and lit_cells >= PARALLEL_EXPORT_MIN_CELLS:
+        draw_ramps_parallel(raster, *ramps, workers)
+
+    else:
+        raster.draw_ramps(*ramps)
+
+    # Effect starts carry float drift (36923.4999999 for 36923.5), so CUSTOM1 rounds them the way the microsecond Label times did.
+    custom1_times = np.rint(np.round(start, 3)).astype(np.int64)
+    custom_5col_ids = np.array([get_custom_5col_id(track, columns_model) for track in group_tracks], dtype=np.int64)
+    custom1_data = [f"{time}-{id}" for time, id in zip(custom1_times.tolist(), custom_5col_ids[groups].tolist())]
+
+    return (raster, custom1_data)
+
+def compile_entries(entries: np.ndarray, model: str, duration_sec: float, workers: int | None = None) -> NGlyphFile:
+    raster, custom1_data = rasterize_entries(entries, PhoneModel[model], duration_sec, workers)
+    return NGlyphFile.from_raster(raster, custom1_data, PhoneModel[model])
+
+def compile_glyphs(glyphs: list[dict], model: str, duration_sec: float, workers: int | None = None) -> NGlyphFile:
+    if DIRECT_RASTER_EXPORT:
+        return compile_entries(GlyphEffects.glyphs_to_entries(glyphs), model, duration_sec, workers)
+
+    label_file = LabelFile.from_glyphs(glyphs, PhoneModel[model], duration_sec)
+    return NGlyphFile.from_label_file(label_file)
+
+def export_glyphs(audio_path, glyphs, model, duration_sec, output_dir, file_title):
+    nglyph_file = compile_glyphs(glyphs, model, duration_sec)
+    nglyph_file_to_ogg(audio_path, nglyph_file, output_dir, file_title)
+
 def f6(x):
     x = float(x)
     return "{:.6f}".format(x)
@@ -663,31 +1035,62 @@ def smart_number(s):
     except ValueError:
         return float(s)
 
-def export_ringtone(out_path, composition):
-    model = models.get(composition.model)
-    labels = []
+def composition_to_glyphs(composition, model):
     only_singles_and_segments, only_effects, only_segments_with_effects = composition.sorted_glyphs()
-    
-    if not model:
-        return QMessageBox.critical(None, "Failed to export the ringtone", f"Model {model} is not found.")
-    
-    for glyph in only_singles_and_segments:
-        labels.append(f"{(glyph['start'] / 1000):.6f}\t{((glyph['start'] + glyph['duration']) / 1000):.6f}\t{glyph['track']}-{glyph['brightness']}-LIN")
+    glyphs = list(only_singles_and_segments)
 
     for glyph in only_effects:
-        labels.extend(GlyphEffects.effect_to_label(glyph, glyph["effect"], model, composition.bpm))
+        glyphs.extend(GlyphEffects.effect_to_glyph(glyph, glyph["effect"], model, composition.bpm))
     
-    labels = "\n".join(labels)
-    labels = f"0.000000\t0.000000\tLABEL_VERSION=1\n0.000000\t0.000000\tPHONE_MODEL={model}\n{labels}\n{f6(composition.audio_duration)}\t{f6(composition.audio_duration)}\tEND"
+    return glyphs
+
+def store_to_entries(glyphs: GlyphStore, model, bpm):
+    """composition_to_entries for a GlyphStore: plain glyphs are read straight from the columns."""
+    columns = glyphs.columns()
+    keys = np.array(columns["id"], dtype=object)
+    has_effect = np.not_equal(columns["effect"], None)
+
+    singles = np.flatnonzero(~has_effect)
+    plain = columns["plain"][singles]
+
+    entries = np.empty(len(singles), dtype=GlyphEffects.ENTRY_DTYPE)
+    entries[plain] = GlyphEffects.columns_to_entries(columns, singles[plain])
+    entries[~plain] = GlyphEffects.glyphs_to_entries([dict(glyphs[key]) for key in keys[singles[~plain]]])
+    entries = [entries]
+
+    for key in keys[has_effect]:
+        glyph = dict(glyphs[key])
+        if "." not in glyph["track"]:
+            entries.append(GlyphEffects.effect_to_array(glyph, glyph["effect"], model, bpm))
+
+    return np.concatenate(entries)
+
+def composition_to_entries(composition, model):
+    if isinstance(composition.glyphs, GlyphStore):
+        return store_to_entries(composition.glyphs, model, composition.bpm)
+
+    only_singles_and_segments, only_effects, only_segments_with_effects = composition.sorted_glyphs()
+    entries = [GlyphEffects.glyphs_to_entries(only_singles_and_segments)]
+
+    for glyph in only_effects:
+        entries.append(GlyphEffects.effect_to_array(glyph, glyph["effect"], model, composition.bpm))
     
-    try:
-        labels_file = open("Cache/Labels.txt", "w+")
-        labels_file.write(labels)
-        labels_file.close()
+    return np.concatenate(entries)
+
+def compile_composition(composition, model, workers: int | None = None) -> NGlyphFile:
+    if DIRECT_RASTER_EXPORT:
+        return compile_entries(composition_to_entries(composition, model), model, composition.audio_duration, workers)
+
+    return compile_glyphs(composition_to_glyphs(composition, model), model, composition.audio_duration)
+
+def export_ringtone(out_path, composition):
+    model = models.get(composition.model)
     
-    except Exception as e: return QMessageBox.critical(None, "Failed to export the ringtone", f"Something went wrong while writing the Label file. Report this error to chips047: {str(e)}")
+    if not model:
+        return QMessageBox.critical(None, "Failed to export the ringtone", f"Model {model} is not found.")
     
-    compile_glyph_file("Cache/Labels.txt", "Cache")
+    try: nglyph_file = compile_composition(composition, model)
+    except Exception as e: return QMessageBox.critical(None, "Failed to export the ringtone", f"Something went wrong while compiling the glyphs. Report this error to chips047: {str(e)}")
     
-    try: nglyph_to_ogg(f"{out_path}/cropped_song.ogg", "Cache/Labels.cassette", out_path, "Composed_withCassette")
-    except Exception as e: QMessageBox.critical(None, "Failed to export the ringtone", f"Failed to write the metadata. Report this error to chips047: {str(e)}")
\ No newline at end of file
+    try: nglyph_file_to_ogg(f"{out_path}/cropped_song.ogg", nglyph_file, out_path, "Composed_withCassette")
+    except Exception as e: QMessageBox.critical(None, "Failed to export the ringtone", f"Failed to write the metadata. Report this error to chips047: {str(e)}")
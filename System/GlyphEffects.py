@@ -1,8 +1,14 @@
 import random
 
+import numpy as np
+
 from typing import List
+from collections import OrderedDict
 from System.Constants import *
 
+# Expansions are arrays of ENTRY_DTYPE rows, so the cache is bounded by their total size.
+EFFECT_CACHE_BYTES = 64 << 20
+
 _example_glyph = {
     "start": 200,
     "duration": 2000,
@@ -56,40 +62,94 @@ def glyphs_to_strings(glyphs: List[dict]) -> List[str]:
     
     return lines
 
-def effect_to_glyph(element, effect, model, bpm, port_track = None):
-    name = effect["name"]
-    config = effect["settings"]
-
-    effect_info = EffectsConfig[name]
-    effect_fn = effect_info.get("function")
-    settings_meta = effect_info.get("settings", {})
-    kwargs = parse_effect_args(config, settings_meta)
-    
-    result = effect_fn(element, model, bpm = bpm, **kwargs)
-    return result
-
-def effect_to_label(element, effect, model, bpm, port_track = None):
-    name = effect["name"]
-    config = effect["settings"]
-
-    if name not in EffectsConfig:
-        return []
-
-    effect_info = EffectsConfig[name]
+def _freeze(value):
+    if isinstance(value, dict):
+        return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(item) for item in value)
+
+    return value
+
+class EffectCache:
+    """LRU memo of effect expansions, addressed by everything an effect function reads."""
+
+    def __init__(self, max_bytes = EFFECT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(element, effect, model, bpm):
+        return (
+            effect["name"],
+            _freeze(effect["settings"]),
+            element["start"],
+            element["duration"],
+            element["track"],
+            element["brightness"],
+            model,
+            bpm,
+            _freeze(element.get("port_track")),
+            effect.get("seed")
+        )
+
+    def get(self, element, effect, model, bpm, store = True):
+        key = self.key(element, effect, model, bpm)
+        entries = self.entries.get(key)
+
+        if entries is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entries
+
+        self.misses += 1
+        entries = _expand_effect(element, effect, model, bpm)
+        # Shared between every caller that hits this key.
+        entries.flags.writeable = False
+
+        if store and entries.nbytes <= self.max_bytes:
+            self.entries[key] = entries
+            self.nbytes += entries.nbytes
+
+            while self.nbytes > self.max_bytes:
+                self.nbytes -= self.entries.popitem(last=False)[1].nbytes
+
+        return entries
+
+    def clear(self):
+        self.entries.clear()
+        self.nbytes = 0
+
+effect_cache = EffectCache()
+
+def _expand_effect(element, effect, model, bpm):
+    effect_info = EffectsConfig[effect["name"]]
     effect_fn = effect_info.get("function")
-    settings_meta = effect_info.get("settings", {})
+    kwargs = parse_effect_args(effect["settings"], effect_info.get("settings", {}))
 
-    if not callable(effect_fn):
-        return []
-
-    kwargs = parse_effect_args(config, settings_meta)
+    if effect_info.get("seeded"):
+        kwargs["rng"] = random.Random(effect.get("seed"))
     
+    return effect_fn.array(element, model, bpm = bpm, **kwargs)
+
+def effect_to_array(element, effect, model, bpm, port_track = None, cache = True):
+    """The effect's expansion as read-only ENTRY_DTYPE rows. `cache=False` still reads the cache but never adds to it."""
     if port_track is not None:
         element["port_track"] = port_track
     
-    result = glyphs_to_strings(effect_fn(element, model, bpm = bpm, **kwargs))
+    return effect_cache.get(element, effect, model, bpm, cache)
 
-    return result
+def effect_to_glyph(element, effect, model, bpm, port_track = None, cache = True):
+    return entries_to_glyphs(effect_to_array(element, effect, model, bpm, port_track, cache))
+
+def effect_to_label(element, effect, model, bpm, port_track = None):
+    if not callable(EffectsConfig.get(effect["name"], {}).get("function")):
+        return []
+
+    return entries_to_strings(effect_to_array(element, effect, model, bpm, port_track))
 
 def effectCallback(name, settings, element):
     if name == "None":
@@ -101,6 +161,10 @@ def effectCallback(name, settings, element):
         "name": name,
         "settings": settings
     }
+
+    # Random effects keep their seed, so every expansion of this glyph is the same.
+    if EffectsConfig.get(name, {}).get("seeded"):
+        element["effect"]["seed"] = random.randrange(2 ** 31)
     
     return element
 
@@ -138,228 +202,296 @@ def _format_entry(t0: float, t1: float, label: str) -> str:
 
 # ---------------------------------------------------------------------------
 # Effects
+#
+# Every effect is an array kernel that returns ENTRY_DTYPE rows, one per lit
+# segment or track span. The dict functions that EffectsConfig and older callers
+# use are thin adapters built with _dict_adapter.
 # ---------------------------------------------------------------------------
 
-def fade_in(glyph: dict, model: str, bpm: int):
+ENTRY_DTYPE = np.dtype([
+    ("start", np.float64),
+    ("duration", np.float64),
+    ("track", np.int32),
+    ("segment", np.int32),      # 0 for the whole track
+    ("brightness", np.int32),
+    ("end_brightness", np.int32) # -1 when the entry does not fade
+])
+
+def _track_code(track) -> tuple:
+    track, _, segment = str(track).partition(".")
+    return int(track), int(segment or 0)
+
+def _entries(start, duration, track, segment, brightness, end_brightness = -1):
+    """Builds ENTRY_DTYPE rows, broadcasting scalars against the array arguments."""
+    start, duration, track, segment, brightness, end_brightness = np.broadcast_arrays(
+        np.asarray(start, dtype=np.float64), np.asarray(duration, dtype=np.float64),
+        track, segment, brightness, end_brightness
+    )
+
+    entries = np.empty(start.size, dtype=ENTRY_DTYPE)
+    entries["start"] = start.ravel()
+    entries["duration"] = duration.ravel()
+    entries["track"] = track.ravel()
+    entries["segment"] = segment.ravel()
+    entries["brightness"] = brightness.ravel()
+    entries["end_brightness"] = end_brightness.ravel()
+
+    return entries
+
+def _time_grid(start, step, end, epsilon = 0.0):
+    """Start times of a `while t < end - epsilon: ... t += step` loop, accumulated in the same order so the floats match."""
+    count = max(0, int(np.ceil((end - epsilon - start) / step))) + 2
+    times = np.cumsum(np.concatenate(([start], np.full(count, step, dtype=np.float64))))
+
+    return times[times < end - epsilon]
+
+def _numpy_rng(rng):
+    if isinstance(rng, np.random.Generator):
+        return rng
+
+    # A seeded random.Random gives a seeded Generator, so seeded effects stay reproducible.
+    return np.random.default_rng(rng.getrandbits(64))
+
+def _track_labels(entries: np.ndarray) -> list:
+    # Effects light the same few segments over and over, so each label is formatted once.
+    labels = {}
+    codes = (entries["track"].astype(np.int64) << 32 | entries["segment"]).tolist()
+
+    for code, track, segment in zip(codes, entries["track"].tolist(), entries["segment"].tolist()):
+        if code not in labels:
+            labels[code] = f"{track}.{segment}" if segment else str(track)
+
+    return [labels[code] for code in codes]
+
+def entries_to_glyphs(entries: np.ndarray) -> List[dict]:
+    glyphs = []
+    columns = zip(
+        entries["start"].tolist(), entries["duration"].tolist(), _track_labels(entries),
+        entries["brightness"].tolist(), entries["end_brightness"].tolist()
+    )
+
+    for start, duration, track, brightness, end_brightness in columns:
+        glyph = {"start": start, "duration": duration, "track": track, "brightness": brightness}
+
+        if end_brightness >= 0:
+            glyph["end_brightness"] = end_brightness
+
+        glyphs.append(glyph)
+
+    return glyphs
+
+def entries_to_strings(entries: np.ndarray) -> List[str]:
+    """glyphs_to_strings for ENTRY_DTYPE rows."""
+    lines = []
+    columns = zip(
+        entries["start"].tolist(), entries["duration"].tolist(), _track_labels(entries),
+        entries["brightness"].tolist(), entries["end_brightness"].tolist()
+    )
+
+    for start, duration, track, brightness, end_brightness in columns:
+        if end_brightness >= 0:
+            label = f"{track}-{brightness}-{end_brightness}-LIN"
+
+        else: label = f"{track}-{brightness}-LIN"
+
+        lines.append(_format_entry(_sec(start), _sec(start + duration), label))
+
+    return lines
+
+def glyphs_to_entries(glyphs: List[dict]) -> np.ndarray:
+    """ENTRY_DTYPE rows for plain glyph dicts, the inverse of entries_to_glyphs."""
+    if not glyphs:
+        return np.empty(0, dtype=ENTRY_DTYPE)
+
+    track, segment = zip(*(_track_code(glyph["track"]) for glyph in glyphs))
+
+    return _entries(
+        [glyph["start"] for glyph in glyphs],
+        [glyph["duration"] for glyph in glyphs],
+        np.array(track),
+        np.array(segment),
+        np.array([int(glyph.get("brightness", 100)) for glyph in glyphs]),
+        np.array([int(glyph.get("end_brightness", -1)) for glyph in glyphs])
+    )
+
+def columns_to_entries(columns: dict, rows: np.ndarray) -> np.ndarray:
+    """glyphs_to_entries for the given rows of GlyphStore.columns(), without building a dict per glyph."""
+    if not columns["tracks"]:
+        return np.empty(0, dtype=ENTRY_DTYPE)
+
+    track, segment = (np.array(codes) for codes in zip(*map(_track_code, columns["tracks"])))
+    codes = columns["track_code"][rows]
+    brightness = columns["brightness"][rows]
+    end_brightness = columns["end_brightness"][rows]
+
+    # int() truncates, and so does the cast; a missing value is NaN.
+    return _entries(
+        columns["start"][rows],
+        columns["duration"][rows],
+        track[codes],
+        segment[codes],
+        np.where(np.isnan(brightness), 100, brightness).astype(np.int64),
+        np.where(np.isnan(end_brightness), -1, end_brightness).astype(np.int64)
+    )
+
+def _dict_adapter(kernel):
+    def adapter(glyph: dict, model: str, bpm, *args, **kwargs):
+        return entries_to_glyphs(kernel(glyph, model, bpm, *args, **kwargs))
+
+    adapter.__name__ = kernel.__name__.removesuffix("_array")
+    adapter.__doc__ = kernel.__doc__
+    adapter.array = kernel
+
+    return adapter
+
+def fade_in_array(glyph: dict, model: str, bpm: int):
     n, segs, duration, start, end, brightness = get_data(glyph, model)
-    return [{"start": start, "duration": duration, "track": n, "brightness": 0, "end_brightness": brightness}]
+    return _entries(start, duration, *_track_code(n), 0, brightness)
 
-def fade_out(glyph: dict, model: str, bpm: int):
+def fade_out_array(glyph: dict, model: str, bpm: int):
     n, segs, duration, start, end, brightness = get_data(glyph, model)
-    return [{"start": start, "duration": duration, "track": n, "brightness": brightness, "end_brightness": 0}]
+    return _entries(start, duration, *_track_code(n), brightness, 0)
 
-def fade_in_out(glyph: dict, model: str, bpm: int):
+def fade_in_out_array(glyph: dict, model: str, bpm: int):
     n, segs, duration, start, end, brightness = get_data(glyph, model)
 
     mid = start + duration / 2
 
-    return [
-        {"start": start, "duration": int(duration / 2), "track": n, "brightness": 0, "end_brightness": brightness},
-        {"start": mid, "duration": int(duration / 2), "track": n, "brightness": brightness, "end_brightness": 0}
-    ]
+    return _entries([start, mid], int(duration / 2), *_track_code(n), [0, brightness], [brightness, 0])
 
-def sidebeat(glyph: dict, model: str, bpm: int, part: str):
+def sidebeat_array(glyph: dict, model: str, bpm: int, part: str):
     n, segs, duration, start, end, _ = get_data(glyph, model, True)
-    segment_list = list(range(1, segs + 1))
     segments_in_one_part = segs // 3
     time_per_segment = duration / segments_in_one_part / 2
 
-    left_part = segment_list[0:segments_in_one_part]
-    right_part = segment_list[-segments_in_one_part:]
-
     part_modes = {
-        "left": ([left_part], 1),
-        "right": ([right_part], segs),
-        "both": ([left_part, right_part], [1, segs])
+        "left": [1],
+        "right": [segs],
+        "both": [1, segs]
     }
 
-    segments_to_animate, current_segments = part_modes[part]
-    if not isinstance(current_segments, list):
-        current_segments = [current_segments] * len(segments_to_animate)
-
+    steps = np.arange(segments_in_one_part)
+    shrink = time_per_segment * steps
+    track, _ = _track_code(n)
     out = []
 
-    for part, base_segment in zip(segments_to_animate, current_segments):
+    for base_segment in part_modes[part]:
         direction = 1 if base_segment == 1 else -1
-    
-        for i, _ in enumerate(part):
-            shrink = time_per_segment * i
-    
-            out.append({
-                "start": start + shrink,
-                "duration": (end - start) - 2 * shrink,
-                "track": f"{n}.{base_segment + i * direction}",
-                "brightness": 100
-            })
-    
-    return out
+        out.append(_entries(start + shrink, (end - start) - 2 * shrink, track, base_segment + steps * direction, 100))
+
+    return np.concatenate(out)
 
-def glitch(glyph: dict, model: str, bpm: int, fps=20.0, duty_cycle=0.7, min_br_ratio=0.3, bpm_snap=False):
+def glitch_array(glyph: dict, model: str, bpm: int, fps=20.0, duty_cycle=0.7, min_br_ratio=0.3, bpm_snap=False, rng=random):
     if bpm_snap:
         fps = (bpm / 60) * bpm_snap
     min_br_ratio /= 100
 
     n, segs, duration, t, t_end, head_br = get_data(glyph, model, True)
     frame = 1000.0 / fps
-    out = []
-
     min_br = max(5, int(head_br * min_br_ratio))
 
-    while t < t_end - 1e-9:
-        t0 = t
-        t1 = min(t + frame, t_end)
-
-        for seg_idx in range(1, segs + 1):
-            if random.random() < duty_cycle:
-                br = random.randint(min_br, head_br)
-                out.append({
-                    "start": t0,
-                    "duration": t1 - t0,
-                    "track": f"{n}.{seg_idx}",
-                    "brightness": br
-                })
+    starts = _time_grid(t, frame, t_end, 1e-9)
+    ends = np.minimum(starts + frame, t_end)
 
-        t = t1
+    rng = _numpy_rng(rng)
+    lit = rng.random((len(starts), segs)) < duty_cycle
+    frames, segments = np.nonzero(lit)
+    brightness = rng.integers(min_br, head_br, size=len(frames), endpoint=True) if len(frames) else 0
 
-    return out
+    return _entries(starts[frames], ends[frames] - starts[frames], _track_code(n)[0], segments + 1, brightness)
 
-def bpm_effect(glyph: dict, model: str, bpm: float, multiplier: int):
+def bpm_effect_array(glyph: dict, model: str, bpm: float, multiplier: int):
     n, _, _, start, end, brightness = get_data(glyph, model)
 
     actual_bpm = bpm * multiplier
     beat_interval = 60000.0 / actual_bpm
-    t = start
-    out = []
-
-    while t < end:
-        t_off = min(t + beat_interval / 2, end)
-        out.append(fade_out({
-            "start": t,
-            "duration": t_off - t,
-            "track": n,
-            "brightness": brightness
-        }, model, bpm)[0])
-        t += beat_interval
+    starts = _time_grid(start, beat_interval, end)
+    ends = np.minimum(starts + beat_interval / 2, end)
 
-    return out
+    return _entries(starts, ends - starts, *_track_code(n), brightness, 0)
 
-def fill(glyph: dict, model: str, bpm: int, side=1):
+def fill_array(glyph: dict, model: str, bpm: int, side=1):
     n, segs, duration, start, end, brightness = get_data(glyph, model, True)
     seg_step = duration / segs
-    indices = range(segs) if side == 1 else reversed(range(segs))
+    indices = np.arange(segs) if side == 1 else np.arange(segs)[::-1]
+    starts = start + indices * seg_step
 
-    return [{
-        "start": start + i * seg_step,
-        "duration": end - (start + i * seg_step),
-        "track": f"{n}.{i + 1}",
-        "brightness": brightness
-    } for i in indices]
+    return _entries(starts, end - starts, _track_code(n)[0], indices + 1, brightness)
 
-def strobe(glyph: dict, model: str, bpm: int, frequency=1):
+def strobe_array(glyph: dict, model: str, bpm: int, frequency=1):
     n, _, _, start, end, brightness = get_data(glyph, model)
     interval = 1000.0 / frequency
-    t = start
-    out = []
-
-    while t < end:
-        t_off = min(t + interval / 2, end)
-        out.append({
-            "start": t,
-            "duration": t_off - t,
-            "track": n,
-            "brightness": brightness
-        })
-        t += interval
+    starts = _time_grid(start, interval, end)
+    ends = np.minimum(starts + interval / 2, end)
 
-    return out
+    return _entries(starts, ends - starts, *_track_code(n), brightness)
 
-def soft_or_pseudo_strobe(glyph: dict, model: str, bpm: int, frequency=1, first_brightness=100, second_brightness=70, bpm_snap=False):
+def soft_or_pseudo_strobe_array(glyph: dict, model: str, bpm: int, frequency=1, first_brightness=100, second_brightness=70, bpm_snap=False):
     if bpm_snap:
         frequency = (bpm / 60) * bpm_snap
 
     n, _, _, start, end, _ = get_data(glyph, model)
     interval = 1000.0 / frequency
-    t = start
-    out = []
-
-    while t < end:
-        t_off = min(t + interval / 2, end)
-        duration = t_off - t
-        out.append({
-            "start": t,
-            "duration": duration,
-            "track": n,
-            "brightness": first_brightness
-        })
-        out.append({
-            "start": t_off,
-            "duration": duration,
-            "track": n,
-            "brightness": second_brightness
-        })
-        t += interval
-
-    return out
-
-def sweep(glyph: dict, model: str, bpm: int, side=1):
+    starts = _time_grid(start, interval, end)
+    offs = np.minimum(starts + interval / 2, end)
+
+    # Each strobe is a (first, second) pair of equal length.
+    return _entries(
+        np.column_stack((starts, offs)),
+        (offs - starts)[:, None],
+        *_track_code(n),
+        np.array([first_brightness, second_brightness])
+    )
+
+def sweep_array(glyph: dict, model: str, bpm: int, side=1):
     n, segs, duration, start, _, brightness = get_data(glyph, model, True)
-    order = list(range(segs, 0, -1)) + list(range(2, segs + 1))
+    order = np.concatenate((np.arange(segs, 0, -1), np.arange(2, segs + 1)))
     if side == -1:
         order = order[::-1]
 
     step = duration / len(order)
 
-    return [{
-        "start": start + i * step,
-        "duration": step,
-        "track": f"{n}.{seg}",
-        "brightness": brightness
-    } for i, seg in enumerate(order)]
+    return _entries(start + np.arange(len(order)) * step, step, _track_code(n)[0], order, brightness)
 
-def _tail_brightness(head_br: int, tail_pos: int, tail_len: int) -> int:
-    if tail_pos == 0 or tail_len <= 1:
-        return head_br
+def _tail_brightnesses(head_br: int, tail_len: int) -> np.ndarray:
+    """Brightness of every position in a tail: the head at full brightness, then a linear fade down to 20%."""
+    if tail_len <= 1:
+        return np.full(tail_len, head_br)
 
     min_br = max(5, int(head_br * 0.2))
     span = head_br - min_br
-    return max(min_br, int(head_br - span * (tail_pos / (tail_len - 1))))
+    fading = np.maximum(min_br, (head_br - span * (np.arange(tail_len) / (tail_len - 1))).astype(np.int64))
+    fading[0] = head_br
+
+    return fading
 
-def boomerang(glyph: dict, model: str, bpm: int, jumps: int):
+def boomerang_array(glyph: dict, model: str, bpm: int, jumps: int):
     n, segs, duration, t, t_end, br = get_data(glyph, model, True)
     jumps += 2
     growth_range = segs - 1
     steps_to_grow = jumps - 1 if jumps > 1 else 1
     TAIL_STEP = max(1, round(growth_range / steps_to_grow))
 
-    avg_tail_len = sum(min(1 + i * TAIL_STEP, segs) for i in range(jumps)) / jumps
-    STEP = duration / (jumps * (segs + avg_tail_len))
-
     out = []
     tail_len = 1
     direction = -1
     virtual_head = segs
+    track, _ = _track_code(n)
 
     def get_step(curr_tail: int) -> float:
         return duration / (jumps * (segs + curr_tail))
 
+    # Each step depends on the previous one, so only the lit tail of a step is vectorized.
     while t < t_end - 1e-9:
         STEP = get_step(tail_len)
         t_next = t + STEP
 
-        segs_to_light = [
-            (virtual_head + i if direction == -1 else virtual_head - i, i)
-            for i in range(tail_len)
-        ]
-
-        for seg_idx, tail_pos in segs_to_light:
-            if 1 <= seg_idx <= segs:
-                b = _tail_brightness(br, tail_pos, tail_len)
-                out.append({
-                    "start": t,
-                    "duration": STEP,
-                    "track": f"{n}.{seg_idx}",
-                    "brightness": b
-                })
+        positions = np.arange(tail_len)
+        segments = virtual_head + positions if direction == -1 else virtual_head - positions
+        visible = (segments >= 1) & (segments <= segs)
+
+        if visible.any():
+            out.append(_entries(t, STEP, track, segments[visible], _tail_brightnesses(br, tail_len)[visible]))
 
         virtual_head += direction
 
@@ -372,9 +504,9 @@ def boomerang(glyph: dict, model: str, bpm: int, jumps: int):
 
         t = t_next
 
-    return out
+    return np.concatenate(out) if out else np.empty(0, dtype=ENTRY_DTYPE)
 
-def zebra(glyph: dict, model: str, bpm: int, fps=1, on_count=1, off_count=1, side=1, bpm_snap=False):
+def zebra_array(glyph: dict, model: str, bpm: int, fps=1, on_count=1, off_count=1, side=1, bpm_snap=False):
     n, segs, duration, start, _, br = get_data(glyph, model, True)
     if bpm_snap:
         fps = (bpm / 60) * bpm_snap
@@ -383,68 +515,54 @@ def zebra(glyph: dict, model: str, bpm: int, fps=1, on_count=1, off_count=1, sid
     total_steps = max(1, int(duration / step_duration))
     pattern_len = on_count + off_count
 
-    out = []
-    for step in range(total_steps):
-        t0 = start + step * step_duration
-        t1 = min(t0 + step_duration, start + duration)
-
-        for i in range(segs):
-            shifted_index = (i - step * side) % pattern_len
-            if shifted_index < on_count:
-                out.append({
-                    "start": t0,
-                    "duration": t1 - t0,
-                    "track": f"{n}.{i + 1}",
-                    "brightness": br
-                })
-
-    return out
-
-def shocker(glyph: dict, model: str, bpm: int, frequency=5.0, fade_out=True, bpm_snap=False):
+    steps = np.arange(total_steps)
+    starts = start + steps * step_duration
+    ends = np.minimum(starts + step_duration, start + duration)
+
+    lit = ((np.arange(segs)[None, :] - steps[:, None] * side) % pattern_len) < on_count
+    rows, segments = np.nonzero(lit)
+
+    return _entries(starts[rows], ends[rows] - starts[rows], _track_code(n)[0], segments + 1, br)
+
+def shocker_array(glyph: dict, model: str, bpm: int, frequency=5.0, fade_out=True, bpm_snap=False):
     if bpm_snap:
         frequency = (bpm / 60) * bpm_snap
 
     n, segs, duration, start, end, brightness = get_data(glyph, model, True)
     interval = 1000.0 / frequency
-    t = start
-    out = []
-
-    even_indices = [i + 1 for i in range(segs) if (i + 1) % 2 == 0]
-    odd_indices = [i + 1 for i in range(segs) if (i + 1) % 2 == 1]
-
-    while t < end:
-        t_half = min(t + interval / 2, end)
-        t_next = min(t + interval, end)
-
-        for i in even_indices:
-            element = {
-                "start": t,
-                "duration": t_half - t,
-                "track": f"{n}.{i}",
-                "brightness": brightness
-            }
-            
-            if fade_out:
-                element["end_brightness"] = 0
-            
-            out.append(element)
-
-        for i in odd_indices:
-            element = {
-                "start": t_half,
-                "duration": t_next - t_half,
-                "track": f"{n}.{i}",
-                "brightness": brightness
-            }
-            
-            if fade_out:
-                element["end_brightness"] = 0
-            
-            out.append(element)
-
-        t = t_next
 
-    return out
+    starts = _time_grid(start, interval, end)
+    halves = np.minimum(starts + interval / 2, end)
+    nexts = np.minimum(starts + interval, end)
+
+    # Per shock: every even segment for the first half, then every odd one for the second.
+    even = np.arange(2, segs + 1, 2)
+    odd = np.arange(1, segs + 1, 2)
+    segments = np.concatenate((even, odd))
+    first_half = np.arange(len(segments)) < len(even)
+
+    return _entries(
+        np.where(first_half, starts[:, None], halves[:, None]),
+        np.where(first_half, (halves - starts)[:, None], (nexts - halves)[:, None]),
+        _track_code(n)[0],
+        segments,
+        brightness,
+        0 if fade_out else -1
+    )
+
+fade_in = _dict_adapter(fade_in_array)
+fade_out = _dict_adapter(fade_out_array)
+fade_in_out = _dict_adapter(fade_in_out_array)
+sidebeat = _dict_adapter(sidebeat_array)
+glitch = _dict_adapter(glitch_array)
+bpm_effect = _dict_adapter(bpm_effect_array)
+fill = _dict_adapter(fill_array)
+strobe = _dict_adapter(strobe_array)
+soft_or_pseudo_strobe = _dict_adapter(soft_or_pseudo_strobe_array)
+sweep = _dict_adapter(sweep_array)
+boomerang = _dict_adapter(boomerang_array)
+zebra = _dict_adapter(zebra_array)
+shocker = _dict_adapter(shocker_array)
 
 def get_effect_config(model, track):
     is_segmented = ModelSegments.get(model_to_code(model), {}).get(track)
@@ -642,6 +760,7 @@ EffectsConfig = {
     },
     "Glitch": {
         "segmented": True,
+        "seeded": True,
         "gif": "System/Media/Effects/Glitch.gif",
         "function": glitch,
         "settings": {
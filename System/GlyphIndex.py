@@ -0,0 +1,191 @@
+from bisect import bisect_left, bisect_right, insort
+from itertools import count
+
+import numpy as np
+
+# Glyphs per leaf of TrackIndex's max-end tree; a leaf that reaches the window is scanned directly.
+TREE_BLOCK = 16
+
+class TrackIndex:
+    """Glyphs of one track, kept sorted by start time, with a max-end tree on top.
+
+    The tree is a bottom-up segment tree over the glyph ends in start order;
+    every node holds the latest end in its range. A query bisects the starts
+    for the glyphs that begin before the window ends and only descends into
+    subtrees whose latest end reaches the window, so it costs O(log n + k log n)
+    for k hits however long any single glyph is. Leaves cover TREE_BLOCK
+    glyphs each, which keeps the tree small and the walk short. Edits mark the tree stale and
+    the next query rebuilds it in O(n) with NumPy, so a drag that moves many
+    glyphs pays for one rebuild per repaint, not one per glyph.
+    """
+
+    def __init__(self):
+        self.starts = []
+        self.ids = []
+        self.ends = []
+        self.spans = {}
+        self._tree = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def insert(self, glyph_id, start, duration):
+        position = bisect_right(self.starts, start)
+        self.starts.insert(position, start)
+        self.ids.insert(position, glyph_id)
+        self.ends.insert(position, start + duration)
+        self.spans[glyph_id] = (start, duration)
+        self._tree = None
+
+    def remove(self, glyph_id):
+        start, duration = self.spans.pop(glyph_id)
+        position = bisect_left(self.starts, start)
+
+        while self.ids[position] != glyph_id:
+            position += 1
+
+        del self.starts[position]
+        del self.ids[position]
+        del self.ends[position]
+        self._tree = None
+
+    def _build(self):
+        blocks = -(-len(self.ends) // TREE_BLOCK)
+        leaves = 1 << max(0, blocks - 1).bit_length()
+
+        ends = np.full(leaves * TREE_BLOCK, -np.inf)
+        ends[:len(self.ends)] = self.ends
+
+        tree = np.empty(2 * leaves)
+        tree[leaves:] = ends.reshape(leaves, TREE_BLOCK).max(axis=1)
+
+        width = leaves
+        while width > 1:
+            tree[width // 2:width] = np.maximum(tree[width:2 * width:2], tree[width + 1:2 * width:2])
+            width //= 2
+
+        # Plain floats: the walk reads single nodes, which is slow on an ndarray.
+        self._tree = tree.tolist()
+        return self._tree
+
+    def query(self, start_ms, end_ms):
+        last = bisect_right(self.starts, end_ms)
+        if not last:
+            return []
+
+        tree = self._tree if self._tree is not None else self._build()
+        leaves = len(tree) // 2
+        ends = self.ends
+
+        # Depth-first from the root, left child first, so hits come out in start order.
+        result = []
+        stack = [(1, 0, leaves)]
+
+        while stack:
+            node, lo, hi = stack.pop()
+            if lo * TREE_BLOCK >= last or tree[node] < start_ms:
+                continue
+
+            if node >= leaves:
+                result.extend(self.ids[position] for position in range(lo * TREE_BLOCK, min(hi * TREE_BLOCK, last)) if ends[position] >= start_ms)
+                continue
+
+            middle = (lo + hi) // 2
+            stack.append((2 * node + 1, middle, hi))
+            stack.append((2 * node, lo, middle))
+
+        return result
+
+class GlyphIndex:
+    """Per-track interval index over Composition.glyphs, used for hit-testing and culling.
+
+    Every id also gets an insertion order, so callers can choose the glyph that
+    is painted on top, the same way iterating the glyph dict in reverse would.
+    """
+
+    def __init__(self):
+        self.tracks = {}
+        self._track_of = {}
+        self._order = {}
+        self._counter = count()
+
+    def __len__(self):
+        return len(self._track_of)
+
+    def __contains__(self, glyph_id):
+        return glyph_id in self._track_of
+
+    def rebuild(self, glyphs: dict):
+        self.tracks = {}
+        self._track_of = {}
+        self._order = {}
+
+        for glyph_id, glyph in glyphs.items():
+            self.insert(glyph_id, glyph)
+
+    def insert(self, glyph_id, glyph: dict):
+        if glyph_id in self._track_of:
+            self.update(glyph_id, glyph)
+            return
+
+        track = str(glyph["track"])
+        self.tracks.setdefault(track, TrackIndex()).insert(glyph_id, float(glyph["start"]), float(glyph["duration"]))
+        self._track_of[glyph_id] = track
+        self._order[glyph_id] = next(self._counter)
+
+    def update(self, glyph_id, glyph: dict):
+        if glyph_id not in self._track_of:
+            self.insert(glyph_id, glyph)
+            return
+
+        track = str(glyph["track"])
+        span = (float(glyph["start"]), float(glyph["duration"]))
+        old_track = self._track_of[glyph_id]
+
+        if old_track == track and self.tracks[track].spans[glyph_id] == span:
+            return
+
+        self.tracks[old_track].remove(glyph_id)
+        self.tracks.setdefault(track, TrackIndex()).insert(glyph_id, *span)
+        self._track_of[glyph_id] = track
+
+    def remove(self, glyph_id):
+        track = self._track_of.pop(glyph_id, None)
+        if track is None:
+            return
+
+        self.tracks[track].remove(glyph_id)
+        del self._order[glyph_id]
+
+    def clear(self):
+        self.rebuild({})
+
+    def apply(self, delta):
+        """SyncedDict subscriber: applies a GlyphDelta."""
+        for glyph_id in delta.removed:
+            self.remove(glyph_id)
+
+        for glyph_id, glyph in delta.changed().items():
+            self.update(glyph_id, glyph)
+
+    def track_of(self, glyph_id):
+        return self._track_of.get(glyph_id)
+
+    def span_of(self, glyph_id):
+        track = self._track_of.get(glyph_id)
+        return None if track is None else self.tracks[track].spans[glyph_id]
+
+    def order_of(self, glyph_id):
+        return self._order.get(glyph_id, -1)
+
+    def query(self, start_ms, end_ms, tracks=None):
+        result = []
+        for track in (self.tracks if tracks is None else tracks):
+            track_index = self.tracks.get(track)
+            if track_index:
+                result.extend(track_index.query(start_ms, end_ms))
+
+        return result
+
+    def topmost(self, glyph_ids):
+        return max(glyph_ids, key=self.order_of, default=None)
@@ -0,0 +1,605 @@
+from copy import deepcopy
+from collections.abc import MutableMapping
+
+import numpy as np
+
+FIELDS = ("track", "start", "duration", "brightness", "end_brightness", "effect")
+NUMERIC_FIELDS = ("start", "duration", "brightness", "end_brightness")
+FIELD_BITS = {field: 1 << i for i, field in enumerate(FIELDS)}
+
+INITIAL_CAPACITY = 64
+MAX_INDEXED_ID = 1 << 62
+
+class GlyphDelta:
+    """One change to a SyncedDict: added {id: new}, updated {id: (old, new)} and removed {id: old}."""
+
+    def __init__(self, added = None, updated = None, removed = None):
+        self.added = added or {}
+        self.updated = updated or {}
+        self.removed = removed or {}
+
+    def __bool__(self):
+        return bool(self.added or self.updated or self.removed)
+
+    def changed(self):
+        """Ids with a new value, mapped to that value."""
+        return {**self.added, **{id: new for id, (_, new) in self.updated.items()}}
+
+def _is_number(value):
+    return isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool)
+
+def _index_code(key):
+    """Sort code for integer ids and canonical digit strings; None for any other key.
+
+    The low bit keeps 5 and "5" apart, since they are different dict keys.
+    """
+    if isinstance(key, (int, np.integer)) and not isinstance(key, bool):
+        return int(key) << 1 if 0 <= key < MAX_INDEXED_ID else None
+
+    if isinstance(key, str) and key.isascii() and key.isdigit() and (key == "0" or key[0] != "0") and len(key) < 19:
+        return int(key) << 1 | 1
+
+    return None
+
+class GlyphView(MutableMapping):
+    """Dict-like handle to one glyph of a GlyphStore. Reads and writes go straight to the columns."""
+
+    __slots__ = ("_store", "_key", "_row", "_generation")
+
+    def __init__(self, store, key, row):
+        self._store = store
+        self._key = key
+        self._row = row
+        self._generation = store._generation
+
+    def _resolve(self):
+        # Rows only move when the store compacts or removes glyphs.
+        if self._generation != self._store._generation:
+            self._row = self._store._row_of(self._key)
+            self._generation = self._store._generation
+
+            if self._row is None:
+                raise KeyError(self._key)
+
+        return self._row
+
+    def __getitem__(self, field):
+        return self._store._get_field(self._resolve(), self._key, field)
+
+    def __setitem__(self, field, value):
+        self._store._set_field(self._resolve(), self._key, field, value)
+
+    def __delitem__(self, field):
+        self._store._del_field(self._resolve(), self._key, field)
+
+    def __iter__(self):
+        return iter(self._store._fields_of(self._resolve(), self._key))
+
+    def __len__(self):
+        return len(self._store._fields_of(self._resolve(), self._key))
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def copy(self):
+        return dict(self)
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return deepcopy(dict(self), memo)
+
+class GlyphStore(MutableMapping):
+    """Columnar drop-in for SyncedDict.
+
+    The common glyph fields live in NumPy columns (track code, start, duration,
+    brightness, end brightness) plus an object column that references the effect dict. Anything
+    else, including values a column cannot hold (such as a brightness typed in
+    as text), is kept in a small per-glyph dict. Ids are stored as integers
+    with a sorted index next to the columns, so a glyph costs no Python
+    objects at all unless it has such extras. Lookups return GlyphViews, so
+    in-place edits while dragging keep working. A view's first write after a
+    notification snapshots the glyph, which gives subscribers the same (old,
+    new) GlyphDeltas as SyncedDict.
+
+    Deleted rows are tombstoned and compacted once they make up half the
+    table, so iteration keeps insertion order. `shift`, `query` and `columns`
+    work on whole columns at once.
+    """
+
+    COLUMNS = (
+        ("_codes", np.int64, -1),
+        ("_track", np.int32, -1),
+        ("_start", np.float64, np.nan),
+        ("_duration", np.float64, np.nan),
+        ("_brightness", np.float64, np.nan),
+        ("_end_brightness", np.float64, np.nan),
+        ("_effect", object, None),
+        ("_present", np.uint8, 0),
+        ("_integral", np.uint8, 0),
+        ("_alive", bool, False)
+    )
+
+    def __init__(self, glyphs = None):
+        glyphs = dict(glyphs or {})
+
+        self._subscribers = []
+        self._extras = {}
+        self._snapshots = {}
+        self._tracks = []
+        self._track_codes = {}
+        self._other_rows = {}
+        self._other_keys = {}
+        self._size = 0
+        self._count = 0
+        self._dead = 0
+        self._generation = 0
+        self._allocate(max(INITIAL_CAPACITY, len(glyphs)))
+
+        for key, glyph in glyphs.items():
+            self._write_row(self._append(key, indexed=False), key, dict(glyph))
+
+        self._rebuild_index()
+
+    def _allocate(self, capacity):
+        size = self._size
+
+        for name, dtype, fill in self.COLUMNS:
+            column = np.full(capacity, fill, dtype=dtype)
+            if size:
+                column[:size] = getattr(self, name)[:size]
+
+            setattr(self, name, column)
+
+    # Subscribers
+
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def _emit(self, delta: GlyphDelta):
+        if delta:
+            for callback in list(self._subscribers):
+                callback(delta)
+
+    # Keys and rows
+
+    def _rebuild_index(self):
+        rows = np.flatnonzero(self._alive[:self._size] & (self._codes[:self._size] >= 0))
+        order = np.argsort(self._codes[rows], kind="stable")
+        self._index_codes = self._codes[rows][order]
+        self._index_rows = rows[order]
+
+    def _row_of(self, key):
+        code = _index_code(key)
+        if code is None:
+            return self._other_rows.get(key)
+
+        position = np.searchsorted(self._index_codes, code)
+        if position < len(self._index_codes) and self._index_codes[position] == code:
+            return int(self._index_rows[position])
+
+        return None
+
+    def _key_of(self, row):
+        code = int(self._codes[row])
+        if code < 0:
+            return self._other_keys[row]
+
+        return str(code >> 1) if code & 1 else code >> 1
+
+    def _append(self, key, indexed = True):
+        if self._size == len(self._alive):
+            self._allocate(len(self._alive) * 2)
+
+        row = self._size
+        code = _index_code(key)
+        self._size += 1
+        self._count += 1
+        self._alive[row] = True
+
+        if code is None:
+            self._other_rows[key] = row
+            self._other_keys[row] = key
+
+        else:
+            self._codes[row] = code
+
+            if indexed:
+                position = np.searchsorted(self._index_codes, code)
+                self._index_codes = np.insert(self._index_codes, position, code)
+                self._index_rows = np.insert(self._index_rows, position, row)
+
+        return row
+
+    def _unlink(self, row, key):
+        code = int(self._codes[row])
+
+        if code < 0:
+            del self._other_rows[key]
+            del self._other_keys[row]
+
+        else:
+            position = np.searchsorted(self._index_codes, code)
+            self._index_codes = np.delete(self._index_codes, position)
+            self._index_rows = np.delete(self._index_rows, position)
+
+        self._codes[row] = -1
+        self._alive[row] = False
+        self._count -= 1
+        self._dead += 1
+        self._generation += 1
+
+    def _compact(self):
+        keep = np.flatnonzero(self._alive[:self._size])
+        moved = np.full(self._size, -1, dtype=np.intp)
+        moved[keep] = np.arange(len(keep))
+
+        for name, _, fill in self.COLUMNS:
+            column = getattr(self, name)
+            column[:len(keep)] = column[keep]
+            column[len(keep):self._size] = fill
+
+        self._index_rows = moved[self._index_rows]
+        self._other_keys = {int(moved[row]): key for row, key in self._other_keys.items()}
+        self._other_rows = {key: row for row, key in self._other_keys.items()}
+
+        self._size = len(keep)
+        self._dead = 0
+        self._generation += 1
+
+    def _view(self, key):
+        row = self._row_of(key)
+        if row is None:
+            raise KeyError(key)
+
+        return GlyphView(self, key, row)
+
+    def _clear_row(self, row, key):
+        self._track[row] = -1
+        self._start[row] = self._duration[row] = self._brightness[row] = self._end_brightness[row] = np.nan
+        self._effect[row] = None
+        self._present[row] = self._integral[row] = 0
+        self._extras.pop(key, None)
+
+    def _write_row(self, row, key, glyph: dict):
+        self._clear_row(row, key)
+
+        for field, value in glyph.items():
+            self._write(row, key, field, value)
+
+    def _row_dict(self, row, key):
+        return {field: self._get_field(row, key, field) for field in self._fields_of(row, key)}
+
+    def _old(self, row, key):
+        old = self._snapshots.pop(key, None)
+        return old if old is not None else self._row_dict(row, key)
+
+    # Fields
+
+    def _track_code(self, track):
+        code = self._track_codes.get(track)
+        if code is None:
+            code = self._track_codes[track] = len(self._tracks)
+            self._tracks.append(track)
+
+        return code
+
+    def _write(self, row, key, field, value):
+        extras = self._extras.get(key)
+        if extras is not None and field in extras:
+            del extras[field]
+            if not extras:
+                del self._extras[key]
+
+        bit = FIELD_BITS.get(field, 0)
+
+        if field in NUMERIC_FIELDS and _is_number(value):
+            getattr(self, f"_{field}")[row] = value
+            self._present[row] |= bit
+
+            if isinstance(value, (int, np.integer)):
+                self._integral[row] |= bit
+            else:
+                self._integral[row] &= 0xFF ^ bit
+
+        elif field == "track" and isinstance(value, (str, int)) and not isinstance(value, bool):
+            self._track[row] = self._track_code(value)
+            self._present[row] |= bit
+
+        elif field == "effect":
+            self._effect[row] = value
+            self._present[row] |= bit
+
+        else:
+            if bit:
+                self._present[row] &= 0xFF ^ bit
+
+            self._extras.setdefault(key, {})[field] = value
+
+    def _get_field(self, row, key, field):
+        extras = self._extras.get(key)
+        if extras is not None and field in extras:
+            return extras[field]
+
+        bit = FIELD_BITS.get(field)
+        if bit is None or not self._present[row] & bit:
+            raise KeyError(field)
+
+        if field == "track":
+            return self._tracks[self._track[row]]
+
+        if field == "effect":
+            return self._effect[row]
+
+        value = getattr(self, f"_{field}")[row]
+        return int(value) if self._integral[row] & bit else float(value)
+
+    def _fields_of(self, row, key):
+        present = self._present[row]
+        return [field for field in FIELDS if present & FIELD_BITS[field]] + list(self._extras.get(key, ()))
+
+    def _set_field(self, row, key, field, value):
+        if key not in self._snapshots:
+            self._snapshots[key] = self._row_dict(row, key)
+
+        self._write(row, key, field, value)
+
+    def _del_field(self, row, key, field):
+        if field not in self._fields_of(row, key):
+            raise KeyError(field)
+
+        if key not in self._snapshots:
+            self._snapshots[key] = self._row_dict(row, key)
+
+        extras = self._extras.get(key)
+        if extras is not None and field in extras:
+            del extras[field]
+            if not extras:
+                del self._extras[key]
+
+        else:
+            self._present[row] &= 0xFF ^ FIELD_BITS[field]
+            if field == "effect":
+                self._effect[row] = None
+
+    # Mapping
+
+    def __getitem__(self, key):
+        return self._view(key)
+
+    def __contains__(self, key):
+        return self._row_of(key) is not None
+
+    def __len__(self):
+        return self._count
+
+    def _live_keys(self, rows):
+        codes = self._codes[rows].tolist()
+        return [self._other_keys[row] if code < 0 else str(code >> 1) if code & 1 else code >> 1 for row, code in zip(rows.tolist(), codes)]
+
+    def __iter__(self):
+        return iter(self._live_keys(np.flatnonzero(self._alive[:self._size])))
+
+    def _store(self, key, value, delta: GlyphDelta):
+        if isinstance(value, GlyphView) and value._store is self and value._key == key:
+            # Already written through the view; only the notification is missing.
+            delta.updated[key] = (self._old(value._resolve(), key), value)
+            return
+
+        glyph = dict(value)
+        row = self._row_of(key)
+
+        if row is None:
+            row = self._append(key)
+            self._write_row(row, key, glyph)
+            delta.added[key] = GlyphView(self, key, row)
+
+        else:
+            old = self._old(row, key)
+            self._write_row(row, key, glyph)
+            delta.updated[key] = (old, GlyphView(self, key, row))
+
+    def __setitem__(self, key, value):
+        delta = GlyphDelta()
+        self._store(key, value, delta)
+        self._emit(delta)
+
+    def _remove(self, key):
+        row = self._row_of(key)
+        if row is None:
+            raise KeyError(key)
+
+        old = self._old(row, key)
+        self._clear_row(row, key)
+        self._unlink(row, key)
+
+        if self._dead > max(INITIAL_CAPACITY, self._size // 2):
+            self._compact()
+
+        return old
+
+    def __delitem__(self, key):
+        self._emit(GlyphDelta(removed={key: self._remove(key)}))
+
+    def update(self, *args, **kwargs):
+        delta = GlyphDelta()
+        for key, value in dict(*args, **kwargs).items():
+            self._store(key, value, delta)
+
+        self._emit(delta)
+
+    def pop(self, key, *default):
+        row = self._row_of(key)
+        if row is not None:
+            value = self._row_dict(row, key)
+            self._emit(GlyphDelta(removed={key: self._remove(key)}))
+            return value
+
+        if default:
+            return default[0]
+
+        raise KeyError(key)
+
+    def clear(self):
+        removed = {key: self._old(self._row_of(key), key) for key in self}
+
+        self._extras = {}
+        self._snapshots = {}
+        self._other_rows = {}
+        self._other_keys = {}
+        self._size = self._count = self._dead = 0
+        self._generation += 1
+        self._allocate(INITIAL_CAPACITY)
+        self._rebuild_index()
+        self._emit(GlyphDelta(removed=removed))
+
+    def to_dict(self):
+        """Plain {id: glyph dict} copy, e.g. for saving."""
+        rows = np.flatnonzero(self._alive[:self._size])
+        keys = self._live_keys(rows)
+        return dict(zip(keys, self._row_dicts(rows, keys)))
+
+    # Bulk operations
+
+    def _rows_of(self, keys):
+        """Vectorized _row_of: one searchsorted for all indexed keys, -1 where a key is missing."""
+        codes = list(map(_index_code, keys))
+        others = [i for i, code in enumerate(codes) if code is None]
+        rows = np.full(len(keys), -1, dtype=np.intp)
+
+        if len(self._index_codes) and len(others) < len(keys):
+            # -1 is never indexed, so unindexed keys simply miss.
+            wanted = np.array([-1 if code is None else code for code in codes] if others else codes, dtype=np.int64)
+            positions = np.minimum(np.searchsorted(self._index_codes, wanted), len(self._index_codes) - 1)
+            hits = self._index_codes[positions] == wanted
+            rows[hits] = self._index_rows[positions[hits]]
+
+        for i in others:
+            rows[i] = self._other_rows.get(keys[i], -1)
+
+        return rows
+
+    def _row_dicts(self, rows, keys):
+        """_row_dict for many rows, reading each column once."""
+        values = {
+            "track": [self._tracks[code] if code >= 0 else None for code in self._track[rows].tolist()],
+            "effect": self._effect[rows].tolist(),
+            **{field: getattr(self, f"_{field}")[rows].tolist() for field in NUMERIC_FIELDS}
+        }
+        present = self._present[rows].tolist()
+        integral = self._integral[rows].tolist()
+
+        result = []
+        for i, key in enumerate(keys):
+            glyph = {}
+            for field in FIELDS:
+                bit = FIELD_BITS[field]
+                if present[i] & bit:
+                    value = values[field][i]
+                    glyph[field] = int(value) if integral[i] & bit else value
+
+            glyph.update(self._extras.get(key, ()))
+            result.append(glyph)
+
+        return result
+
+    def _snapshot_rows(self, rows, keys):
+        """Pops the (old) glyphs of the given rows: the snapshot taken at a view's first write, or the current values."""
+        missing = [i for i, key in enumerate(keys) if key not in self._snapshots]
+        current = self._row_dicts(rows[missing], [keys[i] for i in missing]) if missing else []
+        old = [self._snapshots.pop(key, None) for key in keys]
+
+        for i, glyph in zip(missing, current):
+            old[i] = glyph
+
+        return old
+
+    def _movable(self, keys):
+        """Rows of the given keys that exist and have a numeric start, with those keys."""
+        keys = list(keys)
+        rows = self._rows_of(keys)
+        movable = (rows >= 0)
+        movable[movable] = (self._present[rows[movable]] & FIELD_BITS["start"]).astype(bool)
+
+        return [key for key, ok in zip(keys, movable.tolist()) if ok], rows[movable], movable
+
+    def shift(self, keys, offset_ms, minimum = 0):
+        """Moves the given glyphs by `offset_ms` (clamped at `minimum`) with a single write and a single notification."""
+        keys, rows, _ = self._movable(keys)
+        if not keys:
+            return
+
+        old = self._snapshot_rows(rows, keys)
+        self._start[rows] = np.maximum(self._start[rows] + offset_ms, minimum)
+
+        if not (isinstance(offset_ms, (int, np.integer)) and isinstance(minimum, (int, np.integer))):
+            self._integral[rows] &= np.uint8(0xFF ^ FIELD_BITS["start"])
+
+        self._emit(GlyphDelta(updated={key: (old[i], GlyphView(self, key, row)) for i, (key, row) in enumerate(zip(keys, rows.tolist()))}))
+
+    def place(self, keys, starts):
+        """Sets the start of the given glyphs to `starts` with a single write, as if through their views.
+
+        Nothing is emitted: like any in-place edit, the change is announced when
+        the views are stored back (e.g. with `update`). Returns {id: view} for
+        the glyphs that were moved.
+        """
+        keys, rows, movable = self._movable(keys)
+        if not keys:
+            return {}
+
+        unsnapped = [i for i, key in enumerate(keys) if key not in self._snapshots]
+        if unsnapped:
+            self._snapshots.update(zip([keys[i] for i in unsnapped], self._row_dicts(rows[unsnapped], [keys[i] for i in unsnapped])))
+
+        self._start[rows] = np.asarray(starts, dtype=np.float64)[movable]
+        self._integral[rows] &= np.uint8(0xFF ^ FIELD_BITS["start"])
+
+        return {key: GlyphView(self, key, row) for key, row in zip(keys, rows.tolist())}
+
+    def query(self, start_ms, end_ms, tracks = None):
+        """Ids of glyphs overlapping [start_ms, end_ms], optionally only on `tracks`, in insertion order."""
+        size = self._size
+        start = self._start[:size]
+
+        # Missing or non-numeric spans are NaN, which compares false.
+        mask = self._alive[:size] & (start <= end_ms) & (start + self._duration[:size] >= start_ms)
+
+        if tracks is not None:
+            codes = [self._track_codes[track] for track in tracks if track in self._track_codes]
+            mask &= np.isin(self._track[:size], codes) & (self._present[:size] & FIELD_BITS["track"]).astype(bool)
+
+        return self._live_keys(np.flatnonzero(mask))
+
+    def columns(self):
+        """Copies of the columns for live glyphs, in insertion order.
+
+        `track_code` indexes `tracks` (-1 when the glyph has no plain track).
+        Missing or non-numeric values are NaN, and `effect` holds the effect dict or None.
+        `plain` marks glyphs that are fully described by the columns: a track,
+        start and duration are set and there are no extra fields.
+        """
+        rows = np.flatnonzero(self._alive[:self._size])
+        keys = self._live_keys(rows)
+        required = FIELD_BITS["track"] | FIELD_BITS["start"] | FIELD_BITS["duration"]
+
+        plain = (self._present[rows] & required) == required
+        if self._extras:
+            plain &= np.array([key not in self._extras for key in keys], dtype=bool)
+
+        return {
+            "id": keys,
+            "track_code": self._track[rows],
+            "tracks": list(self._tracks),
+            "start": self._start[rows],
+            "duration": self._duration[rows],
+            "brightness": self._brightness[rows],
+            "end_brightness": self._end_brightness[rows],
+            "effect": self._effect[rows],
+            "plain": plain
+        }
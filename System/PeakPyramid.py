@@ -0,0 +1,210 @@
+import os
+import json
+
+import numpy as np
+
+BASE_BLOCK = 16
+
+CACHE_FILE = "Peaks.npy"
+CACHE_META_FILE = "Peaks.json"
+CACHE_VERSION = 1
+METRIC_HISTORY = 20
+
+def _reduce_pairs(mins, maxs):
+    if len(mins) % 2:
+        mins = np.append(mins, mins[-1])
+        maxs = np.append(maxs, maxs[-1])
+
+    return np.minimum(mins[0::2], mins[1::2]), np.maximum(maxs[0::2], maxs[1::2])
+
+class PeakPyramid:
+    """Min/max envelope of a mono signal at power-of-two decimations.
+
+    Level 0 holds one (min, max) pair per BASE_BLOCK samples (a power of two),
+    and each next level halves the previous one. A query picks the coarsest level
+    that still gives at least one block per output bin, so the cost depends on the
+    bin count rather than on the audio length.
+    """
+
+    def __init__(self, mins: list, maxs: list, length: int, base_block: int = BASE_BLOCK):
+        self.mins = mins
+        self.maxs = maxs
+        self.length = length
+        self.base_block = base_block
+
+    @classmethod
+    def from_audio(cls, audio_data: np.ndarray, base_block: int = BASE_BLOCK):
+        audio_data = np.asarray(audio_data, dtype=np.float32)
+        if audio_data.ndim > 1:
+            audio_data = audio_data.mean(axis=0)
+
+        length = len(audio_data)
+        if length == 0:
+            return cls([np.zeros(1, np.float32)], [np.zeros(1, np.float32)], 0, base_block)
+
+        padded_length = -(-length // base_block) * base_block
+        padded = np.pad(audio_data, (0, padded_length - length), mode="edge").reshape(-1, base_block)
+
+        # Folding columns pairwise is several times faster than min/max along a short axis.
+        level_min = level_max = padded
+        while level_min.shape[1] > 1:
+            level_min = np.minimum(level_min[:, 0::2], level_min[:, 1::2])
+            level_max = np.maximum(level_max[:, 0::2], level_max[:, 1::2])
+
+        mins = [level_min[:, 0]]
+        maxs = [level_max[:, 0]]
+
+        while len(mins[-1]) > 1:
+            level_min, level_max = _reduce_pairs(mins[-1], maxs[-1])
+            mins.append(level_min)
+            maxs.append(level_max)
+
+        return cls(mins, maxs, length, base_block)
+
+    @property
+    def levels(self):
+        return len(self.mins)
+
+    def block_size(self, level: int):
+        return self.base_block << level
+
+    def level_for(self, samples_per_bin: float):
+        level = 0
+        while level + 1 < self.levels and self.block_size(level + 1) <= samples_per_bin:
+            level += 1
+
+        return level
+
+    def min_max(self, start_sample: float, end_sample: float, bins: int):
+        """Returns (mins, maxs) arrays of `bins` values covering [start_sample, end_sample)."""
+        start_sample = max(0.0, float(start_sample))
+        end_sample = min(float(self.length), float(end_sample))
+
+        if bins <= 0 or end_sample <= start_sample:
+            return np.zeros(0, np.float32), np.zeros(0, np.float32)
+
+        level = self.level_for((end_sample - start_sample) / bins)
+        block = self.block_size(level)
+        level_min = self.mins[level]
+        level_max = self.maxs[level]
+
+        first_block = int(start_sample // block)
+        end_block = min(len(level_min), max(first_block + 1, int(-(-end_sample // block))))
+
+        edges = np.linspace(start_sample, end_sample, bins + 1)[:-1]
+        starts = np.clip((edges // block).astype(np.int64) - first_block, 0, end_block - first_block - 1)
+
+        return (
+            np.minimum.reduceat(level_min[first_block:end_block], starts),
+            np.maximum.reduceat(level_max[first_block:end_block], starts)
+        )
+
+    def abs_peaks(self, bins: int, start_sample: float = 0, end_sample: float = None):
+        mins, maxs = self.min_max(start_sample, self.length if end_sample is None else end_sample, bins)
+        return np.maximum(np.abs(mins), np.abs(maxs))
+
+    def stats(self, audio_data: np.ndarray, sampling_rate: int):
+        peak = max(abs(float(self.mins[-1][0])), abs(float(self.maxs[-1][0])))
+        rms = float(np.sqrt(np.mean(np.square(audio_data, dtype=np.float64)))) if len(audio_data) else 0.0
+
+        return {
+            "sampling_rate": int(sampling_rate),
+            "duration": self.length / sampling_rate if sampling_rate else 0.0,
+            "peak": peak,
+            "rms": rms
+        }
+
+    def save(self, path: str):
+        data = np.stack([np.concatenate(self.mins), np.concatenate(self.maxs)]).astype(np.float32)
+
+        with open(path + ".tmp", "wb") as f:
+            np.save(f, data)
+        
+        os.replace(path + ".tmp", path)
+        return [len(level) for level in self.mins]
+
+    @classmethod
+    def load(cls, path: str, level_sizes: list, length: int, base_block: int):
+        data = np.load(path, mmap_mode="r")
+        offsets = np.cumsum([0] + level_sizes)
+
+        if data.shape != (2, offsets[-1]):
+            raise ValueError(f"Peak cache {path} does not match its metadata.")
+
+        mins = [data[0, offsets[i]:offsets[i + 1]] for i in range(len(level_sizes))]
+        maxs = [data[1, offsets[i]:offsets[i + 1]] for i in range(len(level_sizes))]
+
+        return cls(mins, maxs, length, base_block)
+
+def audio_cache_key(audio_path: str):
+    # Size and mtime only: this runs on the GUI thread before decoding starts, so the file is never read here.
+    stat = os.stat(audio_path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+def _cache_paths(audio_path: str):
+    folder = os.path.dirname(os.path.abspath(audio_path))
+    return os.path.join(folder, CACHE_FILE), os.path.join(folder, CACHE_META_FILE)
+
+def _read_meta(meta_path: str):
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    
+    except (OSError, ValueError):
+        return {}
+
+def _write_meta(meta_path: str, meta: dict):
+    with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=4)
+    
+    os.replace(meta_path + ".tmp", meta_path)
+
+def load_cached(audio_path: str, key: str = None):
+    """Returns (pyramid, stats) from the project's peak cache, or None if it is missing or stale."""
+    data_path, meta_path = _cache_paths(audio_path)
+    meta = _read_meta(meta_path)
+
+    if meta.get("version") != CACHE_VERSION or not os.path.exists(data_path):
+        return None
+
+    try:
+        if meta.get("key") != (key or audio_cache_key(audio_path)):
+            return None
+        
+        pyramid = PeakPyramid.load(data_path, meta["level_sizes"], meta["length"], meta["base_block"])
+
+    except (OSError, KeyError, ValueError):
+        return None
+
+    return pyramid, meta["stats"]
+
+def store_cached(audio_path: str, pyramid: PeakPyramid, stats: dict, key: str = None):
+    data_path, meta_path = _cache_paths(audio_path)
+    meta = _read_meta(meta_path)
+
+    meta.update({
+        "version": CACHE_VERSION,
+        "key": key or audio_cache_key(audio_path),
+        "length": pyramid.length,
+        "base_block": pyramid.base_block,
+        "level_sizes": pyramid.save(data_path),
+        "stats": stats
+    })
+    meta.setdefault("metrics", {})
+
+    _write_meta(meta_path, meta)
+
+def record_metric(audio_path: str, name: str, value: float):
+    """Appends a timing sample to the project's cache sidecar, keeping the last METRIC_HISTORY values."""
+    _, meta_path = _cache_paths(audio_path)
+    meta = _read_meta(meta_path)
+
+    history = meta.setdefault("metrics", {}).setdefault(name, [])
+    history.append(round(value, 2))
+    del history[:-METRIC_HISTORY]
+
+    try:
+        _write_meta(meta_path, meta)
+    
+    except OSError:
+        pass
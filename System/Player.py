@@ -1,29 +1,194 @@
 import time
 import pygame
-import librosa
 
 import numpy as np
 
 from PyQt5.QtCore import *
 from System.Constants import *
+from System import PeakPyramid
+from System import AudioStream
+from System.AudioStore import audio_store
+
+# Callback-to-callback jumps bigger than this are seeks or stalls, not clock drift.
+DRIFT_GAP_MS = 100.0
+# The pause message mentions drift once the playhead is off by more than a frame.
+DRIFT_WARNING_MS = FPS_60
+
+class AudioDecodeWorker(QObject):
+    decoded = pyqtSignal(object, object, int, object)
+    failed = pyqtSignal(object, str)
+
+    def __init__(self, file_path, cache_key, pyramid=None, parent=None):
+        super().__init__(parent)
+        self.file_path = file_path
+        self.cache_key = cache_key
+        self.pyramid = pyramid
+
+    @pyqtSlot()
+    def run(self):
+        try:
+            y, sr = audio_store.load(self.file_path)
+            pyramid = self.pyramid
+
+            # Peaks cached from other samples than this decode (older versions cached the pre-encode audio) are rebuilt.
+            if pyramid is not None and pyramid.length != y.shape[-1]:
+                pyramid = None
+
+            if pyramid is None:
+                pyramid = PeakPyramid.PeakPyramid.from_audio(y)
+                
+                try:
+                    PeakPyramid.store_cached(self.file_path, pyramid, pyramid.stats(y, sr), self.cache_key)
+                
+                except OSError:
+                    pass
+            
+            self.decoded.emit(self, y, sr, pyramid)
+        
+        except Exception as e:
+            self.failed.emit(self, str(e))
+
+class StretchWorker(QObject):
+    """Renders stretch jobs one after another on the manager's stretch thread.
+
+    Jobs arrive through a queued signal, so a render object is only ever filled
+    by this one thread. Bumping `generation` from the GUI thread cancels the job
+    in progress at the next chunk.
+    """
+    finished = pyqtSignal(object, int)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.generation = 0
+
+    @pyqtSlot(object, int, int)
+    def run(self, render, start_chunk, generation):
+        # Chunks are rendered from the playhead onwards, so the part being heard is ready first.
+        count = render.chunk_count
+        for offset in range(count):
+            if generation != self.generation:
+                return
+
+            index = (start_chunk + offset) % count
+            if not render.ready[index]:
+                render.render_chunk(index)
+        
+        self.finished.emit(render, generation)
+
+class DriftLogger:
+    """Measures the drawn playhead against the audio device during playback.
+
+    Neither side comes from position_ms. The stream adds (perf_counter,
+    audible ms) at every audio callback, from the frames the device has pulled
+    so far, and every paint adds (perf_counter, drawn playhead ms). When the
+    summary is made the device positions are interpolated at the paint times,
+    using callbacks that came after each paint too. The device positions are
+    also checked against wall time, which shows an audio clock that runs fast
+    or slow.
+    """
+
+    def __init__(self):
+        self.active = False
+        self.device = []
+        self.paints = []
+
+    def start(self):
+        self.device = []
+        self.paints = []
+        self.active = True
+
+    def stop(self):
+        self.active = False
+
+    def sample(self, displayed_ms):
+        if self.active:
+            self.paints.append((time.perf_counter(), displayed_ms))
+
+    def compare(self):
+        """(wall_ms, device_ms, displayed_ms) for every paint between the first and the last callback."""
+        if len(self.device) < 2 or not self.paints:
+            return np.empty((0, 3))
+
+        device_time, device_ms, _ = np.array(self.device).T
+        paint_time, displayed_ms = np.array(self.paints).T
+        inside = (paint_time >= device_time[0]) & (paint_time <= device_time[-1])
+
+        return np.column_stack((
+            (paint_time[inside] - device_time[0]) * 1000.0,
+            np.interp(paint_time[inside], device_time, device_ms),
+            displayed_ms[inside]
+        ))
+
+    def device_drift_per_minute(self):
+        """Audio positions against wall time at the playback speed, in ms per minute. Seeks and stalls are left out."""
+        if len(self.device) < 2:
+            return 0.0
+
+        device_time, device_ms, speed = np.array(self.device).T
+        expected = np.diff(device_time) * 1000.0 * speed[:-1]
+        residual = np.diff(device_ms) - expected
+        steady = np.abs(residual) < DRIFT_GAP_MS
+
+        wall_minutes = np.diff(device_time)[steady].sum() / 60.0
+        return float(residual[steady].sum() / wall_minutes) if wall_minutes > 0 else 0.0
+
+    def summary(self):
+        rows = self.compare()
+        if not len(rows):
+            return {"samples": 0, "mean_ms": 0.0, "max_ms": 0.0, "p95_ms": 0.0, "device_ms_per_min": 0.0}
+
+        drift = np.abs(rows[:, 2] - rows[:, 1])
+        return {
+            "samples": len(drift),
+            "mean_ms": float(drift.mean()),
+            "max_ms": float(drift.max()),
+            "p95_ms": float(np.percentile(drift, 95)),
+            "device_ms_per_min": self.device_drift_per_minute()
+        }
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("wall_ms,device_ms,displayed_ms,drift_ms\n")
+
+            for wall, device, displayed in self.compare().tolist():
+                f.write(f"{wall:.2f},{device:.2f},{displayed:.2f},{displayed - device:.2f}\n")
 
 class PlaybackManager(QObject):
     playback_position_updated = pyqtSignal(float)
     playback_state_changed = pyqtSignal(bool)
+    playback_seeked = pyqtSignal(float)
     audio_loaded = pyqtSignal(np.ndarray, int, float)
+    peaks_loaded = pyqtSignal(object, int, float)
     status_message_requested = pyqtSignal(str, int)
+    _stretch_requested = pyqtSignal(object, int, int)
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self._audio_data = None
+        self._peak_pyramid = None
         self._sampling_rate = SAMPLING_RATE
         self._current_playback_speed_multiplier = 1.0
         self._is_playing = False
         self._playback_timer = QTimer(self)
         self._playback_timer.setInterval(FPS_60)
         self._playback_timer.timeout.connect(self._update_playback_position)
-        self._playback_start_audio_ms = 0
-        self._playback_start_wall_time = 0
+        self._stream = AudioStream.StreamingPlayer()
+        self.drift_logger = DriftLogger()
+        self._stretch_cache = AudioStream.StretchCache()
+        self._stretch_thread = QThread(self)
+        self._stretch_worker = StretchWorker()
+        self._stretch_worker.moveToThread(self._stretch_thread)
+        self._stretch_requested.connect(self._stretch_worker.run)
+        self._stretch_worker.finished.connect(self._on_stretch_finished)
+        self._stretch_thread.finished.connect(self._stretch_worker.deleteLater)
+        self._stretch_thread.start()
+
+        self._file_path = None
+        self._audio_key = None
+        self._load_started_at = None
+        self._decode_thread = None
+        self._decode_worker = None
+        self.first_paint_ms = None
 
         try:
             pygame.mixer.pre_init(frequency=44100, size=-16, channels=2, buffer=512)
@@ -44,24 +209,91 @@ class PlaybackManager(QObject):
     def sampling_rate(self):
         return self._sampling_rate
 
+    @property
+    def peak_pyramid(self):
+        return self._peak_pyramid
+
     def load_audio(self, file_path):
+        """Starts decoding in the background. Cached peaks, if any, are emitted right away."""
+        self._file_path = file_path
+        self._load_started_at = time.perf_counter()
+        self._audio_data = None
+        self._peak_pyramid = None
+        self.first_paint_ms = None
+
+        self._cancel_stretch()
+
         try:
-            y, sr = librosa.load(file_path, sr=None)
+            cache_key = PeakPyramid.audio_cache_key(file_path)
+            cached = PeakPyramid.load_cached(file_path, cache_key)
+        
+        except OSError as e:
+            self.status_message_requested.emit(f"Failed to load the audio: {str(e)}", 0)
+            self.audio_loaded.emit(None, 0, 0)
+            return False
 
-            self._audio_data = y
-            self._sampling_rate = sr
+        self._audio_key = cache_key
 
-            pygame.mixer.quit()
-            pygame.mixer.init(frequency=self._sampling_rate, channels=1 if y.ndim == 1 else 2)
+        if cached:
+            self._peak_pyramid, stats = cached
+            self._sampling_rate = stats["sampling_rate"]
+            self.peaks_loaded.emit(self._peak_pyramid, self._sampling_rate, stats["duration"])
 
-            self.playback_position_updated.emit(0.0)
-            self.audio_loaded.emit(self._audio_data, self._sampling_rate, len(self._audio_data) / self._sampling_rate)
-            
-            return True
+        self._decode_thread = QThread(self)
+        self._decode_worker = AudioDecodeWorker(file_path, cache_key, self._peak_pyramid)
+        self._decode_worker.moveToThread(self._decode_thread)
+
+        self._decode_thread.started.connect(self._decode_worker.run)
+        self._decode_worker.decoded.connect(self._on_audio_decoded)
+        self._decode_worker.failed.connect(self._on_audio_decode_failed)
+        self._decode_worker.decoded.connect(self._decode_thread.quit)
+        self._decode_worker.failed.connect(self._decode_thread.quit)
+        self._decode_worker.decoded.connect(self._decode_worker.deleteLater)
+        self._decode_worker.failed.connect(self._decode_worker.deleteLater)
+        self._decode_thread.finished.connect(self._decode_thread.deleteLater)
+
+        self._decode_thread.start()
+        return True
+
+    def _on_audio_decoded(self, worker, y, sr, pyramid):
+        if worker is not self._decode_worker:
+            return
+        
+        self._decode_worker = None
+        self._audio_data = y
+        self._sampling_rate = sr
+        self._peak_pyramid = pyramid
+
+        try:
+            self._stream.load(y, sr)
         
         except Exception as e:
-            self.status_message_requested.emit(f"Failed to load the audio: {str(e)}", 0)
-            self.audio_loaded.emit(None, 0, 0)
+            self.status_message_requested.emit(f"Could not initialize audio playback (SDL audio device): {e}.", 0)
+
+        self.set_playback_speed_multiplier(self._current_playback_speed_multiplier)
+
+        self.playback_position_updated.emit(0.0)
+        self.audio_loaded.emit(self._audio_data, self._sampling_rate, len(self._audio_data) / self._sampling_rate)
+
+    def _on_audio_decode_failed(self, worker, message):
+        if worker is not self._decode_worker:
+            return
+        
+        self._decode_worker = None
+        self._peak_pyramid = None
+        self.status_message_requested.emit(f"Failed to load the audio: {message}", 0)
+        self.audio_loaded.emit(None, 0, 0)
+
+    def record_first_paint(self):
+        """Stores the load-to-first-waveform-paint time once per load_audio call."""
+        if self._load_started_at is None or self.first_paint_ms is not None:
+            return
+        
+        self.first_paint_ms = (time.perf_counter() - self._load_started_at) * 1000.0
+
+        # Called from paintEvent, so the sidecar is rewritten once the paint is done.
+        file_path, first_paint_ms = self._file_path, self.first_paint_ms
+        QTimer.singleShot(0, lambda: PeakPyramid.record_metric(file_path, "first_paint_ms", first_paint_ms))
 
     def toggle_playback(self, current_playhead_ms):
         if self._is_playing:
@@ -74,31 +306,15 @@ class PlaybackManager(QObject):
         if self._audio_data is None or self._is_playing:
             return
 
-        self._playback_start_audio_ms = current_playhead_ms
+        if current_playhead_ms >= len(self._audio_data) / self._sampling_rate * 1000.0:
+            self.status_message_requested.emit("Nothing to play from current position.", 3000)
+            return
 
         try:
-            playback_rate = self._current_playback_speed_multiplier
-            slowed_sampling_rate = int(self._sampling_rate * playback_rate)
-
-            pygame.mixer.quit()
-            pygame.mixer.init(frequency=slowed_sampling_rate, channels=1 if self._audio_data.ndim == 1 else 2)
-
-            start_sample_offset = int((self._playback_start_audio_ms / 1000.0) * self._sampling_rate)
-            segment_to_play = self._audio_data[start_sample_offset:]
-
-            if len(segment_to_play) == 0:
-                self.status_message_requested.emit("Nothing to play from current position.", 3000)
-                return
-
-            sound_data = np.int16(segment_to_play / np.max(np.abs(segment_to_play)) * 32767)
-
-            if sound_data.ndim == 1:
-                sound_data = np.column_stack([sound_data, sound_data])
-
-            sound = pygame.sndarray.make_sound(sound_data.copy(order='C'))
-            sound.play()
+            self.drift_logger.start()
+            self._stream.device_log = self.drift_logger.device
+            self._stream.play(current_playhead_ms)
 
-            self._playback_start_wall_time = time.time()
             self._playback_timer.start(14)
             self._is_playing = True
             self.playback_state_changed.emit(True)
@@ -110,28 +326,73 @@ class PlaybackManager(QObject):
 
     def stop_playback(self):
         if self._is_playing:
-            pygame.mixer.stop()
+            self._stream.pause()
+            self._stream.device_log = None
+            self.drift_logger.stop()
             self._is_playing = False
             self._playback_timer.stop()
             self.playback_state_changed.emit(False)
-            self.status_message_requested.emit("Paused.", 2000)
+
+            summary = self.drift_logger.summary()
+            if summary["p95_ms"] > DRIFT_WARNING_MS:
+                self.status_message_requested.emit(f"Paused. The playhead drifted from the audio by up to {summary['p95_ms']:.0f} ms (p95).", 4000)
+
+            else:
+                self.status_message_requested.emit("Paused.", 2000)
+
+    def seek(self, position_ms):
+        """Moves the playhead of a running playback without restarting the stream."""
+        if not self._is_playing:
+            return
+
+        self._stream.seek(position_ms)
+        self.playback_seeked.emit(position_ms)
 
     def set_playback_speed_multiplier(self, speed_multiplier):
+        """Switches speed in place. Slowed speeds play a pitch-preserving render, resampling only until it is ready."""
         self._current_playback_speed_multiplier = speed_multiplier
-        
-        if self._is_playing:
-            current_playhead_ms = self._playback_start_audio_ms + (time.time() - self._playback_start_wall_time) * 1000.0 * self._current_playback_speed_multiplier
-            self.stop_playback()
-            self.start_playback(current_playhead_ms)
+        self._cancel_stretch()
 
-    def _update_playback_position(self):
-        if self._is_playing and self._audio_data is not None:
-            current_wall_time = time.time()
-            elapsed_wall_time_ms = (current_wall_time - self._playback_start_wall_time) * 1000.0
+        if self._audio_data is None or speed_multiplier == 1.0:
+            self._stream.set_speed(speed_multiplier)
+            return
+
+        key = (self._audio_key, speed_multiplier)
+        render = self._stretch_cache.get(key)
+
+        if render is None:
+            render = AudioStream.StretchRender(self._audio_data, self._sampling_rate, speed_multiplier, AudioStream.pcm16_scale(self._audio_data))
+            self._stretch_cache.put(key, render)
+
+        self._stream.set_speed(speed_multiplier, render)
+
+        if not render.complete:
+            start_chunk = render.chunk_at(self.position_ms() / 1000.0 * self._sampling_rate)
+            self._stretch_requested.emit(render, start_chunk, self._stretch_worker.generation)
+
+    def _cancel_stretch(self):
+        self._stretch_worker.generation += 1
 
-            current_audio_ms_offset = elapsed_wall_time_ms * self._current_playback_speed_multiplier
-            new_playhead_ms = self._playback_start_audio_ms + current_audio_ms_offset
+    def _on_stretch_finished(self, render, generation):
+        if generation == self._stretch_worker.generation and render.complete:
+            self.status_message_requested.emit(f"{render.speed:g}x playback is ready.", 2000)
 
+    def shutdown(self):
+        """Stops the background threads. A chunk being stretched or a decode in progress is waited for."""
+        self._cancel_stretch()
+        self._decode_worker = None
+        self._stretch_thread.quit()
+
+        for thread in self.findChildren(QThread):
+            thread.wait()
+
+    def position_ms(self):
+        """The playback clock: monotonic while playing and derived from the frames the audio device consumed."""
+        return self._stream.clock_ms()
+
+    def _update_playback_position(self):
+        if self._is_playing and self._audio_data is not None:
+            new_playhead_ms = self.position_ms()
             audio_duration_ms = (len(self._audio_data) / self._sampling_rate) * 1000.0
 
             if new_playhead_ms >= audio_duration_ms:
@@ -140,4 +401,4 @@ class PlaybackManager(QObject):
                 self.status_message_requested.emit("Playback finished.", 3000)
             
             else:
-                self.playback_position_updated.emit(new_playhead_ms)
\ No newline at end of file
+                self.playback_position_updated.emit(new_playhead_ms)
@@ -1,8 +1,8 @@
 import random
-from System import Utils
 
 from copy import deepcopy
 
+from System import Utils
 from System import Exporter
 from System import GlyphEffects
 
@@ -173,7 +173,7 @@ class Port:
         singles = [deepcopy(g) for g in only_singles]
         effects = [deepcopy(g) for g in only_effects]
         
-        ported_labels = []
+        ported_glyphs = []
         
         for glyph in singles:
             tracks = maps[port_from]["to"][port_to][glyph["track"]]
@@ -188,12 +188,12 @@ class Port:
                         tracks = random.choice(tracks[0])
 
                 for element in tracks:
-                    ported_labels.append(f"{(glyph['start'] / 1000):.6f}\t{((glyph['start'] + glyph['duration']) / 1000):.6f}\t{element}-{glyph['brightness']}-LIN")
+                    ported_glyphs.append(dict(glyph, track=element))
                 
                 continue
             
             glyph["track"] = tracks
-            ported_labels.append(f"{(glyph['start'] / 1000):.6f}\t{((glyph['start'] + glyph['duration']) / 1000):.6f}\t{glyph['track']}-{glyph['brightness']}-LIN")
+            ported_glyphs.append(glyph)
         
         for glyph in effects:
             if glyph["effect"]["settings"]["segmented"]:
@@ -213,22 +213,21 @@ class Port:
                 
                 for element in tracks:
                     glyph["track"] = element
-                    ported_labels.extend(GlyphEffects.effect_to_label(glyph, glyph["effect"], port_to, composition.bpm, tracks))
+                    ported_glyphs.extend(GlyphEffects.effect_to_glyph(glyph, glyph["effect"], port_to, composition.bpm, tracks))
                 
                 continue
             
             glyph["track"] = tracks
-            ported_labels.extend(GlyphEffects.effect_to_label(glyph, glyph["effect"], port_to, composition.bpm, tracks))
+            ported_glyphs.extend(GlyphEffects.effect_to_glyph(glyph, glyph["effect"], port_to, composition.bpm, tracks))
         
-        return ported_labels, port_to
+        return ported_glyphs, port_to
     
-    def export_port(label_list, model, duration, id):
-        labels = "\n".join(label_list)
-        labels = f"0.000000\t0.000000\tLABEL_VERSION=1\n0.000000\t0.000000\tPHONE_MODEL={model}\n{labels}\n{Exporter.f6(duration)}\t{Exporter.f6(duration)}\tEND"
-    
-        labels_file = open("Cache/Labels.txt", "w+")
-        labels_file.write(labels)
-        labels_file.close()
-        
-        Exporter.compile_glyph_file("Cache/Labels.txt", "Cache")
-        Exporter.nglyph_to_ogg(Utils.get_songs_path(f"{id}/cropped_song.ogg"), "Cache/Labels.cassette", Utils.get_songs_path(str(id)), f"Ported_withCassette_{model}")
\ No newline at end of file
+    def export_port(glyphs, model, duration, id):
+        Exporter.export_glyphs(
+            Utils.get_songs_path(f"{id}/cropped_song.ogg"),
+            glyphs,
+            model,
+            duration,
+            Utils.get_songs_path(str(id)),
+            f"Ported_withCassette_{model}"
+        )
@@ -210,6 +210,8 @@ class TrackItemWidget(QWidget):
         if dialog.exec_() == QDialog.Accepted:
             composition.export()
             Utils.ui_sound("Export")
+        
+        composition.syncer.close()
 
 class MainMenu(QWidget):
     composition_created = pyqtSignal(object)
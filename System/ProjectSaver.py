@@ -8,11 +8,14 @@ import numpy as np
 from pydub import AudioSegment
 
 from System import Exporter
+from System import GlyphIndex
 from System import GlyphEffects
 from System import RTVisualizer
 
 from System.Constants import *
 from System import Utils
+from System.AudioStore import audio_store
+from System.GlyphStore import GlyphDelta, GlyphStore
 
 def get_metadata(file_path):
     cmd = [
@@ -31,6 +34,24 @@ def get_metadata(file_path):
     
     return title, artist
 
+def sorted_glyphs(glyphs) -> tuple:
+    """Splits project glyphs into (singles and segments, effects, segments with effects), the way export and porting read them."""
+    only_singles_and_segments = []
+    only_effects = []
+    only_segments_with_effects = []
+
+    for glyph in glyphs.values():
+        if "effect" in glyph and "." in glyph["track"]:
+            only_segments_with_effects.append(glyph)
+
+        elif "effect" in glyph:
+            only_effects.append(glyph)
+
+        else:
+            only_singles_and_segments.append(glyph)
+
+    return only_singles_and_segments, only_effects, only_segments_with_effects
+
 def audiosegment_from_numpy(np_array, sample_rate):
     if np_array.ndim == 2:
         interleaved = (np_array.T * 32767).astype(np.int16).flatten()
@@ -48,41 +69,69 @@ def audiosegment_from_numpy(np_array, sample_rate):
     )
 
 class SyncedDict(dict):
-    def __init__(self, *args, sync_callback = None, composition = None, **kwargs):
+    """Glyph dict that notifies subscribers with a GlyphDelta for every mutation.
+
+    A shallow snapshot of each glyph is kept, so `old` values stay correct even
+    when callers mutate a glyph in place before writing it back.
+    """
+
+    def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.composition = composition
-        self._sync_callback = sync_callback
+        self._subscribers = []
+        self._snapshots = {id: dict(glyph) for id, glyph in self.items()}
 
-    def __setitem__(self, key, value):
+    def subscribe(self, callback):
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def _emit(self, delta: GlyphDelta):
+        if delta:
+            for callback in list(self._subscribers):
+                callback(delta)
+
+    def _store(self, key, value, delta: GlyphDelta):
+        old = self._snapshots.get(key)
         super().__setitem__(key, value)
-        if self._sync_callback:
-            self._sync_callback(self)
+        self._snapshots[key] = dict(value)
+
+        if old is None:
+            delta.added[key] = value
+        
+        else:
+            delta.updated[key] = (old, value)
+
+    def __setitem__(self, key, value):
+        delta = GlyphDelta()
+        self._store(key, value, delta)
+        self._emit(delta)
 
     def __delitem__(self, key):
         super().__delitem__(key)
-        if self._sync_callback:
-            self._sync_callback(self)
+        self._emit(GlyphDelta(removed={key: self._snapshots.pop(key)}))
 
     def update(self, *args, **kwargs):
-        if args and isinstance(args[0], dict):
-            glyphs = args[0]
+        delta = GlyphDelta()
+        for key, value in dict(*args, **kwargs).items():
+            self._store(key, value, delta)
 
-            for id, glyph in glyphs.items():
-                if "effect" in glyph:
-                    self.composition.cached_effects[str(id)] = GlyphEffects.effect_to_glyph(glyph, glyph["effect"], models.get(self.composition.model), self.composition.bpm)
+        self._emit(delta)
 
-            super().update(glyphs, *args[1:], **kwargs)
+    def pop(self, key, *default):
+        if key in self:
+            value = self[key]
+            del self[key]
+            return value
         
-        else:
-            super().update(*args, **kwargs)
-
-        if self._sync_callback:
-            self._sync_callback(self)
+        return super().pop(key, *default)
 
     def clear(self):
+        removed = self._snapshots
         super().clear()
-        if self._sync_callback:
-            self._sync_callback(self)
+        self._snapshots = {}
+        self._emit(GlyphDelta(removed=removed))
 
 class Composition:
     def __init__(self, audiofile_path = None, settings = {}, id = None):
@@ -122,14 +171,19 @@ class Composition:
         self.syncer = RTVisualizer.GlyphSyncer(self)
         
         # Glyph Management
-        self.glyphs = SyncedDict(settings.get("glyphs", {}), sync_callback=self.syncer.sync, composition=self)
+        self.glyphs = (GlyphStore if COLUMNAR_GLYPH_STORE else SyncedDict)(settings.get("glyphs", {}))
+        self.glyph_index = GlyphIndex.GlyphIndex()
+        self.glyph_index.rebuild(self.glyphs)
         self.cached_effects = {}
         self.last_glyph_id = max(map(int, self.glyphs.keys())) if self.glyphs else 0
-        self.syncer.start_scanning_loop()
         
         for id, glyph in self.glyphs.items():
-            if "effect" in glyph:
-                self.cached_effects[id] = GlyphEffects.effect_to_glyph(glyph, glyph["effect"], models.get(self.model), self.bpm)
+            self.cache_effect(id, glyph)
+
+        # Order matters: the syncer reads cached_effects, so it is notified last.
+        self.glyphs.subscribe(self.glyph_index.apply)
+        self.glyphs.subscribe(self.on_glyphs_changed)
+        self.glyphs.subscribe(self.syncer.sync)
 
         # if settings != None, then its a new composition
         self.syncer.full_load(self.glyphs)
@@ -143,38 +197,29 @@ class Composition:
 
     def prepare_cropped_audio(self, audio_path, settings = None):
         os.makedirs(Utils.get_songs_path(str(self.id)), exist_ok = True)
+        full_song_path = Utils.get_songs_path(f"{self.id}/full_song.ogg")
+        cropped_song_path = Utils.get_songs_path(f"{self.id}/cropped_song.ogg")
         
         if settings:
-            shutil.copy(audio_path, Utils.get_songs_path(f"{self.id}/full_song.ogg"))
-            segment = self.audio_data[self.start_sample:self.end_sample]
-            
-            audio = audiosegment_from_numpy(segment, self.sampling_rate)
-            audio = audio.normalize()
-            
-            if self.fade_in_duration:
-                audio = audio.fade_in(self.fade_in_duration)
-            
-            if self.fade_out_duration:
-                audio = audio.fade_out(self.fade_out_duration)
-            
-            audio.export(Utils.get_songs_path(f"{self.id}/cropped_song.opus"), format='opus')
-            os.rename(Utils.get_songs_path(f"{self.id}/cropped_song.opus"), Utils.get_songs_path(f"{self.id}/cropped_song.ogg"))
+            shutil.copy(audio_path, full_song_path)
+            audio_data = self.audio_data
         
         else:
-            full_song = AudioSegment.from_file(Utils.get_songs_path(f"{self.id}/full_song.ogg"))
+            audio_data, _ = audio_store.load(full_song_path, self.sampling_rate)
 
-            segment = full_song[self.start_sample:self.end_sample]
-            segment = segment.normalize()
-            
-            if self.fade_in_duration:
-                segment = segment.fade_in(self.fade_in_duration)
-            
-            if self.fade_out_duration:
-                segment = segment.fade_out(self.fade_out_duration)
-            
-            segment.export(Utils.get_songs_path(f"{self.id}/cropped_song.opus"), format='opus')
-                
-            os.rename(Utils.get_songs_path(f"{self.id}/cropped_song.opus"), Utils.get_songs_path(f"{self.id}/cropped_song.ogg"))
+        segment = audio_data[self.start_sample:self.end_sample]
+        
+        audio = audiosegment_from_numpy(segment, self.sampling_rate)
+        audio = audio.normalize()
+        
+        if self.fade_in_duration:
+            audio = audio.fade_in(self.fade_in_duration)
+        
+        if self.fade_out_duration:
+            audio = audio.fade_out(self.fade_out_duration)
+        
+        audio.export(Utils.get_songs_path(f"{self.id}/cropped_song.opus"), format='opus')
+        os.rename(Utils.get_songs_path(f"{self.id}/cropped_song.opus"), cropped_song_path)
 
     def export(self, out_path = None):
         Exporter.export_ringtone(out_path or Utils.get_songs_path(str(self.id)), self)
@@ -192,14 +237,31 @@ class Composition:
 
         return self.last_glyph_id, glyph
 
+    def cache_effect(self, id, glyph, preview = False):
+        # Previews come from drag frames whose start changes every time, so they skip the shared effect cache.
+        if "effect" in glyph:
+            self.cached_effects[str(id)] = GlyphEffects.effect_to_glyph(glyph, glyph["effect"], models.get(self.model), self.bpm, cache = not preview)
+        
+        else:
+            self.cached_effects.pop(str(id), None)
+
+    def on_glyphs_changed(self, delta: GlyphDelta):
+        for id in delta.removed:
+            self.cached_effects.pop(str(id), None)
+
+        for id, glyph in delta.changed().items():
+            self.cache_effect(id, glyph)
+
+    def reindex_glyph(self, id):
+        # Glyph dicts are mutated in place while dragging, so the index is refreshed without a sync.
+        if id in self.glyphs:
+            self.glyph_index.update(id, self.glyphs[id])
+
     def get_glyph(self, glyph_id: int):
         return self.glyphs.get(glyph_id, "NOT FOUND")
 
     def replace_glyph(self, id: int, dict: dict):
         if id in self.glyphs:
-            if "effect" in dict:
-                self.cached_effects[str(id)] = GlyphEffects.effect_to_glyph(dict, dict["effect"], models.get(self.model), self.bpm)
-
             self.glyphs[id] = dict
             return True
 
@@ -211,27 +273,11 @@ class Composition:
         return False
 
     def sorted_glyphs(self) -> tuple:
-        glyphs = self.glyphs.values()
-
-        only_singles_and_segments = []
-        only_effects = []
-        only_segments_with_effects = []
-
-        for glyph in glyphs:
-            if "effect" in glyph and "." in glyph["track"]:
-                only_segments_with_effects.append(glyph)
-
-            elif "effect" in glyph:
-                only_effects.append(glyph)
-
-            elif "." in glyph["track"]:
-                only_singles_and_segments.append(glyph)
-
-            else:
-                only_singles_and_segments.append(glyph)
-
-        return only_singles_and_segments, only_effects, only_segments_with_effects
+        return sorted_glyphs(self.glyphs)
     
+    def serializable_glyphs(self):
+        return self.glyphs.to_dict() if isinstance(self.glyphs, GlyphStore) else self.glyphs
+
     def save(self):
         save_path = Utils.get_songs_path(f"{self.id}/Save.json")
         os.makedirs("Songs", exist_ok=True)
@@ -241,7 +287,7 @@ class Composition:
             with open(save_path, "r", encoding="utf-8") as f:
                 data = json.load(f)
             
-            data["glyphs"] = self.glyphs
+            data["glyphs"] = self.serializable_glyphs()
             
             with open(save_path, "w", encoding="utf-8") as f:
                 json.dump(data, f, ensure_ascii=False, indent=4)
@@ -264,7 +310,7 @@ class Composition:
                 "progress": 0,
                 "model": self.model,
                 "version": self.version,
-                "glyphs": self.glyphs
+                "glyphs": self.serializable_glyphs()
             }
             with open(save_path, "w", encoding="utf-8") as f:
                 json.dump(dict_data, f, ensure_ascii=False, indent=4)
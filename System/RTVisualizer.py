@@ -1,128 +1,276 @@
 import time
-import json
-import socket
-import copy
-import subprocess
+import threading
+
+from copy import deepcopy
+from collections import deque
 
 from PyQt5.QtCore import *
 from System.Constants import *
+from System import WireProtocol
+from System import DeviceManager
 
-ADB_PATH = "System/ADB/adb"
+SEND_QUEUE_LIMIT = 64
+SEND_TIMEOUT = 2
+RECONNECT_TIMEOUT = 1
+RECONNECT_MIN_DELAY = 0.1
+RECONNECT_MAX_DELAY = 5.0
 
-class DeviceScanner(QObject):
-    device_changed = pyqtSignal(list)
-    
-    def __init__(self, syncer):
-        super().__init__()
-        self.syncer = syncer
-        self._running = True
+class GlyphSender(QObject):
+    """Owns the receiver socket and writes queued payloads from a background thread.
 
-    @pyqtSlot()
-    def scan(self):
-        if not self._running:
-            return
+    The GUI thread only appends to a bounded queue, so editing never waits on the
+    network. Payloads are encoded on the sender thread. When a write fails,
+    the connection is re-established with exponential backoff. Frames that are
+    dropped in the meantime, or that overflow the queue, are made good by asking
+    for a fresh `load` snapshot through `resync_requested`.
+    """
 
-        old_devices = self.syncer.devices.copy()
-        self.syncer.scan_devices()
-        if old_devices != self.syncer.devices:
-            self.device_changed.emit(self.syncer.devices)
+    resync_requested = pyqtSignal()
 
-    def stop(self):
+    def __init__(self, address = ("127.0.0.1", DeviceManager.RECEIVER_PORT), queue_limit = SEND_QUEUE_LIMIT):
+        super().__init__()
+        self.address = address
+        self.queue_limit = queue_limit
+
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._sock = None
+        self._codec = WireProtocol.JsonCodec
+        self._attached = False
+        self._generation = 0
+        self._awaiting_load = False
         self._running = False
+        self._thread = None
 
-class GlyphSyncer:
-    def __init__(self, composition):
-        self.last_synced = {}
-        self.composition = composition
-        self.connected_model = None
-        self.devices = []
-        self.scan_devices()
+        self.bytes_sent = 0
+        self.frames_sent = 0
+        self.dropped_frames = 0
+        self.reconnects = 0
+        self._frame_times = deque()
+
+    @property
+    def queue_depth(self):
+        return len(self._queue)
+
+    @property
+    def connected(self):
+        return self._sock is not None
+
+    @property
+    def fps(self):
+        cutoff = time.perf_counter() - 1.0
+        while self._frame_times and self._frame_times[0] < cutoff:
+            self._frame_times.popleft()
         
-        if self.devices:
-            self.client_sock = socket.create_connection(("127.0.0.1", 7777))
-            self.client_sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
-    
-    def start_scanning_loop(self, parent=None):
-        self._scanner_thread = QThread(parent)
-        self._scanner_worker = DeviceScanner(self)
-        self._scanner_worker.moveToThread(self._scanner_thread)
+        return len(self._frame_times)
+
+    def start(self):
+        if self._thread is not None:
+            return
+
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="GlyphSender", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout = 2):
+        self.detach()
+
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
 
-        self._scanner_timer = QTimer(parent)
-        self._scanner_timer.timeout.connect(self._scanner_worker.scan)
-        self._scanner_timer.start(3000)
+    def attach(self, client_sock, codec):
+        """Hands over a freshly negotiated connection. The caller is expected to send a `load` next."""
+        client_sock.settimeout(SEND_TIMEOUT)
 
-        self._scanner_thread.start()
+        with self._condition:
+            if self._sock is not None:
+                self._sock.close()
 
-    def init_device(self, device_id):
-        subprocess.run([ADB_PATH, "-s", device_id, "forward", "tcp:7777", "tcp:7777"], check=True)
-        subprocess.run([ADB_PATH, "shell", "settings", "put", "global", "nt_glyph_interface_debug_enable", "1"])
-        subprocess.run([ADB_PATH, "shell", "am", "force-stop", "com.glyph.receiver"], check = True)
-        subprocess.run([ADB_PATH, "shell", "am", "start-foreground-service", "-n", "com.glyph.receiver/.MainService"], check = True)
+            self._sock = client_sock
+            self._codec = codec
+            self._attached = True
+            self._generation += 1
+            self._awaiting_load = False
+            self._queue.clear()
+            self._condition.notify()
 
-        self.connected_model = self.get_model(device_id)
+    def detach(self):
+        with self._condition:
+            if self._sock is not None:
+                self._sock.close()
 
-        is_connected = False
-        max_retries = 10
-        retry_delay = 1
+            self._sock = None
+            self._attached = False
+            self._generation += 1
+            self._queue.clear()
+            self._condition.notify()
+
+    def enqueue(self, payload: dict):
+        resync = False
+
+        with self._condition:
+            if not self._attached:
+                return
+
+            if payload["action"] == "load":
+                # A snapshot supersedes everything still waiting.
+                self._queue.clear()
+                self._awaiting_load = False
+
+            elif self._awaiting_load and payload["action"] in ("update", "delete"):
+                self.dropped_frames += 1
+                return
+
+            elif len(self._queue) >= self.queue_limit:
+                self.dropped_frames += len(self._queue) + 1
+                self._queue.clear()
+                self._awaiting_load = resync = True
+
+            if not resync:
+                self._queue.append(payload)
+                self._condition.notify()
+
+        if resync:
+            self.resync_requested.emit()
+
+    def _ready(self):
+        return not self._running or (self._attached and (self._sock is None or bool(self._queue)))
+
+    def _run(self):
+        delay = RECONNECT_MIN_DELAY
+
+        while True:
+            with self._condition:
+                self._condition.wait_for(self._ready)
+
+                if not self._running:
+                    return
+
+                generation = self._generation
+                client_sock, codec = self._sock, self._codec
+                payload = self._queue.popleft() if client_sock is not None else None
+
+            if client_sock is None:
+                if self._reconnect(generation):
+                    delay = RECONNECT_MIN_DELAY
+                    self.resync_requested.emit()
+
+                else:
+                    with self._condition:
+                        self._condition.wait_for(lambda: not self._running or self._generation != generation, delay)
+
+                    delay = min(delay * 2, RECONNECT_MAX_DELAY)
+
+                continue
 
-        for _ in range(max_retries):
             try:
-                self.client_sock = socket.create_connection(("127.0.0.1", 7777), timeout=1)
-                self.client_sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                data = codec.encode(payload)
 
-                self.client_sock.sendall(json.dumps({"action": "ping"}).encode() + b"\n")
+            except (KeyError, TypeError, ValueError):
+                self.dropped_frames += 1
+                continue
 
-                self.client_sock.settimeout(2) 
-                response = self.client_sock.recv(1024).decode().strip()
+            try:
+                client_sock.sendall(data)
 
-                if response == "pong":
-                    is_connected = True
-                    break
+            except OSError:
+                with self._condition:
+                    if generation == self._generation:
+                        client_sock.close()
+                        self._sock = None
+                        self._queue.clear()
+                        self._awaiting_load = True
+                        self.dropped_frames += 1
 
-            except (ConnectionRefusedError, socket.timeout) as e:
-                pass
+                continue
 
-            time.sleep(retry_delay)
+            self.bytes_sent += len(data)
+            self.frames_sent += 1
+            self._frame_times.append(time.perf_counter())
 
-        if not is_connected:
-            return
+    def _reconnect(self, generation):
+        try:
+            client_sock, codec = WireProtocol.connect(self.address, timeout=RECONNECT_TIMEOUT)
 
-        if hasattr(self.composition, "glyphs"):
-            self.full_load(self.composition.glyphs)
+        except OSError:
+            return False
+
+        client_sock.settimeout(SEND_TIMEOUT)
+
+        with self._condition:
+            if generation != self._generation or not self._running:
+                client_sock.close()
+                return False
+
+            self._sock = client_sock
+            self._codec = codec
+            self._queue.clear()
+            self._awaiting_load = True
+            self.reconnects += 1
+
+        return True
+
+class GlyphSyncer:
+    def __init__(self, composition, send_interval = FPS_30):
+        self.composition = composition
+        self.connected_model = None
+        self.devices = []
+
+        self.sender = GlyphSender()
+        self.sender.resync_requested.connect(self.on_resync_requested)
+
+        self.device_manager = DeviceManager.DeviceManager()
+        self.device_manager.devices_changed.connect(self.on_devices_changed)
+        self.device_manager.device_connected.connect(self.on_device_connected)
+        self.device_manager.device_disconnected.connect(self.on_device_disconnected)
+
+        # Send scheduler: the latest state per id is kept and flushed at most once per interval.
+        self.send_interval = send_interval
+        self._pending_updates = {}
+        self._pending_deletes = set()
+        self._live_ids = set()
+        self._last_flush = 0.0
+        self._send_timer = QTimer()
+        self._send_timer.setSingleShot(True)
+        self._send_timer.timeout.connect(self.flush)
     
-    def get_model(self, device_id):
-        result = subprocess.run(
-            [ADB_PATH, "-s", device_id, "shell", "getprop", "ro.product.model"],
-            capture_output=True,
-            text=True,
-            check=True
-        )
-        
-        return ModelCodes.get(result.stdout.strip())
+    def start(self):
+        self.sender.start()
+        self.device_manager.start()
     
-    def scan_devices(self):
-        subprocess.run([ADB_PATH, "start-server"], check=True)
+    def close(self):
+        self.device_manager.stop()
+        self.sender.stop()
+        self.connected_model = None
 
-        result = subprocess.run([ADB_PATH, "devices"], capture_output=True, text=True, check=True)
-        lines = result.stdout.strip().splitlines()
-        devices = [line.split()[0] for line in lines[1:] if "device" in line]
-        
-        if self.devices != devices:
-            old_devices = self.devices
-            new_devices = devices
+    def on_devices_changed(self, devices):
+        self.devices = devices
 
-            disconnected = list(set(old_devices) - set(new_devices))
-            connected = list(set(new_devices) - set(old_devices))
-            
-            self.devices = devices
-            
-            for device in connected:
-                if self.get_model(device):
-                    self.init_device(device)
-                    break
+    def on_device_connected(self, device_id, model, client_sock, codec):
+        self.sender.attach(client_sock, codec)
+        self.connected_model = model
+        self.on_resync_requested()
     
+    def on_device_disconnected(self, device_id):
+        self.sender.detach()
+        self.connected_model = None
+    
+    def on_resync_requested(self):
+        if hasattr(self.composition, "glyphs"):
+            self.full_load(self.composition.glyphs)
+    
+    @property
+    def fps(self):
+        return self.sender.fps
+
     def play(self, ms: int):
-        self._send_json(
+        self.flush()
+        self.sender.enqueue(
             {
                 "action": "play",
                 "from_ms": ms
@@ -130,70 +278,91 @@ class GlyphSyncer:
         )
     
     def stop(self):
-        self._send_json({"action": "stop"})
+        self.flush()
+        self.sender.enqueue({"action": "stop"})
 
-    def _send_json(self, payload: dict):
-        if not self.devices:
-            return
+    def enrich(self, gid, glyph):
+        """A snapshot for the sender thread, which encodes it later while the GUI keeps editing."""
+        glyph_copy = deepcopy(dict(glyph))
         
-        try:
-            self.client_sock.sendall(json.dumps(payload).encode() + b"\n")
-
-        except Exception as e:
-            self.client_sock = socket.create_connection(("127.0.0.1", 7777))
-            self.client_sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        if "effect" in glyph:
+            effect_to_glyphs = self.composition.cached_effects.get(gid)
+            
+            if effect_to_glyphs is not None:
+                glyph_copy["effect_to_glyphs"] = [dict(effect_glyph) for effect_glyph in effect_to_glyphs]
+        
+        return glyph_copy
 
-    def sync(self, current: dict):
-        current = {str(k): v for k, v in current.items()}
-        deleted = set(self.last_synced) - set(current)
+    def sync(self, delta):
+        """SyncedDict subscriber: queues only the glyphs a GlyphDelta touched."""
         def glyph_changed(g1, g2):
             if g1 is None:
                 return True
             return any(g1.get(k) != g2.get(k) for k in ("track", "start", "duration", "brightness", "effect"))
 
-        changed = {
-            gid: glyph
-            for gid, glyph in current.items()
-            if glyph_changed(self.last_synced.get(gid), glyph)
-        }
+        for gid in delta.removed:
+            self.schedule_delete(str(gid))
+        
+        for gid, glyph in delta.added.items():
+            self.schedule_update(str(gid), glyph)
+
+        for gid, (old, new) in delta.updated.items():
+            if glyph_changed(old, new):
+                self.schedule_update(str(gid), new)
+
+    def push_live(self, glyphs: dict):
+        """Queues glyphs that are being edited in place (e.g. dragged) without a SyncedDict write."""
+        for gid, glyph in glyphs.items():
+            self._live_ids.add(str(gid))
+            self.schedule_update(str(gid), glyph)
+
+    def schedule_update(self, gid, glyph):
+        self._pending_deletes.discard(gid)
+        self._pending_updates[gid] = glyph
+        self._arm()
 
+    def schedule_delete(self, gid):
+        self._pending_updates.pop(gid, None)
+        self._live_ids.discard(gid)
+        self._pending_deletes.add(gid)
+        self._arm()
+
+    def _arm(self):
+        if not self._send_timer.isActive():
+            elapsed = (time.perf_counter() - self._last_flush) * 1000.0
+            self._send_timer.start(int(max(0, self.send_interval - elapsed)))
+
+    def flush(self):
+        self._send_timer.stop()
+        
+        if not self._pending_updates and not self._pending_deletes:
+            return
+        
+        deleted, self._pending_deletes = self._pending_deletes, set()
+        changed, self._pending_updates = self._pending_updates, {}
+        live, self._live_ids = self._live_ids, set()
+        self._last_flush = time.perf_counter()
+
+        # Dragged effect glyphs have not been written back yet, so their expansion is refreshed here.
+        for gid in live & changed.keys():
+            self.composition.cache_effect(gid, changed[gid], preview = True)
+        
         if deleted:
-            self._send_json({"action": "delete", "ids": list(deleted)})
+            self.sender.enqueue({"action": "delete", "ids": list(deleted)})
         
         if changed:
-            enriched = {}
-            for gid, glyph in changed.items():
-                glyph_copy = glyph.copy()
-                if "effect" in glyph:
-                    effect_to_glyphs = self.composition.cached_effects.get(gid)
-                    
-                    if effect_to_glyphs is not None:
-                        glyph_copy["effect_to_glyphs"] = effect_to_glyphs
-                
-                enriched[gid] = glyph_copy
-
-            self._send_json({"action": "update", "glyphs": enriched})
-        
-        self.last_synced = {k: copy.deepcopy(v) for k, v in current.items()}
+            self.sender.enqueue({"action": "update", "glyphs": {gid: self.enrich(gid, glyph) for gid, glyph in changed.items()}})
 
     def full_load(self, glyphs: dict):
-        enriched = {}
-        for gid, glyph in glyphs.items():
-            glyph_copy = glyph.copy()
-            
-            if "effect" in glyph:
-                effect_to_glyphs = self.composition.cached_effects.get(gid)
-                
-                if effect_to_glyphs is not None:
-                    glyph_copy["effect_to_glyphs"] = effect_to_glyphs
-            
-            enriched[gid] = glyph_copy
+        self._send_timer.stop()
+        self._pending_updates.clear()
+        self._pending_deletes.clear()
+        self._live_ids.clear()
         
         payload = {
             "action": "load",
             "glyphs": [
-                dict(g, id=k) for k, g in enriched.items()
+                dict(self.enrich(str(gid), glyph), id=gid) for gid, glyph in glyphs.items()
             ]
         }
-        self._send_json(payload)
-        self.last_synced = copy.deepcopy(dict(glyphs))
\ No newline at end of file
+        self.sender.enqueue(payload)
\ No newline at end of file
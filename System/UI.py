@@ -12,6 +12,7 @@ from . import Styles
 from .Constants import *
 from . import GlyphEffects
 from . import Porter
+from .PeakPyramid import PeakPyramid
 
 class GlitchyButton(QPushButton):
     def __init__(self, *args, **kwargs):
@@ -830,40 +831,36 @@ class MiniWaveformPreview(QWidget):
         super().__init__(parent)
         self.audio_data = None
         self.sampling_rate = None
+        self.peak_pyramid = None
         self.peaks = []
+        self.playhead_ms = None
         self.setFixedHeight(Styles.Metrics.element_height)
         
         self.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Preferred)
 
-    def set_audio_data(self, audio_data, sampling_rate):
+    def set_audio_data(self, audio_data, sampling_rate, peak_pyramid=None):
         self.audio_data = audio_data
         self.sampling_rate = sampling_rate
+
+        if peak_pyramid is None and audio_data is not None:
+            peak_pyramid = PeakPyramid.from_audio(audio_data)
+        
+        self.peak_pyramid = peak_pyramid
+        self.playhead_ms = None
         self.generate_peaks()
         self.update()
 
+    def set_playhead_ms(self, playhead_ms):
+        self.playhead_ms = playhead_ms
+        self.update()
+
     def generate_peaks(self):
         if self.audio_data is None or len(self.audio_data) == 0 or self.width() <=0:
             self.peaks = []
             return
 
-        num_peaks = self.width()
-
-        if len(self.audio_data) == 0:
-            self.peaks = []
-            return
-
-        samples_per_peak = max(1, len(self.audio_data) // num_peaks)
-        temp_peaks = []
-        
-        for i in range(0, len(self.audio_data), samples_per_peak):
-            chunk = self.audio_data[i:i + samples_per_peak]
-            if len(chunk) > 0:
-                temp_peaks.append((np.min(chunk), np.max(chunk)))
-            
-            elif i == 0: 
-                temp_peaks.append((0,0))
-            
-        self.peaks = temp_peaks
+        mins, maxs = self.peak_pyramid.min_max(0, self.peak_pyramid.length, self.width())
+        self.peaks = list(zip(mins.tolist(), maxs.tolist()))
 
     def paintEvent(self, event):
         super().paintEvent(event)
@@ -913,6 +910,12 @@ class MiniWaveformPreview(QWidget):
             painter.setPen(QPen(QColor(*Styles.hex_to_rgb(Styles.Colors.nothing_accent)), 0.5)) 
             painter.drawPath(path_upper)
 
+        if self.playhead_ms is not None and self.sampling_rate:
+            duration_ms = len(self.audio_data) / self.sampling_rate * 1000.0
+            x_pos = min(1.0, self.playhead_ms / duration_ms) * current_width
+            painter.setPen(QPen(Qt.GlobalColor.red, 1))
+            painter.drawLine(QPointF(x_pos, 0), QPointF(x_pos, rect_height))
+
     def mousePressEvent(self, event: QMouseEvent):
         if self.peaks and event.button() == Qt.MouseButton.LeftButton:
             normalized_pos = max(0.0, min(1.0, event.x() / self.width()))
@@ -1809,7 +1812,7 @@ class ExportDialogWindow(BaseDialogWindow):
         code_model = number_model_to_code(text)
         
         ported, ported_to = Porter.Port.port(self.original_model, code_model, self.composition)
-        Porter.Port.export_port(ported, ported_to, self.composition.duration_ms, self.composition.id)
+        Porter.Port.export_port(ported, ported_to, self.composition.audio_duration, self.composition.id)
         
         os.startfile(os.path.abspath(Utils.get_songs_path(str(self.composition.id))))
         Utils.ui_sound("Export")
@@ -81,13 +81,26 @@ def NType(size):
     
     return Ntype
 
+class LazyIcon:
+    """Builds the QIcon on first access. QIcon needs a QGuiApplication, which headless importers of Utils never create."""
+
+    def __init__(self, path):
+        self.path = path
+        self.icon = None
+
+    def __get__(self, instance, owner):
+        if self.icon is None:
+            self.icon = QIcon(self.path)
+
+        return self.icon
+
 class Icons:
-    WindowIcon = QIcon("System/Icons/Icon256.ico")
-    Duration = QIcon("System/Icons/Duration.png")
-    Brightness = QIcon("System/Icons/Brightness.png")
-    Speed = QIcon("System/Icons/Speed.png")
-    Play = QIcon("System/Icons/Play.png")
-    Pause = QIcon("System/Icons/Pause.png")
+    WindowIcon = LazyIcon("System/Icons/Icon256.ico")
+    Duration = LazyIcon("System/Icons/Duration.png")
+    Brightness = LazyIcon("System/Icons/Brightness.png")
+    Speed = LazyIcon("System/Icons/Speed.png")
+    Play = LazyIcon("System/Icons/Play.png")
+    Pause = LazyIcon("System/Icons/Pause.png")
 
 def get_songs_path(relative_path: str) -> str:
     base_path = os.path.dirname(sys.executable if getattr(sys, 'frozen', False) else os.path.abspath(__file__))
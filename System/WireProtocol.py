@@ -0,0 +1,308 @@
+import json
+import socket
+import struct
+import threading
+
+# Binary framing for the glyph receiver, negotiated during the ping/pong handshake.
+#
+# frame    := u32 body length (little endian) | body
+# body     := u8 message type | message
+# load     := varint count | glyph*                      (also used by update)
+# delete   := varint count | varint id*
+# play     := zigzag from_us
+# stop     := (empty)
+#
+# glyph    := varint id | str track | zigzag start_us | varint duration_us | varint brightness | u8 flags
+#             [str effect json]     if flags & HAS_EFFECT
+#             [str extra json]      if flags & HAS_EXTRA
+#             [expansion]           if flags & HAS_EXPANSION
+# expansion:= varint track count | (str track | varint count | entry*)*
+# entry    := varint start delta_us (from the previous entry of the same track) | varint duration_us
+#             | varint brightness | varint end_brightness + 1 (0 = none)
+# str      := varint byte length | utf-8 bytes
+#
+# Times travel as integer microseconds. Expansion entries are grouped per track and
+# sorted by start, so the deltas stay small and non-negative.
+
+PROTOCOL_NAME = "binary/1"
+
+MSG_LOAD = 1
+MSG_UPDATE = 2
+MSG_DELETE = 3
+MSG_PLAY = 4
+MSG_STOP = 5
+
+HAS_EFFECT = 1
+HAS_EXTRA = 2
+HAS_EXPANSION = 4
+
+_GLYPH_KEYS = {"id", "track", "start", "duration", "brightness", "effect", "effect_to_glyphs"}
+
+def _us(ms) -> int:
+    return int(round(float(ms) * 1000.0))
+
+def _write_varint(out: bytearray, value: int):
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+
+    out.append(value)
+
+def _write_zigzag(out: bytearray, value: int):
+    _write_varint(out, (value << 1) if value >= 0 else ((-value << 1) - 1))
+
+def _write_str(out: bytearray, value: str):
+    data = value.encode("utf-8")
+    _write_varint(out, len(data))
+    out += data
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self.data = memoryview(data)
+        self.pos = 0
+
+    def u8(self) -> int:
+        value = self.data[self.pos]
+        self.pos += 1
+        return value
+
+    def varint(self) -> int:
+        shift = result = 0
+        while True:
+            byte = self.u8()
+            result |= (byte & 0x7F) << shift
+
+            if byte < 0x80:
+                return result
+
+            shift += 7
+
+    def zigzag(self) -> int:
+        value = self.varint()
+        return (value >> 1) if not value & 1 else -((value + 1) >> 1)
+
+    def str(self) -> str:
+        length = self.varint()
+        value = bytes(self.data[self.pos:self.pos + length]).decode("utf-8")
+        self.pos += length
+        return value
+
+def _encode_expansion(out: bytearray, entries: list):
+    by_track = {}
+    for entry in entries:
+        by_track.setdefault(str(entry["track"]), []).append(entry)
+
+    _write_varint(out, len(by_track))
+    for track, track_entries in by_track.items():
+        track_entries.sort(key=lambda entry: entry["start"])
+        _write_str(out, track)
+        _write_varint(out, len(track_entries))
+
+        previous = 0
+        for entry in track_entries:
+            start = _us(entry["start"])
+            _write_varint(out, start - previous)
+            _write_varint(out, _us(entry["duration"]))
+            _write_varint(out, int(entry["brightness"]))
+            _write_varint(out, int(entry["end_brightness"]) + 1 if "end_brightness" in entry else 0)
+            previous = start
+
+def _decode_expansion(reader: _Reader) -> list:
+    entries = []
+    for _ in range(reader.varint()):
+        track = reader.str()
+        start = 0
+
+        for _ in range(reader.varint()):
+            start += reader.varint()
+            entry = {"start": start / 1000.0, "duration": reader.varint() / 1000.0, "track": track, "brightness": reader.varint()}
+            end_brightness = reader.varint()
+
+            if end_brightness:
+                entry["end_brightness"] = end_brightness - 1
+
+            entries.append(entry)
+
+    return entries
+
+def _encode_glyph(out: bytearray, gid, glyph: dict):
+    extra = {key: value for key, value in glyph.items() if key not in _GLYPH_KEYS}
+    flags = (HAS_EFFECT if "effect" in glyph else 0) | (HAS_EXTRA if extra else 0) | (HAS_EXPANSION if "effect_to_glyphs" in glyph else 0)
+
+    _write_varint(out, int(gid))
+    _write_str(out, str(glyph["track"]))
+    _write_zigzag(out, _us(glyph["start"]))
+    _write_varint(out, _us(glyph["duration"]))
+    _write_varint(out, int(round(float(glyph["brightness"]))))
+    out.append(flags)
+
+    if flags & HAS_EFFECT:
+        _write_str(out, json.dumps(glyph["effect"], separators=(",", ":")))
+
+    if flags & HAS_EXTRA:
+        _write_str(out, json.dumps(extra, separators=(",", ":")))
+
+    if flags & HAS_EXPANSION:
+        _encode_expansion(out, glyph["effect_to_glyphs"])
+
+def _decode_glyph(reader: _Reader) -> tuple:
+    gid = str(reader.varint())
+    glyph = {
+        "track": reader.str(),
+        "start": reader.zigzag() / 1000.0,
+        "duration": reader.varint() / 1000.0,
+        "brightness": reader.varint()
+    }
+    flags = reader.u8()
+
+    if flags & HAS_EFFECT:
+        glyph["effect"] = json.loads(reader.str())
+
+    if flags & HAS_EXTRA:
+        glyph.update(json.loads(reader.str()))
+
+    if flags & HAS_EXPANSION:
+        glyph["effect_to_glyphs"] = _decode_expansion(reader)
+
+    return gid, glyph
+
+class JsonCodec:
+    name = "json"
+
+    @staticmethod
+    def encode(payload: dict) -> bytes:
+        return json.dumps(payload).encode() + b"\n"
+
+class BinaryCodec:
+    name = PROTOCOL_NAME
+
+    @staticmethod
+    def encode(payload: dict) -> bytes:
+        action = payload["action"]
+        body = bytearray()
+
+        if action == "load":
+            body.append(MSG_LOAD)
+            _write_varint(body, len(payload["glyphs"]))
+            for glyph in payload["glyphs"]:
+                _encode_glyph(body, glyph["id"], glyph)
+
+        elif action == "update":
+            body.append(MSG_UPDATE)
+            _write_varint(body, len(payload["glyphs"]))
+            for gid, glyph in payload["glyphs"].items():
+                _encode_glyph(body, gid, glyph)
+
+        elif action == "delete":
+            body.append(MSG_DELETE)
+            _write_varint(body, len(payload["ids"]))
+            for gid in payload["ids"]:
+                _write_varint(body, int(gid))
+
+        elif action == "play":
+            body.append(MSG_PLAY)
+            _write_zigzag(body, _us(payload["from_ms"]))
+
+        elif action == "stop":
+            body.append(MSG_STOP)
+
+        else:
+            raise ValueError(f"Unknown action {action!r}.")
+
+        return struct.pack("<I", len(body)) + bytes(body)
+
+    @staticmethod
+    def decode(body: bytes) -> dict:
+        reader = _Reader(body)
+        message = reader.u8()
+
+        if message in (MSG_LOAD, MSG_UPDATE):
+            glyphs = [_decode_glyph(reader) for _ in range(reader.varint())]
+
+            if message == MSG_LOAD:
+                return {"action": "load", "glyphs": [dict(glyph, id=gid) for gid, glyph in glyphs]}
+
+            return {"action": "update", "glyphs": dict(glyphs)}
+
+        if message == MSG_DELETE:
+            return {"action": "delete", "ids": [str(reader.varint()) for _ in range(reader.varint())]}
+
+        if message == MSG_PLAY:
+            return {"action": "play", "from_ms": reader.zigzag() / 1000.0}
+
+        if message == MSG_STOP:
+            return {"action": "stop"}
+
+        raise ValueError(f"Unknown message type {message}.")
+
+def ping_payload() -> dict:
+    return {"action": "ping", "protocols": [PROTOCOL_NAME]}
+
+def codec_for_pong(response: str):
+    """Old receivers answer a bare "pong", which keeps the link on JSON."""
+    parts = response.split()
+    return BinaryCodec if parts[:1] == ["pong"] and PROTOCOL_NAME in parts[1:] else JsonCodec
+
+class FakeReceiver:
+    """Local stand-in for the on-device receiver, for tests.
+
+    It answers the handshake (optionally as a legacy JSON-only receiver), decodes
+    every frame and records the payloads together with their size on the wire.
+    """
+
+    def __init__(self, host = "127.0.0.1", port = 0, binary = True):
+        self.binary = binary
+        self.messages = []
+        self.bytes_received = 0
+        self._server = socket.create_server((host, port))
+        self.address = self._server.getsockname()
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        try:
+            connection, _ = self._server.accept()
+
+        except OSError:
+            return
+
+        with connection:
+            stream = connection.makefile("rb")
+            hello = json.loads(stream.readline())
+            binary = self.binary and PROTOCOL_NAME in hello.get("protocols", [])
+            connection.sendall(f"pong {PROTOCOL_NAME}".encode() if binary else b"pong")
+
+            while True:
+                if binary:
+                    header = stream.read(4)
+                    if len(header) < 4:
+                        return
+
+                    body = stream.read(struct.unpack("<I", header)[0])
+                    self.bytes_received += 4 + len(body)
+                    self.messages.append(BinaryCodec.decode(body))
+
+                else:
+                    line = stream.readline()
+                    if not line:
+                        return
+
+                    self.bytes_received += len(line)
+                    self.messages.append(json.loads(line))
+
+    def close(self):
+        self._server.close()
+
+def connect(address, timeout = 2):
+    """Opens a socket to a receiver, runs the handshake and returns (socket, codec)."""
+    client_sock = socket.create_connection(address, timeout=timeout)
+    client_sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    client_sock.sendall(JsonCodec.encode(ping_payload()))
+
+    response = client_sock.recv(1024).decode().strip()
+    if not response.startswith("pong"):
+        client_sock.close()
+        raise ConnectionError(f"Unexpected handshake response {response!r}.")
+
+    client_sock.settimeout(None)
+    return client_sock, codec_for_pong(response)
@@ -0,0 +1,30 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def pytest_addoption(parser):
+    parser.addoption("--benchmark", action="store_true", help="run the benchmark tests and print their timings")
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: timing comparison, skipped unless --benchmark is given")
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--benchmark"):
+        return
+
+    skip = pytest.mark.skip(reason="benchmark, run with --benchmark")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+@pytest.fixture
+def report(capsys):
+    """Prints a benchmark line past pytest's output capture."""
+    def write(line):
+        with capsys.disabled():
+            print(line)
+
+    return write
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""Stand-in for the adb binary, for DeviceManager tests.
+
+Configured through environment variables, which DeviceManager's adb
+subprocesses inherit:
+
+FAKE_ADB_SNAPSHOTS  JSON list of [delay seconds, {serial: state}]; `track-devices`
+                    streams them in order and then stays open.
+FAKE_ADB_MODELS     JSON {serial: ro.product.model}.
+FAKE_ADB_LOG        file that every command line is appended to.
+"""
+
+import os
+import sys
+import json
+import time
+
+def main(argv):
+    with open(os.environ["FAKE_ADB_LOG"], "a", encoding="utf-8") as log:
+        log.write(" ".join(argv) + "\n")
+
+    serial = None
+    if argv[:1] == ["-s"]:
+        serial, argv = argv[1], argv[2:]
+
+    if argv == ["track-devices"]:
+        for delay, devices in json.loads(os.environ.get("FAKE_ADB_SNAPSHOTS", "[]")):
+            time.sleep(delay)
+            body = "".join(f"{device}\t{state}\n" for device, state in devices.items())
+            sys.stdout.write(f"{len(body):04x}{body}")
+            sys.stdout.flush()
+
+        time.sleep(3600)
+
+    elif argv == ["shell", "getprop", "ro.product.model"]:
+        print(json.loads(os.environ.get("FAKE_ADB_MODELS", "{}")).get(serial, "unknown"))
+
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,54 @@
+import itertools
+
+import pytest
+import numpy as np
+
+from System import AudioStream
+
+SAMPLING_RATE = 8000
+
+@pytest.fixture(autouse=True)
+def short_chunks(monkeypatch):
+    monkeypatch.setattr(AudioStream, "STRETCH_CHUNK_SECONDS", 1)
+    monkeypatch.setattr(AudioStream, "STRETCH_PAD_SECONDS", 0.25)
+
+def tone(seconds = 3.5):
+    t = np.arange(int(seconds * SAMPLING_RATE)) / SAMPLING_RATE
+    return (0.5 * np.sin(2 * np.pi * 220 * t) + 0.2 * np.sin(2 * np.pi * 331 * t)).astype(np.float32)
+
+def chunk_span(render, index):
+    return int(index * render.chunk_frames / render.speed), int((index + 1) * render.chunk_frames / render.speed)
+
+@pytest.mark.parametrize("order", list(itertools.permutations(range(4))), ids=str)
+def test_ready_chunks_are_never_rewritten(order):
+    audio_data = tone()
+    render = AudioStream.StretchRender(audio_data, SAMPLING_RATE, 0.75, AudioStream.pcm16_scale(audio_data))
+
+    snapshots = {}
+    for index in order:
+        render.render_chunk(index)
+
+        for ready, snapshot in snapshots.items():
+            start, end = chunk_span(render, ready)
+            assert np.array_equal(render.buffer[start:end], snapshot), f"chunk {ready} changed while rendering {index}"
+
+        start, end = chunk_span(render, index)
+        snapshots[index] = render.buffer[start:end].copy()
+
+    assert render.complete and not render._tails.keys() & render._leads.keys()
+
+def test_cache_is_bounded_by_bytes():
+    audio_data = tone(1.0)
+    renders = [AudioStream.StretchRender(audio_data, SAMPLING_RATE, speed, 1.0) for speed in (0.5, 0.75, 0.9)]
+
+    cache = AudioStream.StretchCache(max_bytes = renders[0].buffer.nbytes + renders[1].buffer.nbytes)
+    for render in renders:
+        cache.put(render.speed, render)
+
+    assert cache.get(0.5) is None and cache.get(0.9) is renders[2]
+    assert cache.nbytes <= cache.max_bytes
+
+    # The render that is playing stays even when it alone is over the limit.
+    cache = AudioStream.StretchCache(max_bytes = 1)
+    cache.put(0.5, renders[0])
+    assert cache.get(0.5) is renders[0]
@@ -0,0 +1,97 @@
+import os
+import timeit
+
+import librosa
+import numpy as np
+import pytest
+import soundfile as sf
+
+from System import BPMAnalyze
+from System.AudioStore import AudioStore
+from System.Constants import BEAT_MAX_DISTANCE
+
+def snap_corpus(seed = 0):
+    rng = np.random.default_rng(seed)
+    corpus = []
+
+    for duration in (30, 180, 600):
+        onset_times = np.sort(rng.uniform(0, duration, duration * 4))
+        onset_strengths = rng.uniform(0, 1, len(onset_times))
+        bpm_times = np.arange(rng.uniform(0, 0.5), duration, 60.0 / rng.uniform(80, 200))
+        corpus.append(pytest.param(bpm_times, onset_times, onset_strengths, id=f"{duration}s"))
+
+    # Grid points exactly BEAT_MAX_DISTANCE away, duplicate onsets and tied strengths.
+    grid = np.arange(0, 60, 0.25)
+    onset_times = np.concatenate((grid + BEAT_MAX_DISTANCE, grid - BEAT_MAX_DISTANCE, grid[::3], grid[::3]))
+    onset_strengths = np.round(rng.uniform(0, 0.2, len(onset_times)), 2)
+    corpus.append(pytest.param(grid, onset_times, onset_strengths, id="edges"))
+
+    return corpus
+
+@pytest.mark.parametrize("bpm_times, onset_times, onset_strengths", snap_corpus())
+def test_snap_beats_to_onsets_matches_reference(bpm_times, onset_times, onset_strengths):
+    expected = BPMAnalyze._snap_beats_to_onsets_reference(bpm_times, onset_times, onset_strengths)
+
+    assert np.array_equal(BPMAnalyze.snap_beats_to_onsets(bpm_times, onset_times, onset_strengths), expected)
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("bpm_times, onset_times, onset_strengths", snap_corpus())
+def test_benchmark_snap_beats_to_onsets(report, request, bpm_times, onset_times, onset_strengths, repeats = 5):
+    reference_ms = min(timeit.repeat(lambda: BPMAnalyze._snap_beats_to_onsets_reference(bpm_times, onset_times, onset_strengths), number=1, repeat=repeats)) * 1000
+    vectorized_ms = min(timeit.repeat(lambda: BPMAnalyze.snap_beats_to_onsets(bpm_times, onset_times, onset_strengths), number=1, repeat=repeats)) * 1000
+
+    report(f"{request.node.callspec.id:>6}: {len(bpm_times):5} beats, {len(onset_times):5} onsets, loop {reference_ms:8.2f} ms, vectorized {vectorized_ms:6.2f} ms")
+
+def click_track(tmp_path, bpm = 124, duration_sec = 30, sr = 48000, seed = 0):
+    """A noisy click track at `sr` (not 44.1 kHz), so the analysis has to resample it."""
+    rng = np.random.default_rng(seed)
+    audio = rng.standard_normal(duration_sec * sr).astype(np.float32) * 0.01
+    click = rng.standard_normal(int(0.03 * sr)).astype(np.float32) * np.exp(-np.linspace(0, 8, int(0.03 * sr), dtype=np.float32))
+
+    for beat in np.arange(0.37, duration_sec - 0.1, 60 / bpm):
+        start = int(beat * sr)
+        audio[start:start + len(click)] += click * rng.uniform(0.3, 1.0)
+
+    path = str(tmp_path / "clicks.wav")
+    sf.write(path, audio, sr)
+    return path
+
+def test_analysis_matches_full_file_onset_strength(tmp_path, monkeypatch, sr = 44100, hop_length = 256):
+    """The streamed analysis against the full-file librosa.onset.onset_strength it replaced, both at 44.1 kHz."""
+    monkeypatch.setattr(BPMAnalyze, "audio_store", AudioStore(str(tmp_path)))
+    path = click_track(tmp_path)
+
+    y, _ = librosa.load(path, sr=sr)
+    onset_env = librosa.onset.onset_strength(y=y, sr=sr, hop_length=hop_length)
+    expected_bpm, expected_first_beat, expected_beats = BPMAnalyze.beat_grid_from_envelope(onset_env, sr, hop_length, len(y) / sr)
+
+    analyzer = BPMAnalyze.StreamingBPMAnalyzer(sr, hop_length)
+    for block in BPMAnalyze.audio_blocks(BPMAnalyze.audio_store.load(path, sr)[0], sr):
+        analyzer.feed(block)
+
+    analyzer.finish()
+    assert np.allclose(analyzer.onset_envelope(), onset_env, rtol=1e-4, atol=1e-4)
+
+    bpm, first_beat, beats = BPMAnalyze.analyze_bpm_and_beat_grid(path, sr, hop_length)
+    assert bpm == pytest.approx(expected_bpm, rel=1e-3)
+    assert first_beat == pytest.approx(expected_first_beat, abs=hop_length / sr)
+    assert len(beats) == len(expected_beats) and np.allclose(beats, expected_beats, atol=hop_length / sr)
+
+def test_analysis_process_maps_the_parent_decode(tmp_path, monkeypatch):
+    store = AudioStore(str(tmp_path))
+    monkeypatch.setattr(BPMAnalyze, "audio_store", store)
+    path = click_track(tmp_path)
+
+    process = BPMAnalyze.AnalysisProcess()
+    try:
+        estimates = []
+        result = process.analyze(path, on_estimate=lambda bpm, beats: estimates.append(bpm))
+
+    finally:
+        process.stop()
+
+    # One decode, made by this process; the entry is evictable again once the child is done.
+    assert sorted(os.listdir(tmp_path)) == ["clicks.wav", f"{store.file_hash(path)}_44100.npy"]
+    assert not store._holds and estimates
+
+    assert result == BPMAnalyze.analyze_bpm_and_beat_grid(path)
@@ -0,0 +1,107 @@
+import os
+import sys
+import json
+import time
+import queue
+
+import pytest
+
+from PyQt5.QtCore import QCoreApplication
+
+from System import DeviceManager
+from System import WireProtocol
+from System.Constants import ModelCodes
+
+FAKE_ADB = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_adb.py")
+
+pytestmark = pytest.mark.skipif(os.name == "nt", reason="the fake adb is started through a shell wrapper")
+
+@pytest.fixture(scope="module", autouse=True)
+def app():
+    # Signals emitted on the manager's thread are queued to this one.
+    return QCoreApplication.instance() or QCoreApplication([])
+
+@pytest.fixture
+def fake_adb(tmp_path, monkeypatch):
+    """Returns (adb_path, log_path) for a fake adb that runs tests/fake_adb.py with this interpreter."""
+    adb_path = tmp_path / "adb"
+    adb_path.write_text(f'#!/bin/sh\nexec "{sys.executable}" "{FAKE_ADB}" "$@"\n')
+    adb_path.chmod(0o755)
+
+    log_path = tmp_path / "adb.log"
+    log_path.touch()
+    monkeypatch.setenv("FAKE_ADB_LOG", str(log_path))
+
+    return str(adb_path), log_path
+
+def collect(manager):
+    events = queue.Queue()
+    manager.devices_changed.connect(lambda devices: events.put(("devices", devices)))
+    manager.device_connecting.connect(lambda serial: events.put(("connecting", serial)))
+    manager.device_connected.connect(lambda serial, model, sock, codec: (sock.close(), events.put(("connected", serial, model, codec))))
+    manager.device_disconnected.connect(lambda serial: events.put(("disconnected", serial)))
+    manager.connection_failed.connect(lambda serial, error: events.put(("failed", serial, error)))
+    manager.adb_failed.connect(lambda error: events.put(("adb", error)))
+    return events
+
+def wait_for(events, kind, timeout = 10):
+    deadline = time.monotonic() + timeout
+    seen = []
+
+    while time.monotonic() < deadline:
+        QCoreApplication.processEvents()
+
+        try:
+            event = events.get(timeout=0.01)
+
+        except queue.Empty:
+            continue
+
+        seen.append(event)
+        if event[0] == kind:
+            return event
+
+    raise AssertionError(f"No {kind!r} event, got {seen}")
+
+def test_connects_supported_phone_and_reports_unplug(fake_adb, monkeypatch):
+    adb_path, log_path = fake_adb
+    model_code = next(iter(ModelCodes))
+
+    monkeypatch.setenv("FAKE_ADB_SNAPSHOTS", json.dumps([
+        [0, {}],
+        [0.2, {"PIXEL1": "device", "NOTHING1": "offline"}],
+        [0.2, {"PIXEL1": "device", "NOTHING1": "device"}],
+        [1.0, {"PIXEL1": "device"}]
+    ]))
+    monkeypatch.setenv("FAKE_ADB_MODELS", json.dumps({"PIXEL1": "Pixel 8", "NOTHING1": model_code}))
+
+    receiver = WireProtocol.FakeReceiver()
+    manager = DeviceManager.DeviceManager(adb_path, receiver.address[1])
+    events = collect(manager)
+    manager.start()
+
+    try:
+        assert wait_for(events, "failed")[1] == "PIXEL1"
+        assert wait_for(events, "connected")[1:3] == ("NOTHING1", ModelCodes[model_code])
+        assert wait_for(events, "disconnected") == ("disconnected", "NOTHING1")
+        assert manager.connected_device is None
+
+    finally:
+        manager.stop()
+        receiver.close()
+
+    commands = log_path.read_text().splitlines()
+    assert commands[:2] == ["start-server", "track-devices"]
+    assert f"-s NOTHING1 forward tcp:{receiver.address[1]} tcp:{receiver.address[1]}" in commands
+    assert not any(command.startswith("-s PIXEL1 forward") for command in commands)
+
+def test_adb_failure_is_reported(tmp_path):
+    manager = DeviceManager.DeviceManager(str(tmp_path / "missing-adb"))
+    events = collect(manager)
+    manager.start()
+
+    try:
+        wait_for(events, "adb")
+
+    finally:
+        manager.stop()
@@ -0,0 +1,28 @@
+import pytest
+
+from System import Player
+
+def test_drift_is_measured_against_the_device_callbacks(sr = 44100, block = 512, fast = 1.001):
+    logger = Player.DriftLogger()
+    logger.start()
+
+    # The device pulls a block every block / sr seconds of wall time, but its clock runs 0.1% fast.
+    period = block / sr
+    for i in range(2000):
+        logger.device.append((i * period, i * period * 1000.0 * fast, 1.0))
+
+    # A seek halfway through is not drift.
+    logger.device[1000:] = [(time, position + 30000.0, speed) for time, position, speed in logger.device[1000:]]
+
+    # Paints every 16 ms whose playhead runs 5 ms behind the audio.
+    for i in range(1400):
+        time = 0.004 + i * 0.016
+        device_ms = time * 1000.0 * fast + (30000.0 if time >= 1000 * period else 0.0)
+        logger.paints.append((time, device_ms - 5.0))
+
+    logger.stop()
+    summary = logger.summary()
+
+    assert summary["samples"] > 1000
+    assert summary["p95_ms"] == pytest.approx(5.0, abs=0.1)
+    assert summary["device_ms_per_min"] == pytest.approx(60.0, rel=1e-3)
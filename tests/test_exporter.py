@@ -0,0 +1,236 @@
+import os
+import time
+import random
+import timeit
+
+import pytest
+import numpy as np
+
+from System import Exporter
+from System import GlyphEffects
+from System.Constants import *
+
+def random_label_file(folder, phone_model, rng, glyph_count = 300, duration_sec = 30.0):
+    """A Label file of random plain and zone glyphs, written the way the text export path writes them."""
+    track_count = ModelTracks[next(name for name, code in models.items() if code == phone_model.name)]
+    segments = ModelSegments[phone_model.name]
+    duration_ms = duration_sec * 1000
+
+    glyphs = []
+    for _ in range(glyph_count):
+        track = str(rng.randint(1, track_count))
+        if track in segments and rng.random() < 0.5:
+            track = f"{track}.{rng.randint(1, segments[track])}"
+
+        start = rng.choice([rng.randrange(0, int(duration_ms) - 3100), rng.uniform(0, duration_ms - 3100)])
+        glyph = {
+            "track": track,
+            "start": start,
+            "duration": rng.choice([rng.randrange(1, 40), rng.uniform(1, 3000)]),
+            "brightness": rng.randint(0, 100)
+        }
+
+        if rng.random() < 0.3:
+            glyph["end_brightness"] = rng.randint(0, 100)
+
+        glyphs.append(glyph)
+
+    lines = ["0.000000\t0.000000\tLABEL_VERSION=1", f"0.000000\t0.000000\tPHONE_MODEL={phone_model.name}"]
+    lines += GlyphEffects.glyphs_to_strings(glyphs)
+    lines.append(f"{duration_sec:.6f}\t{duration_sec:.6f}\tEND")
+
+    label_path = folder / f"{phone_model.name}.txt"
+    label_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    return Exporter.LabelFile(str(label_path))
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("phone_model", list(PhoneModel), ids=lambda model: model.name)
+def test_rasterize_matches_reference(tmp_path, phone_model, seed):
+    label_file = random_label_file(tmp_path, phone_model, random.Random(seed))
+
+    assert label_file.get_nglyph_data() == label_file._rasterize_reference()
+
+def random_project(phone_model, rng, duration_sec, glyph_count = 400, effects_per_kind = 6):
+    """Random plain glyphs and one glyph per effect setting draw, shaped like a real project."""
+    track_count = ModelTracks[next(name for name, code in models.items() if code == phone_model.name)]
+    segments = ModelSegments[phone_model.name]
+    duration_ms = duration_sec * 1000
+
+    def track():
+        track = rng.choice([str(track) for track in range(1, track_count + 1)])
+        if track in segments and rng.random() < 0.5:
+            return f"{track}.{rng.randint(1, segments[track])}"
+
+        return track
+
+    glyphs = []
+    for _ in range(glyph_count):
+        glyph = {
+            "track": track(),
+            "start": rng.choice([rng.randrange(0, int(duration_ms)), rng.uniform(0, duration_ms)]),
+            "duration": rng.choice([rng.randrange(1, 40), rng.uniform(1, 3000)]),
+            "brightness": rng.randint(0, 100)
+        }
+
+        if rng.random() < 0.3:
+            glyph["end_brightness"] = rng.randint(0, 100)
+
+        glyphs.append(glyph)
+
+    effects = []
+    for name, config in GlyphEffects.EffectsConfig.items():
+        if not callable(config.get("function")):
+            continue
+
+        for _ in range(effects_per_kind):
+            settings = {}
+            for key, meta in config.get("settings", {}).items():
+                if "choices" in meta:
+                    settings[key] = rng.choice(meta["choices"])
+
+                elif "min" in meta:
+                    settings[key] = rng.randint(meta["min"], meta["max"])
+
+                else:
+                    settings[key] = meta.get("default", 1)
+
+            glyph = {
+                "track": rng.choice(list(segments)) if config["segmented"] else str(rng.randint(1, track_count)),
+                "start": rng.uniform(0, duration_ms - 5000),
+                "duration": rng.uniform(500, 5000),
+                "brightness": rng.randint(5, 100),
+                "effect": {"name": name, "settings": settings}
+            }
+
+            if config.get("seeded"):
+                glyph["effect"]["seed"] = rng.randrange(2 ** 31)
+
+            effects.append(glyph)
+
+    return glyphs, effects
+
+def project_entries(glyphs, effects, phone_model, bpm):
+    return np.concatenate([GlyphEffects.glyphs_to_entries(glyphs)] + [GlyphEffects.effect_to_array(glyph, glyph["effect"], phone_model.name, bpm) for glyph in effects])
+
+def corpus_entries(phone_model, seed, duration_sec, bpm = 128, **sizes):
+    glyphs, effects = random_project(phone_model, random.Random(seed), duration_sec, **sizes)
+    return project_entries(glyphs, effects, phone_model, bpm)
+
+def label_times(entries):
+    """(time_from_ms, time_to_ms) pairs as a Label file stores them, from "%.6f" seconds."""
+    times = [
+        (round(float(f"{start / 1000:.6f}") * 1000, 3), round(float(f"{(start + duration) / 1000:.6f}") * 1000, 3))
+        for start, duration in zip(entries["start"].tolist(), entries["duration"].tolist())
+    ]
+
+    return np.array(times, dtype=np.float64).reshape(-1, 2)
+
+def label_rows(entries):
+    """(row_from, row_to) pairs as the text path snaps them."""
+    step = Exporter.LabelFile._TIME_STEP_MS
+    rows = [(round(Exporter.get_nearest_divisable_by(time_from_ms, step) / step), round(Exporter.get_nearest_divisable_by(time_to_ms, step) / step)) for time_from_ms, time_to_ms in label_times(entries).tolist()]
+
+    return np.array(rows, dtype=np.int64).reshape(-1, 2)
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("phone_model", list(PhoneModel), ids=lambda model: model.name)
+def test_rasterize_entries_matches_label_files(tmp_path, phone_model, seed, duration_sec = 90.0, bpm = 128):
+    """rasterize_entries against a Label file written with "%.6f" text and parsed back.
+
+    Cells may only differ where the "%.6f" round-off the direct path leaves
+    out changes the result: on rows where an edge sits on a frame boundary in
+    the text, and under entries whose start ties with another one only in the
+    text, which changes which of them is drawn last.
+    """
+    glyphs, effects = random_project(phone_model, random.Random(seed), duration_sec)
+
+    lines = ["0.000000\t0.000000\tLABEL_VERSION=1", f"0.000000\t0.000000\tPHONE_MODEL={phone_model.name}"]
+    lines += GlyphEffects.glyphs_to_strings(glyphs)
+    for glyph in effects:
+        lines += GlyphEffects.effect_to_label(glyph, glyph["effect"], phone_model.name, bpm)
+    lines.append(f"{duration_sec:.6f}\t{duration_sec:.6f}\tEND")
+
+    label_path = tmp_path / "golden.txt"
+    label_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    text_raster, text_custom1 = Exporter.LabelFile(str(label_path)).rasterize()
+
+    entries = project_entries(glyphs, effects, phone_model, bpm)
+    direct_raster, direct_custom1 = Exporter.rasterize_entries(entries, phone_model, duration_sec)
+
+    exact_rows = np.rint(np.stack((entries["start"], entries["start"] + entries["duration"]), axis=1) / Exporter.LabelFile._TIME_STEP_MS).astype(np.int64)
+    text_rows = label_rows(entries)
+    moved = exact_rows != text_rows
+    moved_rows = set(exact_rows[moved].tolist()) | set(text_rows[moved].tolist())
+
+    text_starts = label_times(entries)[:, 0]
+    _, tie, tie_sizes = np.unique(text_starts, return_inverse=True, return_counts=True)
+    reordered = (tie_sizes[tie] > 1) & (text_starts != entries["start"])
+    for i in np.nonzero(reordered)[0]:
+        first_row = min(exact_rows[i, 0], text_rows[i, 0])
+        moved_rows.update(range(first_row, max(exact_rows[i, 1], text_rows[i, 1], first_row + 1)))
+
+    assert direct_raster.data.shape == text_raster.data.shape
+    assert set(np.nonzero(text_raster.data != direct_raster.data)[0].tolist()) <= moved_rows
+    assert direct_custom1 == text_custom1
+
+    if not moved.any():
+        assert direct_raster.overwrites == text_raster.overwrites
+
+def test_parallel_rasterize_matches_serial(monkeypatch, duration_sec = 120.0):
+    monkeypatch.setattr(Exporter, "PARALLEL_EXPORT_MIN_CELLS", 0)
+
+    phone_model = PhoneModel.PHONE2
+    entries = corpus_entries(phone_model, 2, duration_sec, glyph_count = 2000, effects_per_kind = 10)
+
+    expected_raster, expected_custom1 = Exporter.rasterize_entries(entries, phone_model, duration_sec, workers = 1)
+    raster, custom1 = Exporter.rasterize_entries(entries, phone_model, duration_sec, workers = 2)
+
+    assert np.array_equal(raster.data, expected_raster.data)
+    assert raster.overwrites == expected_raster.overwrites
+    assert custom1 == expected_custom1
+
+@pytest.mark.benchmark
+def test_benchmark_parallel_export(report, monkeypatch, duration_sec = 600.0, repeats = 3, worker_counts = (2, 4)):
+    """Synthetic 11-track Phone (2) project, drawn in-process and over worker processes. Every run has to give the same raster."""
+    monkeypatch.setattr(Exporter, "PARALLEL_EXPORT_MIN_CELLS", 0)
+    phone_model = PhoneModel.PHONE2
+    entries = corpus_entries(phone_model, 2, duration_sec, glyph_count = 20000, effects_per_kind = 150)
+
+    expected_raster, expected_custom1 = Exporter.rasterize_entries(entries, phone_model, duration_sec, workers = 1)
+    serial_ms = min(timeit.repeat(lambda: Exporter.rasterize_entries(entries, phone_model, duration_sec, workers = 1), number=1, repeat=repeats)) * 1000
+
+    report(f"{len(entries)} entries, {expected_raster.rows}x{expected_raster.columns}, {expected_raster.overwrites} overwrites, {os.cpu_count()} CPUs")
+    report(f"  in-process: {serial_ms:8.1f} ms")
+
+    for workers in worker_counts:
+        started = time.perf_counter()
+        list(Exporter.export_pool(workers).map(abs, range(workers)))
+        start_up_ms = (time.perf_counter() - started) * 1000
+
+        raster, custom1 = Exporter.rasterize_entries(entries, phone_model, duration_sec, workers = workers)
+        assert np.array_equal(raster.data, expected_raster.data) and raster.overwrites == expected_raster.overwrites and custom1 == expected_custom1
+
+        parallel_ms = min(timeit.repeat(lambda: Exporter.rasterize_entries(entries, phone_model, duration_sec, workers = workers), number=1, repeat=repeats)) * 1000
+        report(f"  {workers} workers: {parallel_ms:8.1f} ms (pool start-up {start_up_ms:.0f} ms)")
+
+@pytest.mark.benchmark
+def test_benchmark_label_export(report, seed = 1, duration_sec = 240.0, bpm = 128, repeats = 3):
+    """The Label-file path against rasterize_entries on the same project."""
+    phone_model = PhoneModel.PHONE2
+    glyphs, effects = random_project(phone_model, random.Random(seed), duration_sec, glyph_count = 3000, effects_per_kind = 40)
+
+    def text_path():
+        effect_glyphs = [effect_glyph for glyph in effects for effect_glyph in GlyphEffects.effect_to_glyph(glyph, glyph["effect"], phone_model.name, bpm)]
+        return Exporter.LabelFile.from_glyphs(glyphs + effect_glyphs, phone_model, duration_sec).rasterize()
+
+    def direct_path():
+        return Exporter.rasterize_entries(project_entries(glyphs, effects, phone_model, bpm), phone_model, duration_sec)
+
+    # Effect expansions come from the cache in both paths, as they do for an export after editing.
+    text_path()
+    text_ms = min(timeit.repeat(text_path, number=1, repeat=repeats)) * 1000
+    direct_ms = min(timeit.repeat(direct_path, number=1, repeat=repeats)) * 1000
+
+    report(f"{len(glyphs)} glyphs + {len(effects)} effects, {duration_sec:.0f} s on {phone_model.name}: labels {text_ms:8.1f} ms, direct {direct_ms:7.1f} ms")
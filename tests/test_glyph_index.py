@@ -0,0 +1,81 @@
+import random
+import timeit
+
+import pytest
+
+from System.GlyphIndex import GlyphIndex
+
+def overlapping(glyphs, start_ms, end_ms, tracks = None):
+    return sorted(
+        glyph_id for glyph_id, glyph in glyphs.items()
+        if (tracks is None or str(glyph["track"]) in tracks) and glyph["start"] <= end_ms and glyph["start"] + glyph["duration"] >= start_ms
+    )
+
+def random_glyph(rng):
+    return {"track": str(rng.randint(1, 5)), "start": rng.uniform(0, 60000), "duration": rng.choice([rng.uniform(1, 500), rng.uniform(1, 20000)])}
+
+def test_query_matches_scan():
+    rng = random.Random(0)
+    glyphs = {}
+    index = GlyphIndex()
+
+    for step in range(3000):
+        action = rng.random()
+
+        if action < 0.5 or not glyphs:
+            glyph_id = str(step)
+            glyphs[glyph_id] = random_glyph(rng)
+            index.insert(glyph_id, glyphs[glyph_id])
+
+        elif action < 0.8:
+            glyph_id = rng.choice(list(glyphs))
+            glyphs[glyph_id] = random_glyph(rng)
+            index.update(glyph_id, glyphs[glyph_id])
+
+        else:
+            glyph_id = rng.choice(list(glyphs))
+            del glyphs[glyph_id]
+            index.remove(glyph_id)
+
+        if step % 25 == 0:
+            start_ms = rng.uniform(-1000, 61000)
+            end_ms = start_ms + rng.uniform(0, 5000)
+            tracks = rng.choice([None, {"1", "3"}])
+
+            assert sorted(index.query(start_ms, end_ms, tracks)) == overlapping(glyphs, start_ms, end_ms, tracks)
+
+def test_one_long_glyph():
+    index = GlyphIndex()
+    glyphs = {str(i): {"track": "1", "start": i * 100, "duration": 50} for i in range(2000)}
+    glyphs["long"] = {"track": "1", "start": 500, "duration": 150000}
+
+    for glyph_id, glyph in glyphs.items():
+        index.insert(glyph_id, glyph)
+
+    for start_ms in (0, 520, 90010, 150490, 150510, 199990):
+        assert sorted(index.query(start_ms, start_ms + 30)) == overlapping(glyphs, start_ms, start_ms + 30)
+
+    # Shortening the long glyph takes it out of the windows it no longer reaches.
+    glyphs["long"]["duration"] = 200
+    index.update("long", glyphs["long"])
+    assert index.query(90060, 90090) == overlapping(glyphs, 90060, 90090) == []
+
+    index.remove("long")
+    assert index.query(500, 600) == ["5", "6"]
+
+@pytest.mark.benchmark
+def test_benchmark_query_with_one_long_glyph(report, glyph_count = 50000, repeats = 5):
+    """Windowed queries over one track, with and without a glyph that spans all of it."""
+    glyphs = {str(i): {"track": "1", "start": i * 100, "duration": 50} for i in range(glyph_count)}
+    windows = [(start_ms, start_ms + 2000) for start_ms in range(0, glyph_count * 100, glyph_count * 100 // 200)]
+
+    for long_glyph in (False, True):
+        index = GlyphIndex()
+        index.rebuild(glyphs)
+
+        if long_glyph:
+            index.insert("long", {"track": "1", "start": 0, "duration": glyph_count * 100})
+
+        index.query(0, 0)
+        elapsed_ms = min(timeit.repeat(lambda: [index.query(*window) for window in windows], number=1, repeat=repeats)) * 1000
+        report(f"{glyph_count} glyphs, {len(windows)} queries, long glyph {'yes' if long_glyph else 'no '}: {elapsed_ms:7.2f} ms")
@@ -0,0 +1,131 @@
+import json
+import random
+import timeit
+import tracemalloc
+from types import SimpleNamespace
+
+import pytest
+import numpy as np
+
+from System import Exporter
+from System import GlyphEffects
+from System.Constants import *
+from System.GlyphStore import GlyphStore
+from System.GlyphIndex import GlyphIndex
+
+from test_exporter import random_project, project_entries
+
+def random_glyphs(rng, glyph_count, duration_ms = 600000):
+    tracks = [str(track) for track in range(1, 12)] + [f"1.{segment}" for segment in range(1, 17)]
+
+    return {
+        str(gid): {
+            "track": rng.choice(tracks),
+            "start": rng.choice([rng.randrange(0, duration_ms), rng.uniform(0, duration_ms)]),
+            "duration": rng.randrange(50, 3000),
+            "brightness": rng.randint(0, 100)
+        }
+        for gid in range(glyph_count)
+    }
+
+def test_store_round_trips_and_reports_deltas():
+    glyphs = random_glyphs(random.Random(1), 200)
+    glyphs["7"]["brightness"] = "50"
+    glyphs["8"]["note"] = {"text": "kept as is"}
+
+    store = GlyphStore(glyphs)
+    assert store.to_dict() == glyphs
+    assert list(store) == list(glyphs)
+
+    deltas = []
+    store.subscribe(deltas.append)
+
+    store["3"]["start"] = 5
+    store.update({"3": store["3"], "500": {"track": "2", "start": 1, "duration": 2}})
+    del store["4"]
+
+    delta = deltas[-2]
+    assert delta.updated["3"][0] == glyphs["3"] and delta.updated["3"][1]["start"] == 5
+    assert dict(delta.added["500"]) == {"track": "2", "start": 1, "duration": 2}
+    assert deltas[-1].removed == {"4": glyphs["4"]}
+
+def test_place_snapshots_until_stored_back():
+    glyphs = random_glyphs(random.Random(2), 50)
+    store = GlyphStore(glyphs)
+    deltas = []
+    store.subscribe(deltas.append)
+
+    moved = store.place(["1", "2", "missing"], [10.0, 20.0, 30.0])
+    moved = store.place(["1", "2", "missing"], [11.0, 21.0, 31.0])
+    assert list(moved) == ["1", "2"] and not deltas
+
+    store.update(moved)
+    assert {key: (old, new["start"]) for key, (old, new) in deltas[0].updated.items()} == {"1": (glyphs["1"], 11.0), "2": (glyphs["2"], 21.0)}
+
+@pytest.mark.parametrize("phone_model", [PhoneModel.PHONE1, PhoneModel.PHONE2], ids=lambda model: model.name)
+def test_store_to_entries_matches_dict_path(phone_model, bpm = 128):
+    glyphs, effects = random_project(phone_model, random.Random(4), 60.0, glyph_count = 600, effects_per_kind = 2)
+    glyphs[5]["brightness"] = "40"
+
+    # Segment glyphs with an effect are not exported, on either path.
+    store = GlyphStore({str(gid): glyph for gid, glyph in enumerate(glyphs + effects)})
+    expected = project_entries(glyphs, [glyph for glyph in effects if "." not in glyph["track"]], phone_model, bpm)
+
+    composition = SimpleNamespace(glyphs = store, bpm = bpm)
+    assert np.array_equal(Exporter.composition_to_entries(composition, phone_model.name), expected)
+
+@pytest.mark.benchmark
+def test_benchmark_glyph_store(report, glyph_count = 50000, repeats = 5):
+    """Memory, dragging every tenth glyph and building export entries: dict of dicts against GlyphStore."""
+    text = json.dumps(random_glyphs(random.Random(3), glyph_count))
+
+    tracemalloc.start()
+    glyphs = json.loads(text)
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    store = GlyphStore(json.loads(text))
+    store_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # One mouse move of Compositor's 'move' drag: clamp every selected start, write it and collect the moved glyphs.
+    index = GlyphIndex()
+    index.rebuild(glyphs)
+    keys = list(glyphs)[::10]
+    starts = np.array([glyphs[key]["start"] for key in keys], dtype=np.float64)
+    durations = np.array([glyphs[key]["duration"] for key in keys], dtype=np.float64)
+    lowest, highest = 100.0, 600000.0
+    offsets = iter(range(1, 1000))
+
+    def drag_dict():
+        updated = {}
+        for key, start in zip(keys, (starts + next(offsets)).tolist()):
+            glyph = glyphs.get(key)
+            glyph["start"] = max(lowest, min(start, highest - glyph["duration"]))
+            updated[key] = glyph
+            index.update(key, glyph)
+
+    def drag_store():
+        updated = {}
+        updated.update(store.place(keys, np.maximum(lowest, np.minimum(starts + next(offsets), highest - durations))))
+
+    def entries_dict():
+        return GlyphEffects.glyphs_to_entries(list(glyphs.values()))
+
+    def entries_store():
+        return Exporter.store_to_entries(store, "PHONE2", 128)
+
+    assert np.array_equal(entries_store(), entries_dict())
+
+    timings = {
+        name: min(timeit.repeat(function, number=1, repeat=repeats)) * 1000
+        for name, function in (
+            ("drag dict", drag_dict), ("drag store", drag_store),
+            ("entries dict", entries_dict), ("entries store", entries_store)
+        )
+    }
+
+    report(f"{glyph_count} glyphs: dict {dict_bytes / 1024 / 1024:.1f} MiB, store {store_bytes / 1024 / 1024:.1f} MiB")
+    report(f"  drag {len(keys)}: dict {timings['drag dict']:7.2f} ms, store {timings['drag store']:7.2f} ms")
+    report(f"  export entries: dict {timings['entries dict']:7.2f} ms, store {timings['entries store']:7.2f} ms")
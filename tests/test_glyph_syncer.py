@@ -0,0 +1,35 @@
+from types import SimpleNamespace
+
+import pytest
+
+from PyQt5.QtCore import QCoreApplication
+
+from System import RTVisualizer
+
+@pytest.fixture(scope="module", autouse=True)
+def app():
+    return QCoreApplication.instance() or QCoreApplication([])
+
+def test_queued_glyphs_do_not_follow_later_edits():
+    glyph = {"track": "1", "start": 100, "duration": 200, "brightness": 80, "effect": {"name": "Glitch", "settings": {"segmented": True}}}
+    expansion = [{"track": "1.1", "start": 100, "duration": 50, "brightness": 80}]
+
+    composition = SimpleNamespace(cached_effects = {"7": expansion}, cache_effect = lambda *args, **kwargs: None)
+    syncer = RTVisualizer.GlyphSyncer(composition)
+    sent = []
+    syncer.sender.enqueue = sent.append
+
+    syncer.push_live({7: glyph})
+    syncer.flush()
+    syncer.full_load({7: glyph})
+
+    # The GUI keeps editing the same objects while the sender thread has yet to encode them.
+    glyph["start"] = 900
+    glyph["effect"]["settings"]["segmented"] = False
+    expansion[0]["brightness"] = 0
+
+    update, load = sent
+    for queued in (update["glyphs"]["7"], load["glyphs"][0]):
+        assert queued["start"] == 100
+        assert queued["effect"]["settings"] == {"segmented": True}
+        assert queued["effect_to_glyphs"][0]["brightness"] == 80
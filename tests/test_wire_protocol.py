@@ -0,0 +1,83 @@
+import time
+import random
+
+import pytest
+
+from System import GlyphEffects
+from System import WireProtocol
+from System.Constants import ModelSegments
+
+def load_payload(glyph_count = 200, model = "PHONE2"):
+    rng = random.Random(7)
+    segmented = [track for track, segments in ModelSegments[model].items() if segments]
+    glyphs = []
+
+    for gid in range(glyph_count):
+        glyph = {"track": rng.choice(segmented), "start": rng.uniform(0, 180000), "duration": rng.uniform(200, 3000), "brightness": 100}
+
+        if gid % 2:
+            glyph = GlyphEffects.effectCallback("Glitch", {"segmented": True}, glyph)
+            glyph["effect_to_glyphs"] = GlyphEffects.effect_to_glyph(dict(glyph), glyph["effect"], model, 120)
+
+        glyphs.append(dict(glyph, id=gid))
+
+    return {"action": "load", "glyphs": glyphs}
+
+def send(payload, binary):
+    receiver = WireProtocol.FakeReceiver(binary=binary)
+    client_sock, codec = WireProtocol.connect(receiver.address)
+
+    data = codec.encode(payload)
+    client_sock.sendall(data)
+    client_sock.close()
+    receiver._thread.join(5)
+    receiver.close()
+
+    return codec, data, receiver.messages
+
+@pytest.mark.parametrize("binary", [False, True], ids=["json", "binary"])
+def test_load_round_trip(binary):
+    payload = load_payload()
+    codec, data, messages = send(payload, binary)
+
+    assert codec is (WireProtocol.BinaryCodec if binary else WireProtocol.JsonCodec)
+    assert len(messages) == 1
+
+    for sent, received in zip(payload["glyphs"], messages[0]["glyphs"], strict=True):
+        assert str(received["id"]) == str(sent["id"])
+        assert received["track"] == sent["track"]
+        assert received["start"] == pytest.approx(sent["start"], abs=1e-3)
+        assert received["duration"] == pytest.approx(sent["duration"], abs=1e-3)
+        assert received.get("effect") == sent.get("effect")
+        assert len(received.get("effect_to_glyphs", [])) == len(sent.get("effect_to_glyphs", []))
+
+def test_binary_is_smaller_than_json():
+    payload = load_payload()
+
+    assert len(WireProtocol.BinaryCodec.encode(payload)) < len(WireProtocol.JsonCodec.encode(payload)) / 2
+
+@pytest.mark.parametrize("payload", [
+    {"action": "delete", "ids": ["3", "17"]},
+    {"action": "play", "from_ms": 1250.5},
+    {"action": "stop"}
+], ids=lambda payload: payload["action"])
+def test_control_messages_round_trip(payload):
+    assert WireProtocol.BinaryCodec.decode(WireProtocol.BinaryCodec.encode(payload)[4:]) == payload
+
+@pytest.mark.benchmark
+def test_benchmark_codecs(report, repeats = 10):
+    """Wire size and encode time of a load snapshot, JSON against binary, through the fake receiver."""
+    payload = load_payload()
+    entries = sum(len(glyph.get("effect_to_glyphs", [])) for glyph in payload["glyphs"])
+    report(f"load: {len(payload['glyphs'])} glyphs, {entries} expanded entries")
+
+    for binary in (False, True):
+        codec, data, messages = send(payload, binary)
+
+        started = time.perf_counter()
+        for _ in range(repeats):
+            codec.encode(payload)
+        encode_ms = (time.perf_counter() - started) * 1000 / repeats
+
+        assert len(messages[0]["glyphs"]) == len(payload["glyphs"])
+        report(f"{codec.name:>9}: {len(data) / 1024:8.1f} KiB, encode {encode_ms:6.2f} ms")